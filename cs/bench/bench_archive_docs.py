@@ -0,0 +1,78 @@
+# bench/bench_archive_docs.py
+"""直接从压缩包读取文档的基准测试：比较完整解压分卷压缩包与只解析中央目录、按需读取单个页面的
+首次打开耗时和磁盘占用
+
+用法（在 cs 目录下）: python bench/bench_archive_docs.py [文档数] [分卷 MB]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_downloads import MB
+from bench_extract import make_split_archive
+from zsku.zip_archive import ZipArchive
+from zsku.zip_stream import SegmentReader, ZipStreamExtractor
+
+
+class FileSegments:
+    """按 SegmentReader 的接口读取磁盘上的分卷"""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def read_segment(self, index, position, size):
+        with open(self.paths[index], "rb") as f:
+            f.seek(position)
+            return f.read(size)
+
+
+def folder_size(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    part_size = int(float(sys.argv[2]) * MB) if len(sys.argv) > 2 else 4 * MB
+    folder = tempfile.mkdtemp(prefix="archive_bench_")
+    try:
+        files = make_split_archive(count, part_size)
+        paths = []
+        for name, data in files.items():
+            paths.append(os.path.join(folder, name.lstrip("/")))
+            with open(paths[-1], "wb") as f:
+                f.write(data)
+        archive_bytes = sum(len(data) for data in files.values())
+        print(f"{count} 个文档，{len(files)} 个分卷共 {archive_bytes / MB:.1f} MB")
+
+        output = os.path.join(folder, "extracted")
+        start = time.perf_counter()
+        ordered = sorted(paths, key=lambda path: (path.endswith(".zip"), path))
+        ZipStreamExtractor(SegmentReader(FileSegments(ordered), len(ordered)), output).extract()
+        extract_time = time.perf_counter() - start
+        print(f"完整解压: {extract_time * 1000:.0f} ms，额外占用磁盘 {folder_size(output) / MB:.1f} MB")
+
+        start = time.perf_counter()
+        archive = ZipArchive(paths)
+        opened = time.perf_counter() - start
+        first = archive.read("docs/api/page00000.html")
+        first_time = time.perf_counter() - start
+        names = random.Random(1).sample(sorted(archive.entries), min(500, len(archive)))
+        start = time.perf_counter()
+        for name in names:
+            archive.read(name)
+        per_page = (time.perf_counter() - start) * 1000 / len(names)
+        archive.close()
+        print(f"从压缩包读取: 解析中央目录 {opened * 1000:.1f} ms，第一个页面可用 {first_time * 1000:.1f} ms"
+              f"（{len(first) / 1024:.0f} KB），随机读取平均每页 {per_page:.2f} ms，不占用额外磁盘")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
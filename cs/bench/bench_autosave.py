@@ -0,0 +1,179 @@
+# bench/bench_autosave.py
+"""笔记自动保存基准测试
+
+- 界面线程每次保存被占用的时间：旧做法（界面线程上 toPlainText + 截断后写入）与后台保存，
+  分别在本地磁盘和模拟的慢速网络盘（每次写入多 200 ms）上
+- 连续输入：慢速盘上每 30 ms 输入一个字共 100 次，写入次数、同一文件同时进行的写入数和最终内容
+- 写入中途被杀死：旧做法和临时文件改名各试几次，目标文件是否总是完整的旧内容或新内容
+
+用法（在 cs 目录下）: python bench/bench_autosave.py [慢速盘延迟 ms]
+"""
+import os
+import sys
+import time
+import signal
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import logging
+
+SIZES = (100 * 1024, 1024 * 1024, 8 * 1024 * 1024)
+CRASH_BYTES = 64 * 1024 * 1024
+CRASH_RUNS = 5
+
+
+def make_text(size):
+    line = "今天的笔记 note line with some english words 和一些中文内容。\n"
+    return line * (size // len(line.encode("utf-8")) + 1)
+
+
+def slow(write, delay):
+    def slow_write(path, text):
+        time.sleep(delay)
+        write(path, text)
+    return slow_write
+
+
+def old_save(path, text, delay=0):
+    time.sleep(delay)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+def pump(app, condition, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待超时")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def stall_benchmark(app, folder, delay):
+    from PySide6.QtWidgets import QTextEdit
+    from bj import autosave
+    editor = QTextEdit()
+    write = autosave.atomic_write
+    for size in SIZES:
+        editor.setPlainText(make_text(size))
+        path = os.path.join(folder, f"stall{size}.txt")
+        for label, latency in (("本地磁盘", 0), (f"慢速盘 +{delay * 1000:.0f} ms", delay)):
+            began = time.perf_counter()
+            old_save(path, editor.toPlainText(), latency)
+            old = time.perf_counter() - began
+
+            autosave.atomic_write = slow(write, latency) if latency else write
+            saver = autosave.AutoSaver()
+            done = []
+            saver.saved.connect(lambda path, seconds, error: done.append((seconds, error)))
+            began = time.perf_counter()
+            saver.save(path, editor.toPlainText())
+            new = time.perf_counter() - began
+            pump(app, lambda: done)
+            autosave.atomic_write = write
+            print(f"{size // 1024:>5} KB {label}: 旧做法界面阻塞 {old * 1000:.1f} ms；"
+                  f"后台保存界面阻塞 {new * 1000:.1f} ms，写完用时 {done[0][0] * 1000:.0f} ms")
+
+
+def typing_benchmark(app, folder, delay):
+    from bj import autosave, note_history, note_search
+    from bj.bji import NotePage
+    note_search.NOTE_INDEX_FOLDER = os.path.join(folder, "index")
+    note_history.NOTE_HISTORY_FOLDER = os.path.join(folder, "history")
+    write = autosave.atomic_write
+    writes = []
+    in_flight = [0, 0]  # 当前、最多
+
+    def counting_write(path, text):
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(delay)
+        write(path, text)
+        writes.append(len(text))
+        in_flight[0] -= 1
+
+    autosave.atomic_write = counting_write
+    notes = os.path.join(folder, "notes")
+    os.makedirs(notes)
+    path = os.path.join(notes, "typing.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(make_text(200 * 1024))
+    page = NotePage()
+    page.autosave_timer.setInterval(100)  # 缩短防抖延迟，让输入中途也触发保存
+    page.current_folder = notes
+    page.load_txt_files()
+    page.open_note(path)
+    latencies = []
+    page.autosaver.saved.connect(lambda path, seconds, error: latencies.append(seconds))
+    for number in range(100):
+        page.text_edit.insertPlainText("字")
+        if number % 2 == 1:
+            page.save_note()  # 每输入两个字按一次保存，上一次还没写完
+        deadline = time.perf_counter() + 0.03
+        pump(app, lambda: time.perf_counter() > deadline)
+    pump(app, lambda: not page.autosave_timer.isActive() and not page.autosaver.is_saving(path))
+    with open(path, "r", encoding="utf-8") as f:
+        matches = f.read() == page.text_edit.toPlainText()
+    print(f"慢速盘上连续输入 100 次（其中按保存 50 次）: 写入 {len(writes)} 次，同一文件同时写入最多 {in_flight[1]} 个，"
+          f"最长保存耗时 {max(latencies) * 1000:.0f} ms，最终内容一致: {matches}")
+    autosave.atomic_write = write
+    page.note_search.close()
+    page.note_index.stop()
+
+
+def crash_benchmark(folder):
+    """子进程写入 64 MB 时被杀死，检查目标文件"""
+    old_text = "旧内容\n" * 1000
+    results = {}
+    for mode in ("old", "atomic"):
+        intact = 0
+        for run in range(CRASH_RUNS):
+            path = os.path.join(folder, f"crash_{mode}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(old_text)
+            process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "crash", mode, path])
+            time.sleep(0.3 + 0.1 * run)
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+            if content == old_text or len(content.encode("utf-8")) >= CRASH_BYTES:
+                intact += 1
+        leftovers = [name for name in os.listdir(folder) if name.startswith(".crash_")]
+        results[mode] = (intact, len(leftovers))
+        for name in leftovers:
+            os.remove(os.path.join(folder, name))
+    print(f"写入中途被杀死 {CRASH_RUNS} 次，目标文件完整: 旧做法 {results['old'][0]} 次，"
+          f"临时文件改名 {results['atomic'][0]} 次（留下 {results['atomic'][1]} 个临时文件）")
+
+
+def crash_child(mode, path):
+    from bj.autosave import atomic_write
+    text = make_text(CRASH_BYTES)
+    print("子进程开始写入", flush=True)
+    (atomic_write if mode == "atomic" else old_save)(path, text)
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == "crash":
+        crash_child(sys.argv[2], sys.argv[3])
+        return
+    delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.2
+    logging.disable(logging.INFO)
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    folder = tempfile.mkdtemp(prefix="autosave_bench_")
+    try:
+        stall_benchmark(app, folder, delay)
+        typing_benchmark(app, folder, delay)
+        crash_benchmark(folder)
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
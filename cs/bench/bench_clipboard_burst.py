@@ -0,0 +1,70 @@
+# bench/bench_clipboard_burst.py
+"""剪贴板通知风暴基准测试：模拟终端、IDE 一次复制分多次写入各种格式，
+统计收到的 dataChanged 次数与合并后实际处理的捕获次数，并检查自身写入不会被再次捕获
+
+用法（在 cs 目录下）: python bench/bench_clipboard_burst.py [复制次数] [每次复制的格式数]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QMimeData, QByteArray
+from PySide6.QtWidgets import QApplication
+from clipboard_manager import ClipboardWindow, CHANGE_DEBOUNCE_MS
+from clipboard_store import ClipboardStore
+
+FORMATS = ["text/html", "text/rtf", "application/x-vnd.terminal-attributes", "application/x-ide-selection"]
+
+
+def pump(app, seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def copy_burst(clipboard, text, formats):
+    """逐个追加格式重新写入剪贴板，每次写入都会触发一次 dataChanged"""
+    for count in range(formats):
+        mime_data = QMimeData()
+        mime_data.setText(text)
+        for name in FORMATS[:count]:
+            mime_data.setData(name, QByteArray(text.encode("utf-8")))
+        clipboard.setMimeData(mime_data)
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    formats = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    app = QApplication(sys.argv)
+    window = ClipboardWindow(ClipboardStore(tempfile.mkdtemp(prefix="clipboard_bench_")))
+    gap = CHANGE_DEBOUNCE_MS * 2 / 1000
+
+    for i in range(copies):
+        copy_burst(app.clipboard(), f"terminal output line {i}", formats)
+        pump(app, gap)
+    print(f"{copies} 次复制，每次 {formats} 次写入")
+    print(f"dataChanged 次数（合并前每次都会进入捕获流程）: {window.change_events}")
+    print(f"合并后实际处理的捕获次数: {window.captures}")
+    if window.change_events:
+        print(f"捕获处理减少: {(1 - window.captures / window.change_events) * 100:.0f}%")
+    print(f"历史记录条数: {len(window.history_model.history)}")
+
+    captures = window.captures
+    for row in range(min(5, window.history_model.rowCount())):
+        window.copy_to_clipboard(window.history_model.index(row))
+        pump(app, gap)
+    print(f"从历史中复制 5 次后新增的捕获: {window.captures - captures}")
+    copy_burst(app.clipboard(), "copied elsewhere", 1)
+    pump(app, gap)
+    print(f"随后其他程序复制新增的捕获: {window.captures - captures}")
+    window.cleanup()
+    app.clipboard().clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# bench/bench_clipboard_drag.py
+"""拖拽准备耗时基准测试：4K 截图从缩略图缓存取拖拽图标、复用已编码的 PNG 作为拖拽文件
+
+用法（在 cs 目录下）: python bench/bench_clipboard_drag.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPainter
+from clipboard_manager import ClipboardWindow
+from clipboard_model import DRAG_PIXMAP_ROLE
+from clipboard_store import ClipboardStore
+from clipboard_ingest import image_capture
+
+
+def make_screenshot():
+    image = QImage(3840, 2160, QImage.Format_ARGB32)
+    image.fill(QColor("#F0F2F5"))
+    painter = QPainter(image)
+    for i in range(200):
+        painter.fillRect((i * 97) % 3700, (i * 53) % 2100, 140, 60, QColor.fromHsv(i % 360, 180, 200))
+    painter.end()
+    return image
+
+
+def measure(app, window, label, rounds=20):
+    index = window.history_model.index(0)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        window.history_model.mimeData([index])
+        index.data(DRAG_PIXMAP_ROLE)
+        app.processEvents()
+    print(f"{label}: {(time.perf_counter() - start) / rounds * 1000:.2f} ms/次")
+
+
+def main():
+    app = QApplication(sys.argv)
+    window = ClipboardWindow(ClipboardStore(tempfile.mkdtemp(prefix="clipboard_bench_")))
+
+    start = time.perf_counter()
+    capture = image_capture(make_screenshot())  # 线程池中执行的部分
+    print(f"后台处理 4K 截图: {(time.perf_counter() - start) * 1000:.1f} ms（不占用 GUI 线程）")
+    window.add_capture(capture)
+
+    measure(app, window, "落盘前开始拖拽")
+    while window.history_model.entries[0].blob_path is None:
+        app.processEvents()
+        time.sleep(0.01)
+    measure(app, window, "落盘后开始拖拽")
+    window.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench/bench_clipboard_memory.py
+"""解码图片内存预算基准测试：连续复制多张 4K 截图，观察解码字节数是否受预算限制，
+以及被淘汰的原图在复制时重新解码的耗时
+
+用法（在 cs 目录下）: python bench/bench_clipboard_memory.py [截图数量] [预算 MB]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPainter
+from clipboard_manager import ClipboardWindow
+from clipboard_store import ClipboardStore
+from clipboard_ingest import image_capture
+
+MB = 1024 * 1024
+
+
+def make_screenshot(seed):
+    image = QImage(3840, 2160, QImage.Format_ARGB32)
+    image.fill(QColor.fromHsv(seed * 37 % 360, 40, 240))
+    painter = QPainter(image)
+    for i in range(50):
+        painter.fillRect((i * 97 + seed) % 3700, (i * 53) % 2100, 140, 60, QColor.fromHsv((i + seed) % 360, 180, 200))
+    painter.end()
+    return image
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    budget = int(sys.argv[2]) * MB if len(sys.argv) > 2 else 256 * MB
+    app = QApplication(sys.argv)
+    window = ClipboardWindow(ClipboardStore(tempfile.mkdtemp(prefix="clipboard_bench_")), image_budget=budget)
+    peak = [0]
+    window.image_cache.usage_changed.connect(lambda decoded: peak.__setitem__(0, max(peak[0], decoded)))
+    for seed in range(count):
+        window.add_capture(image_capture(make_screenshot(seed)))
+        app.processEvents()
+    while any(entry.blob_path is None for entry in window.history_model.entries):
+        app.processEvents()
+        time.sleep(0.01)
+    cache = window.image_cache
+    unbounded = count * 3840 * 2160 * 4
+    print(f"{count} 张 4K 截图，预算 {budget // MB} MB")
+    print(f"不淘汰时原图占用: {unbounded // MB} MB")
+    print(f"当前解码占用: {cache.decoded_bytes / MB:.1f} MB，峰值 {peak[0] / MB:.1f} MB，"
+          f"缓存 {len(cache)} 张，淘汰 {cache.evictions} 次")
+
+    oldest = window.history_model.index(count - 1)
+    start = time.perf_counter()
+    window.copy_to_clipboard(oldest)
+    print(f"复制已淘汰的原图（重新解码）: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    window.copy_to_clipboard(oldest)
+    print(f"再次复制（命中缓存）: {(time.perf_counter() - start) * 1000:.1f} ms")
+    window.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# bench/bench_clipboard_search.py
+"""剪贴板搜索基准测试：10 万条中英文混合记录上的查询耗时
+
+用法（在 cs 目录下）: python bench/bench_clipboard_search.py [条数]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboard_search import SearchIndex
+
+WORDS = ["alpha", "config", "connect", "context", "python", "clipboard", "search", "index", "token", "window"]
+PHRASES = ["剪贴板历史记录", "今天天气不错", "知识库文档", "笔记内容保存", "下载完成"]
+QUERIES = ["co", "con", "config12", "剪贴", "历史记录", "alpha1 window2", "天气 python"]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    index = SearchIndex()
+    start = time.perf_counter()
+    for entry_id in range(count):
+        words = " ".join(random.choice(WORDS) + str(random.randint(0, 300)) for _ in range(12))
+        index.add(entry_id, f"{words} {random.choice(PHRASES)}")
+    print(f"建立索引: {count} 条，{time.perf_counter() - start:.2f} s")
+
+    for query in QUERIES:
+        rounds = 20
+        start = time.perf_counter()
+        for _ in range(rounds):
+            results = index.search(query)
+        elapsed = (time.perf_counter() - start) / rounds * 1000
+        print(f"{query!r:20} {len(results):4} 条结果  {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
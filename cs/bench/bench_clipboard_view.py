@@ -0,0 +1,83 @@
+# bench/bench_clipboard_view.py
+"""剪贴板历史视图基准测试：插入 5 万条文本/图片混合记录，统计控件数量、绘制耗时和显示延迟
+
+用法（在 cs 目录下）: python bench/bench_clipboard_view.py [条数]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QWidget
+from PySide6.QtGui import QImage, QColor
+from clipboard_manager import ClipboardWindow
+from clipboard_store import ClipboardStore
+from clipboard_ingest import image_capture, text_capture
+
+CHUNK = 256  # 每批插入的条数
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = QApplication(sys.argv)
+    data_folder = tempfile.mkdtemp(prefix="clipboard_bench_")  # 不污染真实的历史记录
+    window = ClipboardWindow(ClipboardStore(data_folder, max_entries=count))
+
+    # 解码、哈希和缩略图在线程池中完成，这里预先生成，只统计 GUI 线程上的插入耗时。
+    # 每 4 条中有 1 条图片：轮流使用 64 张解码好的图片，各自换一个指纹，不会被当作重复捕获合并
+    images = []
+    for i in range(64):
+        image = QImage(800, 600, QImage.Format_ARGB32)
+        image.fill(QColor.fromHsv(i * 5, 160, 100 + i * 2))
+        images.append(image_capture(image))
+    captures = []
+    for i in range(count):
+        if i % 4 == 0:
+            capture = images[i // 4 % len(images)]
+            captures.append(dict(capture, fingerprint=f"{capture['fingerprint']}-{i}"))
+        else:
+            captures.append(text_capture(f"剪贴板文本 {i} " * 8))
+
+    # 分批插入，每批之后等后台写完并处理发回的信号（不计时），落盘的图片随之释放原图，
+    # 和实际使用中捕获陆续到来一样；一次全部插入会在内存中同时持有上万张原图
+    insert_time = 0
+    for first in range(0, count, CHUNK):
+        start = time.perf_counter()
+        for capture in captures[first:first + CHUNK]:
+            window.add_capture(capture)
+        insert_time += time.perf_counter() - start
+        while window.store.writer.queue.qsize():
+            app.processEvents()
+            time.sleep(0.001)
+        time.sleep(0.05)
+        app.processEvents()
+
+    start = time.perf_counter()
+    window.show()
+    app.processEvents()
+    show_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frames = 50
+    scroll_bar = window.history_view.verticalScrollBar()
+    for i in range(frames):
+        scroll_bar.setValue(scroll_bar.maximum() * i // frames)
+        window.history_view.viewport().grab()
+    paint_time = (time.perf_counter() - start) / frames
+
+    print(f"记录条数:     {count}")
+    images_shown = sum(1 for entry in window.history_model.entries if entry.file_type == "image")
+    print(f"其中图片:     {images_shown}")
+    print(f"控件数量:     {len(window.findChildren(QWidget))}")
+    print(f"插入总耗时:   {insert_time * 1000:.1f} ms ({insert_time / count * 1e6:.1f} us/条)")
+    print(f"显示延迟:     {show_time * 1000:.1f} ms")
+    print(f"单帧绘制:     {paint_time * 1000:.2f} ms")
+    window.close()
+    window.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench/bench_doc_search.py
+"""知识库全文搜索基准测试：生成数万个 javadoc 风格的 HTML 页面，测量首次索引、
+增量更新和各类查询的耗时
+
+用法（在 cs 目录下）: python bench/bench_doc_search.py [页面数]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from PySide6.QtCore import QCoreApplication
+from zsku.doc_search import DocIndexer, DocSearchIndex
+
+PREFIXES = ["get", "set", "is", "add", "remove", "put", "compute", "to", "as", "for", "parse", "value"]
+NOUNS = ["Map", "List", "Key", "Value", "Entry", "Stream", "Thread", "Buffer", "Channel", "Class", "Loader",
+         "Format", "Date", "Time", "Zone", "Locale", "Hash", "Tree", "Node", "Path", "File", "Socket", "Lock"]
+WORDS = ("returns the specified element if this collection contains no mapping for the key and throws "
+         "exception when argument is null otherwise value associated with thread safe implementation "
+         "返回 指定 元素 集合 映射 线程 安全").split()
+
+
+def make_page(rng, index):
+    classes = [rng.choice(NOUNS) + rng.choice(NOUNS) for _ in range(3)]
+    methods = [rng.choice(PREFIXES) + rng.choice(NOUNS) + rng.choice(NOUNS) for _ in range(30)]
+    rows = "".join(f"<tr><td><code>{m}(Object o)</code></td><td>{' '.join(rng.choices(WORDS, k=40))}</td></tr>"
+                   for m in methods)
+    return (f"<html><head><title>{classes[0]} (Java Platform SE 8)</title>"
+            f"<script>var x = {index};</script><style>td {{}}</style></head>"
+            f"<body><h1>Class {classes[0]}</h1><p>See also {classes[1]}, {classes[2]}.</p>"
+            f"<table>{rows}</table></body></html>")
+
+
+def timed_search(index, query, rounds=20):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = index.search(query)
+    return (time.perf_counter() - start) / rounds * 1000, len(results)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.INFO)
+    app = QCoreApplication(sys.argv)
+    folder = tempfile.mkdtemp(prefix="doc_search_bench_")
+    root = os.path.join(folder, "extracted")
+    rng = random.Random(1)
+    for i in range(count):
+        path = os.path.join(root, "jdk8", "api", f"p{i // 1000:02d}", f"Page{i:05d}.html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_page(rng, i))
+    db_path = os.path.join(folder, "index", "docs.sqlite3")
+
+    start = time.perf_counter()
+    DocIndexer(db_path, root).run()
+    print(f"首次索引 {count} 个页面: {time.perf_counter() - start:.1f} s，"
+          f"索引大小 {os.path.getsize(db_path) / 1024 / 1024:.0f} MB")
+    start = time.perf_counter()
+    DocIndexer(db_path, root).run()
+    print(f"没有变化时的增量更新: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    index = DocSearchIndex(db_path, root)
+    for query in ("getHashMap", "HashMap", "computeKeyValue", "thread safe", "ha", "线程安全", "Zone exception"):
+        elapsed, found = timed_search(index, query)
+        print(f"搜索 {query!r}: {elapsed:.1f} ms，{found} 条结果")
+    path, title, snippet = index.search("computeKeyValue")[0]
+    print("示例结果:", title, "|", snippet[:100])
+    index.close()
+    shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench/bench_download_cpu.py
+"""下载的 CPU 开销：本地 HTTP 服务器（单独进程，不计入开销）上下载分卷，
+比较固定读取大小、逐块发进度信号与自适应读取大小、限频进度信号时每 GB 消耗的 CPU 时间
+
+用法（在 cs 目录下）: python bench/bench_download_cpu.py [分卷数] [每卷 MB]
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from PySide6.QtCore import QCoreApplication, QObject
+from zsku import backend_module, integrity
+from zsku.backend_module import DownloadThread
+
+MB = 1024 * 1024
+GB = 1024 * MB
+CONFIGS = [
+    # 名称，初始读取大小，最大读取大小，进度信号最短间隔
+    ("固定 8 KB，逐块发信号", 8 * 1024, 8 * 1024, 0),
+    ("固定 64 KB，逐块发信号", 64 * 1024, 64 * 1024, 0),
+    ("固定 64 KB，10 Hz", 64 * 1024, 64 * 1024, 0.1),
+    ("自适应，10 Hz", backend_module.DOWNLOAD_CHUNK_SIZE, backend_module.MAX_CHUNK_SIZE, 0.1),
+]
+
+
+class Receiver(QObject):
+    """在主线程接收进度信号，模拟界面线程处理每个信号"""
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.signals = 0
+        self.error = None
+        self.last = None
+
+    def on_progress(self, info):
+        self.signals += 1
+        self.last = info
+
+    def on_finished(self, path, error):
+        self.error = error
+        self.app.quit()
+
+
+def start_server(folder):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen([sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1",
+                               "--directory", folder], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server, port
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("HTTP 服务器没有启动")
+
+
+def run(app, links, config):
+    name, chunk, max_chunk, interval = config
+    backend_module.DOWNLOAD_CHUNK_SIZE = chunk
+    backend_module.MAX_CHUNK_SIZE = max_chunk
+    backend_module.PROGRESS_INTERVAL = interval
+    folder = tempfile.mkdtemp(prefix="download_cpu_bench_")
+    receiver = Receiver(app)
+    thread = DownloadThread("bench-cpu", links, download_folder=folder, extract=False)
+    thread.transfer_progress.connect(receiver.on_progress)
+    thread.finished.connect(receiver.on_finished)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    thread.start()
+    app.exec()
+    thread.wait()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    total = receiver.last["downloaded"] if receiver.last else 0
+    shutil.rmtree(folder)
+    return name, cpu, wall, total, receiver.signals, receiver.error
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    part_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    logging.disable(logging.INFO)
+    app = QCoreApplication(sys.argv)
+    state = tempfile.mkdtemp(prefix="download_cpu_state_")
+    integrity.VERIFY_STATE_FOLDER = state  # 分卷和文件的校验记录不写入程序目录
+    source = tempfile.mkdtemp(prefix="download_cpu_source_")
+    names = ["jdk8.zip"] + [f"jdk8.z{i:02d}" for i in range(1, parts)]
+    block = os.urandom(MB)
+    for name in names:
+        with open(os.path.join(source, name), "wb") as f:
+            for _ in range(part_mb):
+                f.write(block)
+    server, port = start_server(source)
+    links = [f"http://127.0.0.1:{port}/{name}" for name in names]
+    print(f"{parts} 个分卷，共 {parts * part_mb} MB，服务器在单独的进程中")
+    try:
+        for config in CONFIGS:
+            name, cpu, wall, total, signals, error = run(app, links, config)
+            print(f"{name}: CPU {cpu / (total / GB):.2f} s/GB，用时 {wall:.2f} s（{total / MB / wall:.0f} MB/s），"
+                  f"进度信号 {signals} 个{'，错误: ' + error if error else ''}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(source)
+        shutil.rmtree(state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# bench/bench_download_queue.py
+"""下载队列基准测试：本地限速 HTTP 服务器上排队下载多个资源
+
+- 三个资源在后台下载时用户点击第四个：比较按先后顺序下载与前台优先（让位、续传）时等待的时间
+- 全局限速时多个资源合计的下载速度
+- 取消正在下载的资源，再重新加入队列时续传
+
+用法（在 cs 目录下）: python bench/bench_download_queue.py [每卷 MB] [每连接限速 MB/s]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from PySide6.QtCore import QCoreApplication
+from zsku import integrity
+from zsku.backend_module import DownloadThread
+from zsku.download_queue import DownloadQueue, RateLimiter, FOREGROUND, BACKGROUND
+
+MB = 1024 * 1024
+SEND_CHUNK = 16 * 1024
+RESOURCES = ["r0", "r1", "r2", "r3"]
+
+
+def make_server(files, rate):
+    sent = {"bytes": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            data = files[self.path]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+
+        def do_GET(self):
+            data = files[self.path]
+            header = self.headers.get("Range")
+            start = int(header[6:].split("-")[0]) if header else 0
+            if start:
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(data) - start))
+            self.end_headers()
+            began = time.perf_counter()
+            written = 0
+            try:
+                for offset in range(start, len(data), SEND_CHUNK):
+                    chunk = data[offset:offset + SEND_CHUNK]
+                    self.wfile.write(chunk)
+                    written += len(chunk)
+                    with lock:
+                        sent["bytes"] += len(chunk)
+                    delay = written / rate - (time.perf_counter() - began)  # 每个连接单独限速
+                    if delay > 0:
+                        time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sent
+
+
+class Session:
+    """一个下载目录和一个队列，记录各资源完成、取消的时间"""
+
+    def __init__(self, app, links, limit=0):
+        self.app = app
+        self.folder = tempfile.mkdtemp(prefix="download_queue_bench_")
+        self.limiter = RateLimiter(limit)
+        self.queue = DownloadQueue(self.create, max_active=2)
+        self.done = {}
+        self.cancelled = set()
+        self.errors = []
+        self.links = links
+        self.queue.finished.connect(self.on_finished)
+        self.queue.cancelled.connect(self.cancelled.add)
+
+    def create(self, key):
+        return DownloadThread(key, self.links[key], download_folder=self.folder, extract=False, limiter=self.limiter)
+
+    def on_finished(self, key, path, error):
+        if error:
+            self.errors.append(error)
+        self.done[key] = time.perf_counter()
+
+    def wait(self, condition, timeout=120):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("等待下载超时")
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def pump(self, seconds):
+        """处理事件一段时间"""
+        deadline = time.perf_counter() + seconds
+        self.wait(lambda: time.perf_counter() > deadline)
+
+    def close(self):
+        self.queue.stop_all()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+def click_during_background(app, links, priority):
+    """后台排队三个资源，0.5 秒后用户点击第四个，返回点击后等待的时间"""
+    session = Session(app, links)
+    for key in RESOURCES[:3]:
+        session.queue.enqueue(key, BACKGROUND)
+    session.pump(0.5)
+    clicked = time.perf_counter()
+    session.queue.enqueue(RESOURCES[3], priority)
+    session.wait(lambda: len(session.done) == len(RESOURCES))
+    waited = session.done[RESOURCES[3]] - clicked
+    total = max(session.done.values()) - clicked
+    session.close()
+    return waited, total, session.errors
+
+
+def main():
+    part_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    rate = float(sys.argv[2]) * MB if len(sys.argv) > 2 else 2 * MB
+    logging.disable(logging.INFO)
+    app = QCoreApplication(sys.argv)
+    state = tempfile.mkdtemp(prefix="download_queue_state_")
+    integrity.VERIFY_STATE_FOLDER = state  # 分卷和文件的校验记录不写入程序目录
+    files = {}
+    links = {}
+    for key in RESOURCES:
+        names = [f"/{key}.zip", f"/{key}.z01"]
+        for name in names:
+            files[name] = os.urandom(int(part_mb * MB))
+        links[key] = names
+    server, sent = make_server(files, rate)
+    base = f"http://127.0.0.1:{server.server_port}"
+    links = {key: [base + name for name in names] for key, names in links.items()}
+    resource_mb = 2 * part_mb
+    print(f"{len(RESOURCES)} 个资源，每个 2 卷共 {resource_mb:.0f} MB，每连接限速 {rate / MB:.1f} MB/s，同时下载 2 个资源")
+
+    for label, priority in (("先后顺序", BACKGROUND), ("前台优先", FOREGROUND)):
+        sent["bytes"] = 0
+        waited, total, errors = click_during_background(app, links, priority)
+        print(f"{label}: 点击的资源等待 {waited:.2f} s，全部完成 {total:.2f} s，"
+              f"传输 {sent['bytes'] / MB:.1f} MB（应为 {resource_mb * len(RESOURCES):.0f} MB），错误 {len(errors)} 个")
+
+    # 全局限速：服务器不限速，两个资源合计限制在 3 MB/s
+    fast_server, _ = make_server(files, 1000 * MB)
+    fast_links = {key: [link.replace(base, f"http://127.0.0.1:{fast_server.server_port}") for link in value]
+                  for key, value in links.items()}
+    session = Session(app, fast_links, limit=3 * MB)
+    start = time.perf_counter()
+    for key in RESOURCES[:2]:
+        session.queue.enqueue(key, BACKGROUND)
+    session.wait(lambda: len(session.done) == 2)
+    elapsed = time.perf_counter() - start
+    print(f"全局限速 3 MB/s: 两个资源合计 {2 * resource_mb / elapsed:.2f} MB/s")
+    session.close()
+    fast_server.shutdown()
+
+    # 取消后再次下载：已下载的部分续传
+    sent["bytes"] = 0
+    session = Session(app, links)
+    session.queue.enqueue(RESOURCES[0], FOREGROUND)
+    session.pump(0.5)
+    session.queue.cancel(RESOURCES[0])
+    session.wait(lambda: RESOURCES[0] in session.cancelled)
+    partial = sum(os.path.getsize(os.path.join(session.folder, name)) for name in os.listdir(session.folder))
+    session.queue.enqueue(RESOURCES[0], FOREGROUND)
+    session.wait(lambda: RESOURCES[0] in session.done)
+    print(f"取消时已保存 {partial / MB:.1f} MB，重新下载后共传输 {sent['bytes'] / MB:.1f} MB"
+          f"（资源 {resource_mb:.0f} MB），队列空闲: {session.queue.is_idle()}")
+    session.close()
+    shutil.rmtree(state)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# bench/bench_downloads.py
+"""分卷下载基准测试：本地限速 HTTP 服务器上比较逐个下载与并发下载的耗时，
+并测试中断后按 Range 续传时重复传输的字节数
+
+用法（在 cs 目录下）: python bench/bench_downloads.py [分卷数] [每卷 MB] [每连接限速 MB/s]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from PySide6.QtCore import QCoreApplication
+from zsku import integrity
+from zsku.backend_module import DownloadThread, DownloadStopped
+
+MB = 1024 * 1024
+SEND_CHUNK = 16 * 1024
+
+
+def make_server(files, rate):
+    sent = {"bytes": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _range(self, size):
+            header = self.headers.get("Range")
+            if not header or not header.startswith("bytes="):
+                return None
+            start = int(header[6:].split("-")[0])
+            return start
+
+        def do_HEAD(self):
+            data = files.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+
+        def do_GET(self):
+            data = files.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            start = self._range(len(data))
+            if start is not None and start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if start is None:
+                start = 0
+                self.send_response(200)
+            else:
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            self.send_header("Content-Length", str(len(data) - start))
+            self.end_headers()
+            began = time.perf_counter()
+            written = 0
+            try:
+                for offset in range(start, len(data), SEND_CHUNK):
+                    chunk = data[offset:offset + SEND_CHUNK]
+                    self.wfile.write(chunk)
+                    written += len(chunk)
+                    with lock:
+                        sent["bytes"] += len(chunk)
+                    delay = written / rate - (time.perf_counter() - began)  # 每个连接单独限速
+                    if delay > 0:
+                        time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sent
+
+
+def run_download(links, folder, connections):
+    thread = DownloadThread("bench", links, max_connections=connections, download_folder=folder)
+    start = time.perf_counter()
+    thread.download_parts()
+    return time.perf_counter() - start, thread
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    part_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rate = float(sys.argv[3]) * MB if len(sys.argv) > 3 else 4 * MB
+    logging.disable(logging.INFO)
+    app = QCoreApplication(sys.argv)
+    state = tempfile.mkdtemp(prefix="download_bench_state_")
+    integrity.VERIFY_STATE_FOLDER = state  # 分卷和文件的校验记录不写入程序目录
+    names = ["/jdk8.zip"] + [f"/jdk8.z{i:02d}" for i in range(1, parts)]
+    files = {name: os.urandom(int(part_mb * MB)) for name in names}
+    server, sent = make_server(files, rate)
+    links = [f"http://127.0.0.1:{server.server_port}{name}" for name in names]
+    total = sum(len(data) for data in files.values())
+    print(f"{parts} 个分卷，共 {total / MB:.0f} MB，每连接限速 {rate / MB:.1f} MB/s")
+
+    for connections in (1, 4):
+        folder = tempfile.mkdtemp(prefix="download_bench_")
+        elapsed, _ = run_download(links, folder, connections)
+        print(f"{connections} 个连接: {elapsed:.2f} s（{total / MB / elapsed:.1f} MB/s）")
+        shutil.rmtree(folder)
+
+    # 下载到一半时停止，再续传
+    folder = tempfile.mkdtemp(prefix="download_bench_")
+    thread = DownloadThread("bench", links, max_connections=4, download_folder=folder)
+    worker = threading.Thread(target=lambda: _ignore_stop(thread))
+    sent["bytes"] = 0
+    worker.start()
+    while thread.downloaded_bytes < total // 2:
+        time.sleep(0.01)
+    thread.stop()
+    worker.join()
+    first = sent["bytes"]
+    partial = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+    elapsed, resumed = run_download(links, folder, 4)
+    resent = sent["bytes"] - first
+    complete = all(open(os.path.join(folder, name[1:]), "rb").read() == data for name, data in files.items())
+    print(f"中断时已保存 {partial / MB:.1f} MB，续传 {resent / MB:.1f} MB，用时 {elapsed:.2f} s，"
+          f"重复传输 {(first + resent - total) / MB:.1f} MB，文件完整: {complete}")
+    shutil.rmtree(folder)
+    shutil.rmtree(state)
+    server.shutdown()
+
+
+def _ignore_stop(thread):
+    try:
+        thread.download_parts()
+    except DownloadStopped:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench/bench_extract.py
+"""边下载边解压基准测试：在本地限速 HTTP 服务器上提供分卷文档压缩包，
+比较“全部下载完再解压”与流水线解压的第一个文档可读时间和总耗时
+
+用法（在 cs 目录下）: python bench/bench_extract.py [文档数] [分卷 MB] [每连接限速 MB/s]
+"""
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+from PySide6.QtCore import QCoreApplication, Qt
+from bench_downloads import make_server, MB
+from zsku import integrity
+from zsku.backend_module import DownloadThread
+
+WORDS = ("class interface method return static public private void string list map thread "
+         "stream lambda package import exception override final synchronized").split()
+
+
+def make_document(index):
+    words = [WORDS[(index * 7 + i * 13) % len(WORDS)] for i in range(3000)]
+    noise = os.urandom(6000).hex()  # 让压缩率接近真实文档
+    return f"<html><body><h1>doc {index}</h1><p>{' '.join(words)}</p><pre>{noise}</pre></body></html>"
+
+
+def make_split_archive(count, part_size):
+    """生成分卷 zip：第一个分卷以分卷标记开头，最后一个分卷为 .zip"""
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as buffer:
+        buffer_path = buffer.name
+    with zipfile.ZipFile(buffer_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(count):
+            archive.writestr(f"docs/api/page{index:05d}.html", make_document(index))
+    with open(buffer_path, "rb") as f:
+        data = b"PK\x07\x08" + f.read()
+    os.remove(buffer_path)
+    chunks = [data[i:i + part_size] for i in range(0, len(data), part_size)]
+    files = {f"/docs.z{i + 1:02d}": chunk for i, chunk in enumerate(chunks[:-1])}
+    files["/docs.zip"] = chunks[-1]
+    return files
+
+
+def first_document_time(thread, start, result):
+    def on_extracted(path):
+        result.setdefault("first", time.perf_counter() - start)
+    thread.file_extracted.connect(on_extracted, Qt.DirectConnection)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    part_size = int(float(sys.argv[2]) * MB) if len(sys.argv) > 2 else 4 * MB
+    rate = float(sys.argv[3]) * MB if len(sys.argv) > 3 else 4 * MB
+    logging.disable(logging.INFO)
+    app = QCoreApplication(sys.argv)
+    state = tempfile.mkdtemp(prefix="extract_bench_state_")
+    integrity.VERIFY_STATE_FOLDER = state  # 分卷和文件的校验记录不写入程序目录
+    files = make_split_archive(count, part_size)
+    server, _ = make_server(files, rate)
+    names = ["/docs.zip"] + sorted(name for name in files if name != "/docs.zip")
+    links = [f"http://127.0.0.1:{server.server_port}{name}" for name in names]
+    total = sum(len(data) for data in files.values())
+    first_part = len(files["/docs.z01"]) if "/docs.z01" in files else total
+    print(f"{count} 个文档，{len(files)} 个分卷共 {total / MB:.1f} MB，每连接限速 {rate / MB:.1f} MB/s")
+    print(f"第一个分卷单独下载约需 {first_part / rate:.2f} s")
+
+    # 先全部下载，再用 zipfile 逐个解压（原来的流程，只是把 7z.exe 换成进程内解压）
+    folder = tempfile.mkdtemp(prefix="extract_bench_")
+    output = os.path.join(folder, "out")
+    thread = DownloadThread("bench", links, download_folder=folder)
+    start = time.perf_counter()
+    thread.download_parts()
+    downloaded = time.perf_counter() - start
+    with open(os.path.join(folder, "joined.zip"), "wb") as joined:
+        for path in thread.segment_paths:
+            with open(path, "rb") as f:
+                joined.write(f.read()[4:] if path.endswith(".z01") else f.read())
+    with zipfile.ZipFile(os.path.join(folder, "joined.zip")) as archive:
+        names_in_zip = archive.namelist()
+        archive.extract(names_in_zip[0], output)
+        first = time.perf_counter() - start
+        archive.extractall(output)
+    sequential = time.perf_counter() - start
+    print(f"先下载后解压: 下载 {downloaded:.2f} s，第一个文档 {first:.2f} s，全部完成 {sequential:.2f} s")
+    shutil.rmtree(folder)
+
+    # 流水线：边下载边解压
+    folder = tempfile.mkdtemp(prefix="extract_bench_")
+    output = os.path.join(folder, "out")
+    thread = DownloadThread("bench", links, download_folder=folder)
+    result = {}
+    start = time.perf_counter()
+    first_document_time(thread, start, result)
+    thread.download_and_extract(output)
+    pipelined = time.perf_counter() - start
+    extracted = sum(len(files_in) for _, _, files_in in os.walk(output))
+    print(f"边下载边解压: 第一个文档 {result['first']:.2f} s，全部完成 {pipelined:.2f} s，解压 {extracted} 个文件")
+    shutil.rmtree(folder)
+    shutil.rmtree(state)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
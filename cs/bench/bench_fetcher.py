@@ -0,0 +1,212 @@
+# bench/bench_fetcher.py
+"""图片链接下载基准测试：在本地 HTTP 服务器上检查 ImageFetcher 的各个分支，并测量首次下载与重新验证的耗时
+
+- HEAD 声明了图片类型时直接下载；类型未知时用 Range 只取文件头判断
+- 不是图片的链接不下载正文；超过大小上限时按 Content-Length 提前拒绝，没有长度时下载到上限即中止
+- 已缓存的链接用 If-None-Match / If-Modified-Since 重新验证，未修改时返回 304，不再传输正文
+
+每种情况列出服务器收到的请求（方法、Range、状态码、正文字节数）。
+
+用法（在 cs 目录下）: python bench/bench_fetcher.py [重新验证的图片数] [每张 KB]
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboard_fetcher import ImageFetcher
+
+KB = 1024
+MAX_BYTES = 1024 * KB  # 测试用的大小上限
+SEND_CHUNK = 16 * KB
+LAST_MODIFIED = formatdate(time.time() - 3600, usegmt=True)
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+def make_server(files):
+    """files: 路径 -> {"type": Content-Type 或 None, "data": 正文, "length": 是否发送 Content-Length,
+    "etag": 是否发送 ETag（默认发送；不发送时只能按 Last-Modified 重新验证）}"""
+    log = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def record(self, status, sent):
+            with lock:
+                log.append((self.command, self.path, self.headers.get("Range"), status, sent))
+
+        def start(self, status, entry, length, headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            if entry["type"]:
+                self.send_header("Content-Type", entry["type"])
+            if entry.get("etag", True):
+                self.send_header("ETag", f'"{hashlib.sha1(entry["data"]).hexdigest()}"')
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.send_header("Accept-Ranges", "bytes")
+            if entry["length"]:
+                self.send_header("Content-Length", str(length))
+            else:
+                self.send_header("Connection", "close")  # 没有长度时以关闭连接表示结束
+                self.close_connection = True
+            self.end_headers()
+
+        def do_HEAD(self):
+            entry = files.get(self.path)
+            if entry is None:
+                self.send_error(404)
+                self.record(404, 0)
+                return
+            self.start(200, entry, len(entry["data"]))
+            self.record(200, 0)
+
+        def do_GET(self):
+            entry = files.get(self.path)
+            if entry is None:
+                self.send_error(404)
+                self.record(404, 0)
+                return
+            data = entry["data"]
+            if entry.get("etag", True):
+                not_modified = self.headers.get("If-None-Match") == f'"{hashlib.sha1(data).hexdigest()}"'
+            else:
+                not_modified = self.headers.get("If-Modified-Since") == LAST_MODIFIED
+            if not_modified:
+                self.send_response(304)
+                self.end_headers()
+                self.record(304, 0)
+                return
+            header = self.headers.get("Range")
+            if header and header.startswith("bytes="):
+                first, _, last = header[6:].partition("-")
+                first = int(first)
+                last = min(int(last) if last else len(data) - 1, len(data) - 1)
+                body = data[first:last + 1]
+                status = 206
+                self.start(206, dict(entry, length=True), len(body),
+                           [("Content-Range", f"bytes {first}-{last}/{len(data)}")])
+            else:
+                body = data
+                status = 200
+                self.start(200, entry, len(body))
+            sent = 0
+            try:
+                for offset in range(0, len(body), SEND_CHUNK):
+                    self.wfile.write(body[offset:offset + SEND_CHUNK])
+                    sent += min(SEND_CHUNK, len(body) - offset)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.record(status, sent)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, log
+
+
+def image_bytes(size, seed=0):
+    body = hashlib.sha256(str(seed).encode()).digest() * (size // 32 + 1)
+    return PNG + body[:size - len(PNG)]
+
+
+def describe(requests):
+    return "，".join(f"{method}{' ' + byte_range if byte_range else ''} → {status}（{sent:,} 字节）"
+                     for method, _, byte_range, status, sent in requests) or "无请求"
+
+
+def check(fetcher, log, base, label, path, expect_saved):
+    first = len(log)
+    began = time.perf_counter()
+    result = fetcher.fetch(base + path)
+    elapsed = time.perf_counter() - began
+    time.sleep(0.05)  # 等服务器线程记录被中止的请求
+    requests = [entry for entry in log[first:] if entry[1] == path]
+    ok = (result is not None) == expect_saved
+    print(f"{'通过' if ok else '失败'} {label}: {'已保存' if result else '未保存'}，{elapsed * 1000:.0f} ms；"
+          f"{describe(requests)}")
+    return ok, requests
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    image_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    png = image_bytes(200 * KB)
+    files = {
+        "/typed.png": {"type": "image/png", "data": png, "length": True},
+        "/untyped.png": {"type": "application/octet-stream", "data": png, "length": True},
+        "/untyped.txt": {"type": None, "data": b"just some text, not an image" * 1000, "length": True},
+        "/page.html": {"type": "text/html", "data": b"<html></html>" * 1000, "length": True},
+        "/a.svg": {"type": "image/svg+xml", "data": b'<svg xmlns="http://www.w3.org/2000/svg"/>', "length": True},
+        "/photo.avif": {"type": "image/avif", "data": b"\x00\x00\x00\x1cftypavif" + png, "length": True},
+        "/huge.png": {"type": "image/png", "data": image_bytes(4 * MAX_BYTES), "length": True},
+        "/stream.png": {"type": "image/png", "data": image_bytes(32 * MAX_BYTES), "length": False},
+        "/dated.png": {"type": "image/png", "data": png, "length": True, "etag": False},
+    }
+    for index in range(count):
+        files[f"/batch{index}.png"] = {"type": "image/png", "data": image_bytes(image_kb * KB, index), "length": True}
+    server, log = make_server(files)
+    base = f"http://127.0.0.1:{server.server_port}"
+    folder = tempfile.mkdtemp(prefix="fetcher_bench_")
+    fetcher = ImageFetcher(folder, max_bytes=MAX_BYTES)
+    results = []
+    try:
+        print(f"大小上限 {MAX_BYTES // KB} KB")
+        ok, requests = check(fetcher, log, base, "声明 image/png", "/typed.png", True)
+        results.append(ok and [entry[0] for entry in requests] == ["HEAD", "GET"])
+        ok, requests = check(fetcher, log, base, "类型未知的 PNG（Range 取文件头）", "/untyped.png", True)
+        results.append(ok and any(entry[2] and entry[4] <= 16 for entry in requests))
+        ok, requests = check(fetcher, log, base, "类型未知的文本", "/untyped.txt", False)
+        results.append(ok and sum(entry[4] for entry in requests) <= 16)
+        ok, requests = check(fetcher, log, base, "text/html", "/page.html", False)
+        results.append(ok and [entry[0] for entry in requests] == ["HEAD"])
+        ok, _ = check(fetcher, log, base, "声明 image/svg+xml", "/a.svg", True)
+        results.append(ok)
+        ok, _ = check(fetcher, log, base, "声明 image/avif", "/photo.avif", True)
+        results.append(ok)
+        ok, requests = check(fetcher, log, base, "Content-Length 超过上限", "/huge.png", False)
+        results.append(ok and sum(entry[4] for entry in requests) == 0)
+        ok, requests = check(fetcher, log, base, "没有长度、实际超过上限", "/stream.png", False)
+        results.append(ok and sum(entry[4] for entry in requests) < len(files["/stream.png"]["data"]))
+        ok, requests = check(fetcher, log, base, "再次复制 /typed.png（重新验证）", "/typed.png", True)
+        results.append(ok and [entry[3] for entry in requests] == [304])
+        check(fetcher, log, base, "只有 Last-Modified 的图片", "/dated.png", True)
+        ok, requests = check(fetcher, log, base, "再次复制 /dated.png（If-Modified-Since）", "/dated.png", True)
+        results.append(ok and [entry[3] for entry in requests] == [304])
+        files["/typed.png"] = dict(files["/typed.png"], data=image_bytes(200 * KB, 1))
+        ok, requests = check(fetcher, log, base, "服务器上内容已变化", "/typed.png", True)
+        results.append(ok and [entry[3] for entry in requests] == [200])
+        leftovers = [name for name in os.listdir(folder) if name.endswith(".part")]
+        results.append(not leftovers)
+        print(f"缓存目录中的临时文件: {len(leftovers)} 个")
+
+        paths = [f"/batch{index}.png" for index in range(count)]
+        for label in ("首次下载", "重新验证"):
+            first = len(log)
+            began = time.perf_counter()
+            saved = sum(1 for path in paths if fetcher.fetch(base + path))
+            elapsed = time.perf_counter() - began
+            time.sleep(0.05)  # 等服务器线程记录最后一个请求
+            sent = sum(entry[4] for entry in log[first:])
+            print(f"{label} {count} 张 {image_kb} KB 的图片: {elapsed * 1000:.0f} ms"
+                  f"（每张 {elapsed / count * 1000:.1f} ms），请求 {len(log) - first} 个，正文 {sent / KB:,.0f} KB，"
+                  f"保存 {saved} 张")
+        print(f"全部检查通过: {all(results)}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# bench/bench_large_file.py
+"""大文件模式基准测试：生成一个日志式的大文本文件，比较整个读入 QTextEdit 与大文件模式
+
+- 旧做法：file.read() + setPlainText，界面线程阻塞的时间和进程内存峰值
+- 大文件模式：显示开头的时间、后台建立行索引的时间、跳到中间某行的时间和内存峰值
+- 在文件中间和末尾各修改几行后保存：写入的字节数和耗时，保存后的文件内容和行索引是否正确
+
+每种做法在单独的子进程中运行，内存峰值互不影响。旧做法在大文件上可能要几分钟、占用数 GB 内存，
+默认只在 1/10 大小的文件上运行。
+
+用法（在 cs 目录下）: python bench/bench_large_file.py [MB] [旧做法使用的 MB]
+"""
+import os
+import sys
+import time
+import shutil
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import logging
+
+LINE = "2024-05-01 12:00:{second:02d} INFO worker-{worker} 处理请求 id={number} 用时 {ms}ms\n"
+
+
+def make_file(path, megabytes):
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    number = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            lines = "".join(LINE.format(second=i % 60, worker=i % 8, number=i, ms=i % 997)
+                             for i in range(number, number + 10000))
+            f.write(lines)
+            written += len(lines.encode("utf-8"))
+            number += 10000
+    return number
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def anonymous_mb():
+    """不算映射的文件页（系统可以随时回收）的常驻内存"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+def pump(app, condition, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待超时")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def run_old(path):
+    from PySide6.QtWidgets import QApplication, QTextEdit
+    app = QApplication(sys.argv)
+    editor = QTextEdit()
+    editor.show()
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as file:
+        editor.setPlainText(file.read())
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    print(f"整个读入 QTextEdit（{os.path.getsize(path) / 1024 / 1024:.0f} MB）: 界面阻塞 {elapsed:.1f} s，"
+          f"内存峰值 {peak_mb():.0f} MB，其中匿名内存 {anonymous_mb():.0f} MB")
+
+
+def run_large(path):
+    from PySide6.QtWidgets import QApplication
+    from bj.large_file import LargeFileView, LineIndexer
+    app = QApplication(sys.argv)
+    base = anonymous_mb()
+    view = LargeFileView()
+    view.resize(800, 600)
+    view.show()
+    start = time.perf_counter()
+    view.open(path)
+    pump(app, lambda: view.editor.blockCount() > 1)
+    first = time.perf_counter() - start
+    document = view.document
+    pump(app, lambda: document.complete)
+    indexed = time.perf_counter() - start
+    count = document.line_count()
+    print(f"大文件模式（{document.size / 1024 / 1024:.0f} MB，{count:,} 行）: 显示开头 {first * 1000:.0f} ms，"
+          f"建立行索引 {indexed:.2f} s，编辑器中 {view.editor.blockCount()} 行")
+
+    began = time.perf_counter()
+    view.go_to_line(count // 2, "处理请求")
+    app.processEvents()
+    cursor = view.editor.textCursor()
+    line = view.window_first + cursor.blockNumber() + 1
+    print(f"跳到第 {count // 2:,} 行: {(time.perf_counter() - began) * 1000:.1f} ms，"
+          f"光标在第 {line:,} 行，选中 {cursor.selectedText()!r}")
+    print(f"内存峰值 {peak_mb():.0f} MB（含扫描时映射进来的文件页），匿名内存 {anonymous_mb():.0f} MB"
+          f"（启动 Qt 后 {base:.0f} MB，行索引 {len(document.line_starts) * 8 / 1024 / 1024:.0f} MB）")
+
+    backup = path + ".orig"
+    shutil.copyfile(path, backup)
+    edits = []
+    for target, replacement in ((count // 2, "中间插入的一行\n另一行\n"), (count - 5, "")):
+        view.go_to_line(target + 1)
+        start_offset = document.line_offset(target)
+        end_offset = document.line_offset(target + 3)
+        block = view.editor.document().findBlockByNumber(target - view.window_first)
+        cursor = view.editor.textCursor()
+        cursor.setPosition(block.position())
+        for _ in range(3):
+            cursor.movePosition(cursor.MoveOperation.Down, cursor.MoveMode.KeepAnchor)
+        cursor.insertText(replacement)
+        size = document.size
+        began = time.perf_counter()
+        view.save()
+        elapsed = time.perf_counter() - began
+        edits.append((start_offset, end_offset, replacement.encode("utf-8")))
+        print(f"替换第 {target + 1:,} 行起的 3 行后保存: {elapsed * 1000:.0f} ms，"
+              f"移动其后的 {size - end_offset:,} 字节，前面的 {start_offset:,} 字节不动")
+
+    with open(backup, "rb") as f:
+        expected = f.read()
+    for start_offset, end_offset, data in edits:  # 按保存的先后应用，第二处在第一处之后的偏移已经是新的
+        expected = expected[:start_offset] + data + expected[end_offset:]
+    with open(path, "rb") as f:
+        actual = f.read()
+    rebuilt = [0]
+    indexer = LineIndexer(path)
+    indexer.lines_found.connect(lambda offsets, scanned: rebuilt.extend(offsets))
+    indexer.run()
+    print(f"保存后内容正确: {actual == expected}，行索引与重新扫描一致: {list(document.line_starts) == rebuilt}")
+    view.close_file()
+    os.remove(backup)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] in ("old", "large"):
+        logging.disable(logging.INFO)
+        (run_old if sys.argv[1] == "old" else run_large)(sys.argv[2])
+        return
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 200
+    old_megabytes = float(sys.argv[2]) if len(sys.argv) > 2 else megabytes / 10
+    folder = tempfile.mkdtemp(prefix="large_file_bench_")
+    try:
+        small = os.path.join(folder, "small.log")
+        large = os.path.join(folder, "large.log")
+        make_file(small, old_megabytes)
+        make_file(large, megabytes)
+        for mode, path in (("old", small), ("large", large)):
+            subprocess.run([sys.executable, os.path.abspath(__file__), mode, path], check=True)
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
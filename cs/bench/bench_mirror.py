@@ -0,0 +1,141 @@
+# bench/bench_mirror.py
+"""离线镜像基准测试：在本地 HTTP 服务器上模拟一个文档站点（带延迟、ETag 和 Last-Modified），
+比较单连接与多连接首次镜像的耗时，检查链接改写，并测量增量更新时的条件请求效果
+
+用法（在 cs 目录下）: python bench/bench_mirror.py [页面数] [每个请求的延迟 ms]
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from zsku.mirror import SiteMirror, mirrored_page
+
+CSS = b"body { font-family: sans-serif; }"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+
+
+def make_site(pages):
+    """/docs/ 下的页面互相链接，引用同站样式和图片，另有范围外和站外链接"""
+    site = {"/docs/style.css": ("text/css", CSS), "/docs/img/logo.png": ("image/png", PNG),
+            "/blog/post.html": ("text/html", b"<html><body>blog</body></html>")}
+    for index in range(pages):
+        links = "".join(f'<a href="page{(index * 7 + k) % pages}.html#s{k}">p{k}</a> ' for k in range(1, 6))
+        body = (f'<html><head><link rel="stylesheet" href="style.css"></head><body>'
+                f'<img src="img/logo.png"><h1>Page {index}</h1>{links}'
+                f'<a href="/blog/post.html">blog</a> <a href="https://example.com/">external</a> '
+                f'<a href="guide/">guide</a></body></html>')
+        site[f"/docs/page{index}.html"] = ("text/html", body.encode("utf-8"))
+    site["/docs/guide/"] = ("text/html", b'<html><body><a href="../page0.html">back</a></body></html>')
+    return site
+
+
+def make_server(site, delay):
+    counts = {"requests": 0, "not_modified": 0}
+    lock = threading.Lock()
+    modified = formatdate(time.time() - 3600, usegmt=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(delay)
+            with lock:
+                counts["requests"] += 1
+            path = self.path.split("?")[0]
+            if path == "/docs/guide":
+                self.send_response(301)
+                self.send_header("Location", "/docs/guide/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if path not in site:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content_type, body = site[path]
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with lock:
+                    counts["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def timed_mirror(url, folder, connections, counts):
+    counts["requests"] = counts["not_modified"] = 0
+    mirror = SiteMirror(url, folder=folder, connections=connections, max_pages=10000, max_depth=100)
+    start = time.perf_counter()
+    path = mirror.run()
+    mirror.session.close()
+    return time.perf_counter() - start, path, mirror.stats
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    logging.disable(logging.INFO)
+    site = make_site(pages)
+    server, counts = make_server(site, delay)
+    url = f"http://127.0.0.1:{server.server_port}/docs/page0.html"
+    print(f"{pages} 个页面，每个请求延迟 {delay * 1000:.0f} ms")
+    folder = tempfile.mkdtemp(prefix="mirror_bench_")
+    try:
+        for connections in (1, 4, 8):
+            target = os.path.join(folder, f"c{connections}")
+            elapsed, path, stats = timed_mirror(url, target, connections, counts)
+            print(f"首次镜像（{connections} 个连接）: {elapsed * 1000:.0f} ms，请求 {counts['requests']} 次，"
+                  f"下载 {stats['downloaded']} 个文件，失败 {stats['failed']} 个")
+
+        with open(path, "rb") as f:
+            start_page = f.read()
+        hrefs = re.findall(rb'(?:href|src)="([^"]+)"', start_page)
+        local = [href for href in hrefs if not href.startswith(b"http")]
+        missing = [href for href in local
+                   if not os.path.exists(os.path.join(os.path.dirname(path), href.split(b"#")[0].decode()))]
+        print(f"起始页链接: 本地 {len(local)} 个（缺失 {len(missing)} 个），"
+              f"绝对 URL {len(hrefs) - len(local)} 个: {[h.decode() for h in hrefs if h.startswith(b'http')][:2]}")
+        print(f"mirrored_page 找到本地副本: {mirrored_page(url, target) == path}")
+
+        elapsed, _, stats = timed_mirror(url, target, 8, counts)
+        print(f"无变化时更新: {elapsed * 1000:.0f} ms，未修改 {stats['not_modified']} 个，下载 {stats['downloaded']} 个")
+
+        for index in range(3):
+            content_type, body = site[f"/docs/page{index + 1}.html"]
+            site[f"/docs/page{index + 1}.html"] = (content_type, body.replace(b"<h1>", b"<h1>Updated "))
+        elapsed, _, stats = timed_mirror(url, target, 8, counts)
+        print(f"修改 3 个页面后更新: {elapsed * 1000:.0f} ms，未修改 {stats['not_modified']} 个，下载 {stats['downloaded']} 个")
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench/bench_nav_filter.py
+"""导航树基准测试：生成数千个节点的目录，比较原来逐个创建 QTreeWidgetItem、每次按键递归遍历
+与编译缓存的目录 + 按需加载子节点的模型 + 扁平索引过滤的耗时
+
+用法（在 cs 目录下）: python bench/bench_nav_filter.py [分类数] [每个分类的条目数]
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTreeView, QTreeWidget, QTreeWidgetItem
+from zsku.catalog import Catalog, CatalogModel
+from zsku.nav_filter import NavFilterProxy, NavIndex, lazy_pinyin
+
+WORDS = ["Java", "Python", "Spring", "Vue", "React", "Linux", "Docker", "Redis", "MySQL", "Kafka",
+         "前端", "后端", "数据库", "框架", "教程", "文档", "网络", "安全", "算法", "工具"]
+QUERIES = ["j", "ja", "jav", "java", "spr", "spring 1-2", "vjs", "数据", "数据库", "sjk", "zzzz", ""]
+
+
+def make_catalog(rng, categories, entries):
+    catalog = {}
+    for i in range(categories):
+        group = {}
+        for j in range(entries):
+            name = f"{rng.choice(WORDS)}{rng.choice(WORDS)} {i}-{j}"
+            if j % 10 == 0:
+                group[f"{rng.choice(WORDS)}子分类 {j}"] = {f"{name} {k}": [f"https://example.com/{i}/{j}/{k}"] for k in range(5)}
+            else:
+                group[name] = [f"https://example.com/{i}/{j}"]
+        catalog[f"{rng.choice(WORDS)}分类 {i}"] = group
+    return catalog
+
+
+def build_tree_widget(tree, catalog):
+    def add(parent, subcategories):
+        for name, links in subcategories.items():
+            item = QTreeWidgetItem([name])
+            parent.addChild(item)
+            if isinstance(links, dict):
+                add(item, links)
+    add(tree.invisibleRootItem(), catalog)
+
+
+def search_tree(query, parent_item):
+    """原来的做法：每次按键递归遍历全部节点"""
+    for i in range(parent_item.childCount()):
+        child = parent_item.child(i)
+        if query in child.text(0).lower():
+            child.setExpanded(True)
+        search_tree(query, child)
+
+
+def main():
+    categories = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    app = QApplication(sys.argv)
+    catalog = make_catalog(random.Random(1), categories, entries)
+
+    folder = tempfile.mkdtemp(prefix="catalog_bench_")
+    source_path = os.path.join(folder, "luj.json")
+    cache_path = os.path.join(folder, "catalog.json")
+    with open(source_path, "w", encoding="utf-8") as f:
+        json.dump({"资源": catalog}, f, ensure_ascii=False)
+
+    start = time.perf_counter()
+    tree = QTreeWidget()
+    with open(source_path, "r", encoding="utf-8") as f:
+        build_tree_widget(tree, json.load(f)["资源"])
+    eager = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for query in QUERIES:
+        tree.collapseAll()
+        search_tree(query, tree.invisibleRootItem())
+    old = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+    start = time.perf_counter()
+    Catalog.load(source_path, cache_path)
+    compiled = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    model = CatalogModel(Catalog.load(source_path, cache_path))
+    index = NavIndex(model.catalog.nodes)
+    proxy = NavFilterProxy()
+    proxy.setSourceModel(model)
+    view = QTreeView()
+    view.setModel(proxy)
+    cached = (time.perf_counter() - start) * 1000
+    print(f"{len(index.nodes)} 个节点（拼音匹配: {'可用' if lazy_pinyin else '未安装 pypinyin'}）")
+    print(f"原来解析 luj.json 并创建全部 QTreeWidgetItem: {eager:.0f} ms")
+    print(f"首次编译目录并写入缓存: {compiled:.0f} ms；之后读取缓存并创建模型和索引: {cached:.0f} ms")
+    print(f"原来的递归遍历（每次按键）: 平均 {old:.1f} ms")
+    for query in QUERIES:
+        start = time.perf_counter()
+        visible, expanded = index.match(query)
+        matched = time.perf_counter()
+        proxy.set_visible(visible)
+        for node_id in sorted(expanded or ()):
+            view.expand(proxy.mapFromSource(model.expandable_index(node_id)))
+        print(f"过滤 {query!r}: 匹配 {(matched - start) * 1000:.1f} ms，应用到代理模型并展开 "
+              f"{(time.perf_counter() - matched) * 1000:.1f} ms，可见节点 {len(visible or ())}，展开 {len(expanded or ())}")
+    view.deleteLater()
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# bench/bench_note_history.py
+"""笔记版本历史基准测试：一个 2000 行的笔记反复修改几行后保存
+
+- 1000 个版本都在一小时内（不精简）：历史占用的空间与保存完整副本、压缩的完整副本相比，
+  每次记录的耗时，恢复任一版本的耗时和需要应用的增量个数，列出版本和比较两个版本的耗时
+- 1000 个版本分布在 60 天内：自动精简后剩下的版本数和占用空间，剩下的版本是否都能正确恢复
+
+用法（在 cs 目录下）: python bench/bench_note_history.py [版本数] [行数]
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from bj.note_history import NoteHistory, diff_text
+
+WORDS = ("python", "thread", "index", "signal", "cache", "query", "笔记", "索引", "线程", "缓存", "界面", "保存")
+
+
+def random_line(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10)))
+
+
+def edit(lines, rng):
+    """修改、插入或删除 1 到 5 行"""
+    lines = list(lines)
+    for _ in range(rng.randint(1, 5)):
+        position = rng.randrange(len(lines))
+        action = rng.random()
+        if action < 0.6:
+            lines[position] = random_line(rng)
+        elif action < 0.8:
+            lines.insert(position, random_line(rng))
+        elif len(lines) > 10:
+            del lines[position]
+    return lines
+
+
+def chain_length(history, path, number):
+    conn = history._connect()
+    steps = 0
+    try:
+        while True:
+            depth, base = conn.execute("SELECT depth, base FROM revisions WHERE path = ? AND number = ?",
+                                       (path, number)).fetchone()
+            if depth == 0:
+                return steps
+            steps += 1
+            number = base
+    finally:
+        conn.close()
+
+
+def run(folder, revisions, line_count, spread):
+    """spread 为版本分布的总时长（秒），返回 (历史, 笔记路径, 各版本内容)"""
+    rng = random.Random(1)
+    root = os.path.join(folder, f"notes{spread}")
+    os.makedirs(root)
+    history = NoteHistory(root, os.path.join(folder, f"history{spread}.sqlite3"))
+    path = os.path.join(root, "note.txt")
+    lines = [random_line(rng) for _ in range(line_count)]
+    texts = {}
+    durations = []
+    start = time.time() - spread
+    for number in range(1, revisions + 1):
+        lines = edit(lines, rng)
+        text = "\n".join(lines)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        began = time.perf_counter()
+        history.record(path, text, saved=start + spread * number / revisions)
+        durations.append(time.perf_counter() - began)
+        texts[number] = text
+    return history, path, texts, durations
+
+
+def main():
+    revisions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    line_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    logging.disable(logging.INFO)
+    folder = tempfile.mkdtemp(prefix="note_history_bench_")
+    try:
+        history, path, texts, durations = run(folder, revisions, line_count, spread=1800)
+        count, total, stored = history.storage(path)
+        compressed = sum(len(zlib.compress(text.encode("utf-8"))) for text in texts.values())
+        print(f"{revisions} 个版本（{line_count} 行，每个版本改 1-5 行），都在一小时内:")
+        print(f"  完整副本 {total / 1024 / 1024:.1f} MB，压缩的完整副本 {compressed / 1024 / 1024:.1f} MB，"
+              f"版本历史 {stored / 1024 / 1024:.2f} MB（数据库文件 {os.path.getsize(history.db_path) / 1024 / 1024:.2f} MB）")
+        durations.sort()
+        print(f"  每次记录: 中位数 {durations[len(durations) // 2] * 1000:.1f} ms，最长 {durations[-1] * 1000:.1f} ms")
+
+        relative = history.relative_path(path)
+        timings = []
+        chains = []
+        correct = True
+        for number in range(1, revisions + 1):
+            began = time.perf_counter()
+            text = history.text(path, number)
+            timings.append(time.perf_counter() - began)
+            chains.append(chain_length(history, relative, number))
+            correct = correct and text == texts[number]
+        timings.sort()
+        print(f"  恢复任一版本: 中位数 {timings[len(timings) // 2] * 1000:.1f} ms，最长 {timings[-1] * 1000:.1f} ms，"
+              f"最多应用 {max(chains)} 个增量（逐个应用时最多 31 个），全部正确: {correct}")
+        began = time.perf_counter()
+        listed = history.revisions(path)
+        print(f"  列出 {len(listed)} 个版本: {(time.perf_counter() - began) * 1000:.1f} ms")
+        began = time.perf_counter()
+        diff = diff_text(history.text(path, revisions - 1), history.text(path, revisions), "old", "new")
+        print(f"  比较相邻两个版本: {(time.perf_counter() - began) * 1000:.1f} ms（{len(diff.splitlines())} 行差异）")
+        began = time.perf_counter()
+        diff = diff_text(history.text(path, 1), history.text(path, revisions), "old", "new")
+        print(f"  比较第一个和最后一个版本: {(time.perf_counter() - began) * 1000:.1f} ms（{len(diff.splitlines())} 行差异）")
+
+        history, path, texts, durations = run(folder, revisions, line_count, spread=60 * 86400)
+        count, total, stored = history.storage(path)
+        correct = all(history.text(path, number) == texts[number] for number, _, _, _ in history.revisions(path))
+        durations.sort()
+        print(f"{revisions} 个版本分布在 60 天内，每 50 个版本自动精简: 剩 {count} 个版本，版本历史 {stored / 1024:.0f} KB，"
+              f"含精简的记录最长 {durations[-1] * 1000:.0f} ms，剩下的版本全部正确: {correct}")
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# bench/bench_note_index.py
+"""笔记目录索引基准测试：在嵌套目录中生成大量 .txt 文件，比较界面线程上递归列出并填充 QListWidget
+与后台扫描 + 表格模型时界面线程被占用的时间，以及文件变化后增量更新与整体重新扫描的耗时
+
+用法（在 cs 目录下）: python bench/bench_note_index.py [文件数]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import logging
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QListWidget, QTableView
+from bj.note_index import NoteIndex, list_folder
+
+FILES_PER_FOLDER = 100
+
+
+def make_notes(root, count):
+    folders = max(1, count // FILES_PER_FOLDER)
+    for index in range(count):
+        folder = index % folders
+        path = os.path.join(root, f"group{folder % 30}", f"topic{folder}")
+        if index < folders:
+            os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, f"note{index}.txt"), "w", encoding="utf-8") as f:
+            f.write("笔记" * (index % 50))
+    return folders
+
+
+def pump(app, condition, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待超时")
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def listwidget_load(root):
+    """旧做法的递归版本：界面线程上 os.walk 并逐个 addItem"""
+    widget = QListWidget()
+    start = time.perf_counter()
+    for folder, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".txt"):
+                widget.addItem(os.path.relpath(os.path.join(folder, name), root))
+    return time.perf_counter() - start, widget.count()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    logging.disable(logging.INFO)
+    app = QApplication(sys.argv)
+    root = tempfile.mkdtemp(prefix="note_index_bench_")
+    try:
+        folders = make_notes(root, count)
+        print(f"{count} 个笔记，{folders} 个子目录")
+        elapsed, loaded = listwidget_load(root)
+        print(f"界面线程递归列出 + QListWidget: 界面阻塞 {elapsed * 1000:.0f} ms（{loaded} 个）")
+
+        index = NoteIndex()
+        model = index.model
+        view = QTableView()
+        view.setModel(model)
+        view.setSortingEnabled(True)
+        view.resize(600, 800)
+        view.show()
+        stalls = []
+        apply = model.apply
+
+        def timed_apply(listings):
+            began = time.perf_counter()
+            result = apply(listings)
+            stalls.append(time.perf_counter() - began)
+            return result
+
+        model.apply = timed_apply
+        finished = []
+        index.scan_finished.connect(lambda: finished.append(time.perf_counter()))
+        start = time.perf_counter()
+        index.set_folder(root)
+        pump(app, lambda: model.rowCount() > 0)
+        first = time.perf_counter() - start
+        pump(app, lambda: finished)
+        print(f"后台扫描: 第一批显示 {first * 1000:.0f} ms，全部完成 {(finished[0] - start) * 1000:.0f} ms，"
+              f"{model.rowCount()} 个文件，界面线程合并 {len(stalls)} 次，"
+              f"最长 {max(stalls) * 1000:.1f} ms、合计 {sum(stalls) * 1000:.0f} ms，监视 {len(index.watched)} 个目录")
+
+        for column, name in enumerate(("名称", "大小", "修改时间")):
+            began = time.perf_counter()
+            view.sortByColumn(column, Qt.DescendingOrder)
+            app.processEvents()
+            print(f"按{name}降序排序: {(time.perf_counter() - began) * 1000:.0f} ms")
+        view.sortByColumn(0, Qt.AscendingOrder)
+
+        # 增量更新：一个目录中新建 5 个文件，另一个目录中删除 3 个
+        stalls.clear()
+        target = os.path.join(root, "group1", "topic1")
+        other = os.path.join(root, "group2", "topic2")
+        expected = model.rowCount() + 5 - 3
+        began = time.perf_counter()
+        for number in range(5):
+            with open(os.path.join(target, f"new{number}.txt"), "w", encoding="utf-8") as f:
+                f.write("新笔记")
+        for name in sorted(os.listdir(other))[:3]:
+            os.remove(os.path.join(other, name))
+        pump(app, lambda: model.rowCount() == expected)
+        print(f"新建 5 个、删除 3 个文件后增量更新: {(time.perf_counter() - began) * 1000:.0f} ms"
+              f"（含 {index.rescan_timer.interval()} ms 合并延迟），界面线程合计 {sum(stalls) * 1000:.1f} ms")
+
+        began = time.perf_counter()
+        stack = [""]
+        listed = 0
+        while stack:
+            files, subfolders = list_folder(root, stack.pop())
+            listed += len(files)
+            stack.extend(subfolders)
+        print(f"对比：整体重新扫描一遍 {(time.perf_counter() - began) * 1000:.0f} ms（{listed} 个文件）")
+        index.stop()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
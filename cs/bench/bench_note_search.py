@@ -0,0 +1,158 @@
+# bench/bench_note_search.py
+"""笔记全文搜索基准测试：在嵌套目录中生成大量中英文混合的多行笔记
+
+- 第一次建立索引的耗时
+- 重新打开目录、没有变化时重新分词的笔记数（应为 0）
+- 关闭期间改动 3 个、删除 1 个笔记后重新打开，只重新索引这几个
+- 英文、中文和中英混合查询的耗时，以及命中行号是否正确、点击结果后光标是否在这一行
+
+用法（在 cs 目录下）: python bench/bench_note_search.py [笔记数]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import logging
+from PySide6.QtWidgets import QApplication
+from bj import note_history, note_search
+from bj.bji import NotePage
+
+FILES_PER_FOLDER = 100
+LINES_PER_FILE = 30
+WORDS = ("python", "thread", "index", "signal", "cache", "query", "socket", "buffer", "render", "widget",
+         "parser", "kernel", "memory", "sqlite", "format", "layout", "stream", "module", "config", "window")
+PHRASES = ("今天学习了", "数据库索引", "多线程编程", "界面布局", "内存缓存", "网络请求", "读书笔记", "项目计划",
+           "性能优化", "代码重构", "会议记录", "错误处理", "文件系统", "用户体验", "测试用例", "版本发布")
+MARKER_LINE = 17  # 在第一个笔记的这一行写入独有的词，检查行号
+QUERIES = ("signal", "sqlite buffer", "数据库索引", "性能优化 cache", "多线程 python", "zebrafish", "代码")
+
+
+def write_note(path, rng, marker=False):
+    lines = []
+    for number in range(1, LINES_PER_FILE + 1):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(2, 6))]
+        line = f"{rng.choice(PHRASES)}：{' '.join(words)}，{rng.choice(PHRASES)}。"
+        if marker and number == MARKER_LINE:
+            line += " zebrafish 斑马鱼"
+        lines.append(line)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def make_notes(root, count):
+    rng = random.Random(1)
+    folders = max(1, count // FILES_PER_FOLDER)
+    paths = []
+    for index in range(count):
+        folder = index % folders
+        path = os.path.join(root, f"group{folder % 30}", f"topic{folder}")
+        if index < folders:
+            os.makedirs(path, exist_ok=True)
+        path = os.path.join(path, f"note{index}.txt")
+        write_note(path, rng, marker=index == 0)
+        paths.append(path)
+    return paths
+
+
+def pump(app, condition, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待超时")
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def open_folder(app, root):
+    """打开笔记目录，等扫描和索引都结束，返回 (页面, 耗时, 重新索引数, 删除数)"""
+    page = NotePage()
+    counts = [0, 0]
+    scanned = []
+
+    def on_updated(added, deleted):
+        counts[0] += added
+        counts[1] += deleted
+
+    page.note_search.updated.connect(on_updated)
+    page.note_index.scan_finished.connect(lambda: scanned.append(True))
+    start = time.perf_counter()
+    page.current_folder = root
+    page.load_txt_files()
+
+    def idle():
+        indexer = page.note_search.indexer
+        return scanned and page.note_search.pending is None and (indexer is None or not indexer.isRunning())
+
+    pump(app, idle)
+    pump(app, lambda: page.note_search.indexer is None or page.note_search.indexer.isFinished())
+    app.processEvents()
+    return page, time.perf_counter() - start, counts[0], counts[1]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.INFO)
+    app = QApplication(sys.argv)
+    root = tempfile.mkdtemp(prefix="note_search_bench_")
+    note_search.NOTE_INDEX_FOLDER = tempfile.mkdtemp(prefix="note_search_index_")
+    note_history.NOTE_HISTORY_FOLDER = tempfile.mkdtemp(prefix="note_search_history_")
+    try:
+        paths = make_notes(root, count)
+        total = sum(os.path.getsize(path) for path in paths)
+        print(f"{count} 个笔记，每个 {LINES_PER_FILE} 行，共 {total / 1024 / 1024:.1f} MB")
+
+        page, elapsed, added, deleted = open_folder(app, root)
+        size = os.path.getsize(page.note_search.db_path)
+        print(f"第一次建立索引: {elapsed:.1f} s（扫描 + 分词），索引 {added} 个，索引文件 {size / 1024 / 1024:.1f} MB")
+        page.note_search.close()
+        page.note_index.stop()
+
+        page, elapsed, added, deleted = open_folder(app, root)
+        print(f"重新打开、没有变化: {elapsed * 1000:.0f} ms，重新索引 {added} 个，删除 {deleted} 个")
+        page.note_search.close()
+        page.note_index.stop()
+
+        rng = random.Random(2)
+        for path in paths[1:4]:
+            write_note(path, rng)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("追加的一行 appended\n")
+        os.remove(paths[4])
+        page, elapsed, added, deleted = open_folder(app, root)
+        print(f"改动 3 个、删除 1 个后重新打开: {elapsed * 1000:.0f} ms，重新索引 {added} 个，删除 {deleted} 个")
+
+        for query in QUERIES:
+            page.note_search.search(query)  # 预热页缓存
+            repeats = 20
+            began = time.perf_counter()
+            for _ in range(repeats):
+                results = page.note_search.search(query)
+            latency = (time.perf_counter() - began) / repeats
+            notes = len({path for path, _, _ in results})
+            print(f"搜索 {query!r}: {latency * 1000:.1f} ms，{notes} 个笔记、{len(results)} 行")
+
+        results = page.note_search.search("zebrafish 斑马鱼")
+        path, line, preview = results[0]
+        print(f"独有词命中: {os.path.relpath(path, root)}:{line}（应为 {os.path.relpath(paths[0], root)}:{MARKER_LINE}）"
+              f"，预览: {preview}")
+        page.search_box.setText("斑马鱼")
+        page.run_search()
+        page.on_result_clicked(page.result_list.item(0))
+        cursor = page.text_edit.textCursor()
+        print(f"点击结果后光标在第 {cursor.blockNumber() + 1} 行，选中 {cursor.selectedText()!r}")
+        page.note_search.close()
+        page.note_index.stop()
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(note_search.NOTE_INDEX_FOLDER)
+        shutil.rmtree(note_history.NOTE_HISTORY_FOLDER)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# bench/bench_startup.py
+"""启动耗时基准测试：从进程启动到主窗口第一次显示、到全局快捷键可用的时间，
+以及第一次打开知识库（导入并启动 QtWebEngine）的耗时
+
+每轮在新进程中启动，保证模块导入是冷启动。
+用法（在 cs 目录下）: python bench/bench_startup.py [轮数] [--knowledge]
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+
+START = time.perf_counter()
+CS_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+HOTKEY_TIMEOUT = 5.0
+
+
+def child(open_knowledge):
+    sys.path.insert(0, CS_FOLDER)
+    os.chdir(CS_FOLDER)
+    from PySide6.QtCore import Qt, QTimer
+    from PySide6.QtWidgets import QApplication
+    import main
+
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1])
+    result = {}
+    window = main.MainWindow()
+    app.aboutToQuit.connect(window.clipboard_window.cleanup)
+    window.global_shortcut.ready.connect(lambda: result.setdefault("hotkey", time.perf_counter() - START))
+    window.show()
+    app.processEvents()
+    result["window"] = time.perf_counter() - START
+    result["webengine_loaded"] = any(name.startswith("PySide6.QtWebEngine") for name in sys.modules)
+
+    deadline = time.perf_counter() + HOTKEY_TIMEOUT
+    while "hotkey" not in result and window.global_shortcut.isRunning() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+    if open_knowledge:
+        start = time.perf_counter()
+        try:
+            window.display_page(1)  # 直接调用，导入失败时异常不会被槽函数吞掉
+            window.navbar.setCurrentRow(1)
+            app.processEvents()
+            result["knowledge"] = time.perf_counter() - start
+        except Exception as e:
+            result["knowledge_error"] = str(e)
+    print(json.dumps(result))
+    sys.stdout.flush()
+    QTimer.singleShot(0, app.quit)
+    app.exec()
+    os._exit(0)  # 快捷键监听线程阻塞在 keyboard.wait()，直接退出
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    rounds = int(args[0]) if args else 5
+    open_knowledge = "--knowledge" in sys.argv
+    results = []
+    for _ in range(rounds):
+        command = [sys.executable, os.path.abspath(__file__), "--child"] + (["--knowledge"] if open_knowledge else [])
+        output = subprocess.run(command, capture_output=True, text=True, cwd=CS_FOLDER).stdout
+        lines = [line for line in output.splitlines() if line.startswith("{")]
+        if not lines:
+            print("子进程没有输出结果:", output)
+            return
+        results.append(json.loads(lines[-1]))
+
+    def report(label, key):
+        values = sorted(result[key] for result in results if key in result)
+        if values:
+            print(f"{label}: 中位数 {values[len(values) // 2] * 1000:.0f} ms，最小 {values[0] * 1000:.0f} ms")
+        else:
+            print(f"{label}: 不可用")
+
+    report("主窗口显示", "window")
+    report("全局快捷键可用", "hotkey")
+    print("启动时已加载 QtWebEngine:", any(result["webengine_loaded"] for result in results))
+    if open_knowledge:
+        report("第一次打开知识库", "knowledge")
+        errors = {result["knowledge_error"] for result in results if "knowledge_error" in result}
+        for error in errors:
+            print("打开知识库失败:", error)
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child("--knowledge" in sys.argv)
+    else:
+        main()
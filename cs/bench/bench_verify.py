@@ -0,0 +1,83 @@
+# bench/bench_verify.py
+"""完整性校验基准测试：下载解压一个分卷文档包并生成清单，比较冷启动校验（全部计算哈希）
+与再次打开时的增量校验（只 stat），并检查改动过的文件和损坏的分卷能被发现
+
+用法（在 cs 目录下）: python bench/bench_verify.py [文档数]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+from PySide6.QtCore import QCoreApplication
+from bench_downloads import make_server, MB
+from bench_extract import make_split_archive
+import zsku.integrity as integrity
+from zsku.backend_module import DownloadThread
+
+
+def verify(key, root):
+    thread = integrity.VerifyThread(key, integrity.Manifest.load(key), root)
+    result = {}
+    thread.verified.connect(lambda _, report: result.update(report))
+    start = time.perf_counter()
+    thread.run()  # 直接在当前线程运行，便于计时
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    logging.disable(logging.WARNING)
+    app = QCoreApplication(sys.argv)
+    folder = tempfile.mkdtemp(prefix="verify_bench_")
+    integrity.VERIFY_STATE_FOLDER = os.path.join(folder, "state")  # 不写入程序目录
+    integrity.MANIFEST_FOLDER = os.path.join(folder, "manifests")
+    files = make_split_archive(count, 4 * MB)
+    server, sent = make_server(files, 400 * MB)
+    links = [f"http://127.0.0.1:{server.server_port}{name}" for name in files]
+    downloads = os.path.join(folder, "downloads")
+    output = os.path.join(folder, "extracted")
+
+    start = time.perf_counter()
+    DownloadThread("bench", links, download_folder=downloads).download_and_extract(output)
+    size = sum(entry["size"] for entry in integrity.Manifest.load("bench").files.values())
+    print(f"下载解压并生成清单: {time.perf_counter() - start:.2f} s，{count} 个文件共 {size / MB:.1f} MB")
+
+    elapsed, report = verify("bench", output)
+    print(f"解压后立即校验: {elapsed * 1000:.0f} ms，重新计算哈希 {report['hashed']} 个，完整: {report['complete']}")
+
+    os.remove(integrity.VerificationState("files-bench").path)
+    elapsed, report = verify("bench", output)
+    print(f"没有校验状态（冷启动）: {elapsed * 1000:.0f} ms，重新计算哈希 {report['hashed']} 个")
+    elapsed, report = verify("bench", output)
+    print(f"再次打开（增量）: {elapsed * 1000:.0f} ms，重新计算哈希 {report['hashed']} 个")
+
+    target = os.path.join(output, "docs", "api", "page00007.html")
+    with open(target, "r+b") as f:
+        f.write(b"X")
+    os.remove(os.path.join(output, "docs", "api", "page00008.html"))
+    elapsed, report = verify("bench", output)
+    print(f"改动 1 个、删除 1 个文件后: {elapsed * 1000:.0f} ms，损坏 {report['corrupt']}，缺失 {report['missing']}")
+
+    # 分卷：再次下载时只 stat；损坏的分卷被删除并重新下载
+    sent["bytes"] = 0
+    start = time.perf_counter()
+    DownloadThread("bench", links, download_folder=downloads).download_parts()
+    print(f"分卷已缓存时的检查: {(time.perf_counter() - start) * 1000:.0f} ms，重新下载 {sent['bytes']} 字节")
+    with open(os.path.join(downloads, "docs.z02"), "r+b") as f:
+        f.seek(1000)
+        f.write(b"\0" * 16)
+    sent["bytes"] = 0
+    DownloadThread("bench", links, download_folder=downloads).download_parts()
+    print(f"损坏 docs.z02 后重新下载 {sent['bytes'] / MB:.1f} MB（分卷 {len(files['/docs.z02']) / MB:.1f} MB）")
+    server.shutdown()
+    shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
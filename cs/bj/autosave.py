@@ -0,0 +1,139 @@
+# bj/autosave.py
+import os
+import time
+import shutil
+import logging
+import tempfile
+from PySide6.QtCore import QObject, QThread, Signal
+
+AUTOSAVE_DELAY_MS = 1000  # 停止输入多久后自动保存
+
+
+def atomic_write(path, text):
+    """先写同一目录下的临时文件并 fsync，再改名替换目标文件：任何时候中断，目标文件要么是旧内容要么是新内容"""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:  # 和原来一样用文本模式，换行符按系统习惯
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            try:
+                shutil.copymode(path, temp_path)  # mkstemp 创建的文件只有本人可读写
+            except OSError:
+                pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):  # 改名本身也要落盘；Windows 上不能打开目录，跳过
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+def save_snapshot(path, text, history=None):
+    """写入一份快照；有版本历史时先记下文件原有的内容（第一次保存或在程序外改过），写入后记录新版本
+
+    只有写入文件出错才算保存失败：版本历史出错只记日志，不然界面会把这份快照当作没保存而反复重试。
+    """
+    if history is not None:
+        record_history(history.record_previous, path)
+    atomic_write(path, text)
+    if history is not None:
+        record_history(history.record, path, text)
+
+
+def record_history(record, path, *args):
+    try:
+        record(path, *args)
+    except Exception as e:
+        logging.error(f"记录笔记版本失败: {path}, 错误: {e}")
+
+
+class SaveThread(QThread):
+    """后台线程：把一份快照写入文件"""
+    saved = Signal(float, str)  # 信号：写入耗时（秒），错误消息（成功时为空）
+
+    def __init__(self, path, text, history=None):
+        super().__init__()
+        self.path = path
+        self.text = text
+        self.history = history
+
+    def run(self):
+        began = time.perf_counter()
+        error = ""
+        try:
+            save_snapshot(self.path, self.text, self.history)
+        except Exception as e:
+            error = str(e)
+        self.saved.emit(time.perf_counter() - began, error)
+
+
+class AutoSaver(QObject):
+    """笔记的后台保存：每个文件同时最多一个写入线程
+
+    写入期间收到的新快照只保留最新的一份，当前写入结束后再写，连续的修改合并成一次写入。
+    saved 信号报告的耗时从这份内容最早的保存请求算起，包括排队等待上一次写入和记录版本历史的时间。
+    """
+    saved = Signal(str, float, str)  # 信号：文件路径，保存耗时（秒），错误消息（成功时为空）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.active = {}  # 文件路径 -> (写入线程, 请求时间)
+        self.pending = {}  # 文件路径 -> (最新快照, 最早的请求时间, 版本历史)
+        self.history = None  # 当前笔记目录的 NoteHistory，由 NotePage 在切换目录时设置
+
+    def save(self, path, text):
+        requested = time.perf_counter()
+        if path in self.active:
+            if path in self.pending:
+                requested = self.pending[path][1]
+            self.pending[path] = (text, requested, self.history)
+            return
+        self._start(path, text, requested, self.history)
+
+    def is_saving(self, path):
+        return path in self.active or path in self.pending
+
+    def _start(self, path, text, requested, history):
+        thread = SaveThread(path, text, history)
+        thread.saved.connect(lambda seconds, error: self._on_saved(path, thread, error))
+        self.active[path] = (thread, requested)
+        thread.start()
+
+    def _on_saved(self, path, thread, error):
+        thread.wait()
+        if self.active.get(path, (None,))[0] is not thread:
+            return
+        _, requested = self.active.pop(path)
+        seconds = time.perf_counter() - requested
+        if error:
+            logging.error(f"保存笔记失败: {path}, 错误: {error}")
+        else:
+            logging.info(f"已保存 {path}，用时 {seconds * 1000:.0f} ms")
+        if path in self.pending:
+            self._start(path, *self.pending.pop(path))
+        self.saved.emit(path, seconds, error)
+
+    def close(self):
+        """退出程序时等正在写入的线程结束，还没写的快照直接写完"""
+        for thread, _ in list(self.active.values()):
+            thread.wait()
+        self.active.clear()
+        pending, self.pending = self.pending, {}
+        for path, (text, _, history) in pending.items():
+            try:
+                save_snapshot(path, text, history)
+            except OSError as e:
+                logging.error(f"保存笔记失败: {path}, 错误: {e}")
@@ -1,8 +1,19 @@
 # bj/bji.py
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, QLabel, QFileDialog, \
-    QListWidget
-from PySide6.QtCore import Qt
+    QTableView, QAbstractItemView, QHeaderView, QLineEdit, QListWidget, QListWidgetItem
+from PySide6.QtCore import Qt, QTimer
+from text_search import QUERY_PATTERN
+from .note_index import NoteIndex, NOTE_PATH_ROLE
+from .note_search import NoteSearchIndex
+from .large_file import LargeFileView, LARGE_FILE_BYTES, select_line
+from .autosave import AutoSaver, AUTOSAVE_DELAY_MS
+from .note_history import NoteHistory, NoteHistoryDialog
 import os
+import logging
+import time
+
+SEARCH_DELAY_MS = 150  # 停止输入多久后执行全文搜索
+LINE_ROLE = Qt.UserRole + 1  # 搜索结果中命中的行号
 
 
 class NotePage(QWidget):
@@ -14,9 +25,46 @@ class NotePage(QWidget):
 
         # 左侧文件列表区域
         left_layout = QVBoxLayout()
-        self.file_list = QListWidget()  # 显示文件夹中的 .txt 文件
-        self.file_list.itemClicked.connect(self.display_file_content)  # 绑定点击事件
-        left_layout.addWidget(QLabel("文件列表"))
+        # 全文搜索：索引保存在本机，只重新分词有变化的笔记；结果按相关度排列，点击后跳到命中的行
+        self.note_search = NoteSearchIndex(self)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("搜索笔记内容...")
+        self.search_box.textChanged.connect(self.on_search)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.result_list = QListWidget()
+        self.result_list.setWordWrap(True)
+        self.result_list.itemClicked.connect(self.on_result_clicked)
+        self.result_list.hide()
+        left_layout.addWidget(self.search_box)
+        left_layout.addWidget(self.result_list)
+
+        # 文件夹（含子文件夹）中的 .txt 文件，在后台扫描，之后随文件变化自动更新
+        self.note_index = NoteIndex(self)
+        model = self.note_index.model
+        self.file_list = QTableView()  # 只为可见的行取数据，几万个文件也不卡
+        self.file_list.setModel(model)
+        self.file_list.verticalHeader().hide()
+        self.file_list.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.file_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.file_list.setShowGrid(False)
+        self.file_list.setWordWrap(False)
+        self.file_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.file_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.file_list.setSortingEnabled(True)
+        self.file_list.sortByColumn(0, Qt.AscendingOrder)
+        self.file_list.clicked.connect(self.display_file_content)  # 绑定点击事件
+        self.file_count_label = QLabel("文件列表")
+        for signal in (model.rowsInserted, model.rowsRemoved, model.modelReset):
+            signal.connect(self.update_file_count)
+        model.modelReset.connect(self.select_current_file)  # 批量更新后恢复选中
+        model.files_changed.connect(self.note_search.update)  # 新增、改动和删除的笔记在后台更新全文索引
+        # 完整扫描后删除索引中已不存在的笔记（上次关闭程序后在别处删除的）
+        self.note_index.scan_finished.connect(lambda: self.note_search.update(keep=set(model.entries)))
+        self.note_search.updated.connect(self.on_search_index_updated)
+        left_layout.addWidget(self.file_count_label)
         left_layout.addWidget(self.file_list)
 
         # 文件夹选择按钮
@@ -34,11 +82,29 @@ class NotePage(QWidget):
         self.text_edit = QTextEdit()
         right_layout.addWidget(QLabel("笔记内容"))
         right_layout.addWidget(self.text_edit)
+        # 大文件不整个读入，编辑器中只放入看得到的一段
+        self.large_view = LargeFileView()
+        self.large_view.hide()
+        right_layout.addWidget(self.large_view)
 
         # 保存按钮
         save_button = QPushButton("保存笔记")
         save_button.clicked.connect(self.save_note)  # 保存笔记
         right_layout.addWidget(save_button)
+        # 历史版本：每次保存记录一个版本（完整内容加行级增量），可以比较和恢复
+        history_button = QPushButton("历史版本")
+        history_button.clicked.connect(self.show_history)
+        right_layout.addWidget(history_button)
+        # 自动保存：停止输入一会儿后把内容交给后台线程写入（临时文件改名替换），不阻塞输入
+        self.autosaver = AutoSaver(self)
+        self.autosaver.saved.connect(self.on_note_saved)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(AUTOSAVE_DELAY_MS)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.text_edit.textChanged.connect(self.autosave_timer.start)
+        self.save_status_label = QLabel()
+        right_layout.addWidget(self.save_status_label)
 
         # 将左侧和右侧布局添加到主布局
         main_layout.addLayout(left_layout)
@@ -48,6 +114,7 @@ class NotePage(QWidget):
         # 当前文件夹和当前打开文件路径
         self.current_folder = ""
         self.current_file_path = None
+        self.reveal_path = None  # 另存为的文件写完后在文件列表中选中
 
     def select_folder(self):
         """选择文件夹并显示其中的 .txt 文件"""
@@ -57,30 +124,95 @@ class NotePage(QWidget):
             self.load_txt_files()
 
     def load_txt_files(self):
-        """加载选中文件夹中的 .txt 文件并显示在文件列表中"""
-        self.file_list.clear()
-        if self.current_folder:
-            for file_name in os.listdir(self.current_folder):
-                if file_name.endswith(".txt"):
-                    self.file_list.addItem(file_name)
+        """在后台扫描选中的文件夹（包括子文件夹），结果陆续显示在文件列表中"""
+        self.autosave()  # 先保存正在编辑的笔记
+        self.save_large_file()
+        self.autosaver.history = NoteHistory(self.current_folder) if self.current_folder else None
+        self.note_search.set_root(self.current_folder)  # 先打开索引，扫描结果陆续送来比对
+        self.note_index.set_folder(self.current_folder)
+        self.run_search()
         # 清除当前打开的文件
         self.current_file_path = None
+        self.close_large_file()
         self.text_edit.clear()
 
-    def display_file_content(self, item):
+    def update_file_count(self):
+        self.file_count_label.setText(f"文件列表（{self.note_index.model.rowCount()} 个）")
+
+    def select_current_file(self):
+        if self.current_file_path:
+            model = self.note_index.model
+            path = model.relative_path(self.current_file_path)
+            row = model.row_of(path) if path is not None else -1
+            if row >= 0:
+                self.file_list.setCurrentIndex(model.index(row, 0))
+
+    def display_file_content(self, index):
         """显示选中文件的内容到文本编辑器"""
-        self.current_file_path = os.path.join(self.current_folder, item.text())
+        self.open_note(index.data(NOTE_PATH_ROLE))
+
+    def open_note(self, path, line=0, term=None):
+        """打开笔记；给出行号时移动光标到这一行并选中其中的命中词"""
+        self.autosave()
+        self.save_large_file()
+        self.current_file_path = path
+        self.note_index.refresh_file(self.current_file_path)
+        if os.path.getsize(path) >= LARGE_FILE_BYTES:
+            self.text_edit.clear()
+            self.text_edit.hide()
+            self.large_view.show()
+            self.large_view.open(path)
+            if line > 0:
+                self.large_view.go_to_line(line, term)
+            return
+        self.close_large_file()
         with open(self.current_file_path, "r", encoding="utf-8") as file:
             content = file.read()
             self.text_edit.setPlainText(content)
+        if line > 0:
+            select_line(self.text_edit, line - 1, term)
+
+    def close_large_file(self):
+        self.large_view.close_file()
+        self.large_view.hide()
+        self.text_edit.show()
+
+    def on_search(self):
+        self.search_timer.start()
+
+    def run_search(self):
+        """在全文索引中搜索，每个命中的笔记列出最相关的几行"""
+        query = self.search_box.text().strip()
+        self.result_list.clear()
+        results = self.note_search.search(query) if query else []
+        model = self.note_index.model
+        for path, line, preview in results:
+            name = (model.relative_path(path) or path).replace("/", os.sep)
+            item = QListWidgetItem(f"{name}:{line}\n{preview}" if line else f"{name}\n{preview}")
+            item.setData(Qt.UserRole, path)
+            item.setData(LINE_ROLE, line)
+            item.setToolTip(path)
+            self.result_list.addItem(item)
+        self.result_list.setVisible(bool(results))
+
+    def on_search_index_updated(self, added, deleted):
+        """索引有变化时刷新正在显示的搜索结果（第一次建索引时结果陆续出现）"""
+        if (added or deleted) and self.search_box.text().strip():
+            self.search_timer.start()
+
+    def on_result_clicked(self, item):
+        terms = QUERY_PATTERN.findall(self.search_box.text())
+        self.open_note(item.data(Qt.UserRole), item.data(LINE_ROLE), max(terms, key=len) if terms else None)
+        self.select_current_file()
 
     def save_note(self):
         """保存当前编辑内容到文件。如果当前文件存在则覆盖，否则弹出对话框保存新文件"""
-        if self.current_file_path:
-            # 直接覆盖当前文件
-            with open(self.current_file_path, "w", encoding="utf-8") as file:
-                file.write(self.text_edit.toPlainText())
-            print(f"已保存到 {self.current_file_path}")
+        if self.large_view.document is not None:
+            self.save_large_file()
+        elif self.current_file_path:
+            # 不等自动保存的延迟，立即交给后台写入
+            self.text_edit.document().setModified(True)
+            self.autosave()
         else:
             # 没有选择文件时，作为新文件保存
             self.save_as_new_file()
@@ -89,19 +221,71 @@ class NotePage(QWidget):
         """弹出文件选择对话框，保存当前文本内容到新文件"""
         file_path, _ = QFileDialog.getSaveFileName(self, "保存笔记", self.current_folder, "Text Files (*.txt)")
         if file_path:
-            with open(file_path, "w", encoding="utf-8") as file:
-                file.write(self.text_edit.toPlainText())
             self.current_file_path = file_path  # 更新当前文件路径
-            self.load_txt_files()  # 刷新文件列表
+            self.reveal_path = file_path
+            self.text_edit.document().setModified(True)
+            self.autosave()
+
+    def autosave(self):
+        """把编辑器内容的快照交给后台保存；没有修改时不写
+
+        界面线程上只取一次 toPlainText()，编码和写入都在后台线程中进行。
+        """
+        self.autosave_timer.stop()
+        document = self.text_edit.document()
+        if self.current_file_path and self.large_view.document is None and document.isModified():
+            self.autosaver.save(self.current_file_path, self.text_edit.toPlainText())
+            document.setModified(False)
+
+    def save_large_file(self):
+        """大文件模式下把未保存的修改写回文件，只写修改的那几行；切换笔记、目录和退出前也会调用"""
+        if not self.large_view.is_modified():
+            return
+        path = self.large_view.document.path
+        try:
+            self.large_view.save()
+        except OSError as e:
+            logging.error(f"保存笔记失败: {path}, 错误: {e}")
+            self.save_status_label.setText(f"保存失败：{e}")
+            return
+        self.note_index.refresh_file(path)
+
+    def show_history(self):
+        """查看当前笔记的历史版本；恢复的内容放入编辑器后照常保存，成为最新的版本"""
+        history = self.autosaver.history
+        if history is None or not self.current_file_path or self.large_view.document is not None:
+            return
+        self.autosave()
+        dialog = NoteHistoryDialog(history, self.current_file_path, self.text_edit.toPlainText(), self)
+        if dialog.exec() and dialog.restored_text is not None:
+            self.text_edit.setPlainText(dialog.restored_text)
+            self.text_edit.document().setModified(True)
+            self.autosave()
+
+    def on_note_saved(self, path, seconds, error):
+        if error:
+            self.save_status_label.setText(f"保存失败：{error}")
+            if path == self.current_file_path:
+                self.text_edit.document().setModified(True)  # 下次自动保存时重试
+            return
+        self.note_index.refresh_file(path)  # 原地改写时目录不一定有通知
+        if path == self.reveal_path:  # 立即加入文件列表并选中，不等目录通知
+            self.reveal_path = None
+            self.select_current_file()
+        self.save_status_label.setText(f"已保存 {time.strftime('%H:%M:%S')}，用时 {seconds * 1000:.0f} ms")
 
     def create_new_file(self):
         """创建新文件，并自动添加到文件列表中"""
         new_file_path, _ = QFileDialog.getSaveFileName(self, "新建文件", self.current_folder, "Text Files (*.txt)")
         if new_file_path:
+            self.autosave()
+            self.save_large_file()
             # 创建空文件
             with open(new_file_path, "w", encoding="utf-8") as file:
                 file.write("")
             self.current_file_path = new_file_path  # 更新当前文件路径
+            self.close_large_file()
             self.text_edit.clear()  # 清空编辑器
-            self.load_txt_files()  # 刷新文件列表
+            self.note_index.refresh_file(new_file_path)
+            self.select_current_file()
 
@@ -0,0 +1,401 @@
+# bj/large_file.py
+import os
+import re
+import mmap
+import time
+import logging
+from array import array
+from PySide6.QtCore import Qt, QObject, QThread, QEvent, Signal
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QPlainTextEdit, QScrollBar, QLabel
+
+LARGE_FILE_BYTES = 8 * 1024 * 1024  # 达到这个大小的笔记用大文件模式打开
+WINDOW_LINES = 2000  # 编辑器中一次放入的行数
+INDEX_CHUNK = 4 * 1024 * 1024  # 建立行索引时每次扫描的字节数
+INDEX_BATCH_SECONDS = 0.1  # 至少隔多久发出一批行偏移
+SPLICE_CHUNK = 4 * 1024 * 1024  # 保存时移动文件后半部分的块大小
+NEWLINE = re.compile(b"\n")
+
+
+def select_line(editor, line, term=None):
+    """把光标移到编辑器的第 line 行（从 0 开始），这一行中有 term 时选中它"""
+    document = editor.document()
+    block = document.findBlockByNumber(line)
+    if not block.isValid():
+        return
+    cursor = QTextCursor(block)
+    if term:
+        found = document.find(term, block.position())
+        if not found.isNull() and found.block() == block:
+            cursor = found
+    editor.setTextCursor(cursor)
+    editor.ensureCursorVisible()
+
+
+def move_bytes(f, source, target, length):
+    """在同一个文件中把 [source, source + length) 移到 target，按块复制；
+    往后移时从尾部开始复制，避免覆盖还没复制的数据"""
+    if target > source:
+        position = length
+        while position > 0:
+            count = min(SPLICE_CHUNK, position)
+            position -= count
+            f.seek(source + position)
+            chunk = f.read(count)
+            f.seek(target + position)
+            f.write(chunk)
+    else:
+        position = 0
+        while position < length:
+            count = min(SPLICE_CHUNK, length - position)
+            f.seek(source + position)
+            chunk = f.read(count)
+            f.seek(target + position)
+            f.write(chunk)
+            position += count
+
+
+class LineIndexer(QThread):
+    """后台线程：从 offset 开始扫描换行符，分批发出每行开头的偏移"""
+    lines_found = Signal(object, int)  # 信号：这一批行开头的偏移（array），已扫描到的位置
+
+    def __init__(self, path, offset=0):
+        super().__init__()
+        self.path = path
+        self.offset = offset
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size <= self.offset:
+                    self.lines_found.emit(array("q"), size)
+                    return
+                # 自己映射一份：扫描不和界面线程读窗口抢同一个对象，停下时也不必加锁
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    batch = array("q")
+                    position = self.offset
+                    last = 0.0  # 第一块扫描完立即发出，尽快显示开头
+                    while self._is_running:
+                        end = min(position + INDEX_CHUNK, size)
+                        batch.extend(match.end() for match in NEWLINE.finditer(mm, position, end))
+                        position = end
+                        now = time.monotonic()
+                        if position >= size or now - last >= INDEX_BATCH_SECONDS:
+                            self.lines_found.emit(batch, position)
+                            batch = array("q")
+                            last = now
+                        if position >= size:
+                            break
+        except (OSError, ValueError) as e:
+            logging.error(f"建立行索引失败: {self.path}, 错误: {e}")
+
+
+class LargeFileDocument(QObject):
+    """内存映射的大文件和它的行索引
+
+    行开头的偏移保存在 array 中（每行 8 字节），后台扫描时陆续追加；已知结尾的行随时可以读取。
+    保存时只替换修改的那几行：长度不变时原地覆盖，否则只移动其后的部分，前面的部分不动，
+    行索引也只重新计算替换的部分，其后的偏移整体平移。
+    """
+    lines_added = Signal()  # 信号：行索引有新的进展
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.file = None
+        self.mm = None
+        self.size = 0
+        self.line_starts = array("q", [0])
+        self.scanned = 0  # 已扫描到的位置（只算已经收到的批次）
+        self.complete = False
+        self.indexer = None
+        self._map()
+        self._start_indexer(0)
+
+    def _map(self):
+        self.file = open(self.path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def _unmap(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _start_indexer(self, offset):
+        indexer = LineIndexer(self.path, offset)
+        indexer.lines_found.connect(lambda offsets, scanned: self.on_lines_found(indexer, offsets, scanned))
+        indexer.finished.connect(lambda: self.on_indexer_finished(indexer))
+        self.indexer = indexer
+        indexer.start()
+
+    def _stop_indexer(self):
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+            self.indexer = None
+
+    def on_lines_found(self, indexer, offsets, scanned):
+        if indexer is not self.indexer:  # 保存或关闭前停掉的扫描，还没送到的批次丢弃
+            return
+        self.line_starts.extend(offsets)
+        self.scanned = scanned
+        self.complete = scanned >= self.size
+        self.lines_added.emit()
+
+    def on_indexer_finished(self, indexer):
+        indexer.wait()
+        if indexer is self.indexer:
+            self.indexer = None
+
+    def line_count(self):
+        """已知结尾的行数；索引完成后是全部行数（文件以换行结尾时不算最后的空行）"""
+        count = len(self.line_starts) - 1
+        if self.complete and self.line_starts[-1] < self.size:
+            count += 1
+        return count
+
+    def line_offset(self, line):
+        """第 line 行（从 0 开始）开头的偏移；超出已知的行时是文件结尾"""
+        return self.line_starts[line] if line < len(self.line_starts) else self.size
+
+    def read(self, first, last):
+        """读取第 first 到 last 行（不含）的原始字节"""
+        if self.mm is None:
+            return b""
+        return self.mm[self.line_offset(first):self.line_offset(last)]
+
+    def splice(self, first, last, data):
+        """把第 first 到 last 行（不含）替换为 data 并写回文件，返回移动的字节数"""
+        start = self.line_offset(first)
+        end = self.line_offset(last)
+        delta = len(data) - (end - start)
+        tail = self.size - end
+        # 扫描线程和界面各有一份映射，文件变短后再访问会出错，先都释放
+        self._stop_indexer()
+        self._unmap()
+        try:
+            with open(self.path, "r+b") as f:
+                if delta:
+                    move_bytes(f, end, end + delta, tail)
+                f.seek(start)
+                f.write(data)
+                if delta < 0:
+                    f.truncate(self.size + delta)
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            self._map()
+        starts = self.line_starts[:first + 1]
+        starts.extend(start + match.end() for match in NEWLINE.finditer(data))
+        starts.extend(offset + delta for offset in self.line_starts[last + 1:])
+        self.line_starts = starts
+        self.scanned += delta
+        if not self.complete:
+            self._start_indexer(self.scanned)
+        self.lines_added.emit()
+        return (tail if delta else 0) + len(data)
+
+    def close(self):
+        self._stop_indexer()
+        self._unmap()
+
+
+class LargeFileView(QWidget):
+    """大文件查看和编辑：编辑器中只放入当前窗口的几千行，旁边的滚动条对应整个文件
+
+    在窗口内滚动只移动编辑器，滚出窗口时从映射中读出新的窗口。编辑只限于当前窗口，
+    有未保存的修改时不能翻到窗口以外；保存时只把这个窗口的行替换回文件。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.window_first = 0
+        self.window_last = 0
+        self.crlf = False  # 窗口中的行都以 \r\n 结尾，保存时换回来
+        self.trailing_newline = False  # 窗口最后一行的换行不放进编辑器，免得多出一个空行
+        self.loading = False
+        self.pending_line = None  # 要跳到的行还没有建立索引时先记下：(行号, 命中词)
+
+        self.editor = QPlainTextEdit()
+        self.editor.setLineWrapMode(QPlainTextEdit.NoWrap)  # 一行一个文本块，滚动以行为单位
+        self.editor.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.editor.verticalScrollBar().valueChanged.connect(self.on_editor_scrolled)
+        self.editor.viewport().installEventFilter(self)  # 滚轮交给外侧的滚动条
+        self.editor.modificationChanged.connect(self.update_status)
+        self.scroll_bar = QScrollBar(Qt.Vertical)
+        self.scroll_bar.setSingleStep(1)
+        self.scroll_bar.valueChanged.connect(self.on_scrolled)
+        self.status_label = QLabel()
+
+        editor_layout = QHBoxLayout()
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        editor_layout.setSpacing(0)
+        editor_layout.addWidget(self.editor)
+        editor_layout.addWidget(self.scroll_bar)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.status_label)
+        layout.addLayout(editor_layout)
+        self.setLayout(layout)
+
+    def open(self, path):
+        self.close_file()
+        self.document = LargeFileDocument(path, self)
+        self.document.lines_added.connect(self.on_lines_added)
+        self.update_status()
+
+    def close_file(self):
+        if self.document is not None:
+            self.document.close()
+            self.document.deleteLater()
+            self.document = None
+        self.pending_line = None
+        self.window_first = self.window_last = 0
+        self.loading = True
+        self.editor.clear()
+        self.loading = False
+        self.scroll_bar.setRange(0, 0)
+
+    def is_modified(self):
+        return self.document is not None and self.editor.document().isModified()
+
+    def visible_lines(self):
+        return max(1, self.editor.viewport().height() // self.editor.fontMetrics().lineSpacing())
+
+    def update_range(self):
+        visible = self.visible_lines()
+        count = self.document.line_count() if self.document is not None else 0
+        self.scroll_bar.setPageStep(visible)
+        self.scroll_bar.setMaximum(max(0, count - visible))
+
+    def update_status(self):
+        if self.document is None:
+            self.status_label.clear()
+            return
+        count = self.document.line_count()
+        text = f"大文件模式：{self.document.size / 1024 / 1024:,.1f} MB，"
+        if self.document.complete:
+            text += f"{count:,} 行"
+        else:
+            text += f"已索引 {count:,} 行（{self.document.scanned * 100 // max(1, self.document.size)}%）"
+        if self.window_last > self.window_first:
+            text += f"，编辑器中为第 {self.window_first + 1:,}-{self.window_last:,} 行"
+        if self.editor.isReadOnly():
+            text += "（不是 UTF-8 编码，只读）"
+        elif self.editor.document().isModified():
+            text += "（未保存，保存后才能翻到其他部分）"
+        self.status_label.setText(text)
+
+    def on_lines_added(self):
+        self.update_range()
+        if self.window_last == self.window_first and self.document.line_count():
+            self.load_window(0)
+        if self.pending_line is not None and (self.pending_line[0] < self.document.line_count()
+                                              or self.document.complete):
+            line, term = self.pending_line
+            self.pending_line = None
+            self.go_to_line(line, term)
+        self.update_status()
+
+    def load_window(self, line):
+        """读出包含第 line 行的窗口：前面留四分之一，小范围往回滚动不必重新读取"""
+        count = self.document.line_count()
+        first = max(0, min(line - WINDOW_LINES // 4, count - WINDOW_LINES))
+        last = min(count, first + WINDOW_LINES)
+        data = self.document.read(first, last)
+        try:
+            text = data.decode("utf-8")
+            read_only = False
+        except UnicodeDecodeError:
+            text = data.decode("utf-8", errors="replace")
+            read_only = True  # 保存时无法还原原来的字节
+        newlines = text.count("\n")
+        self.crlf = newlines > 0 and text.count("\r\n") == newlines
+        if self.crlf:
+            text = text.replace("\r\n", "\n")
+        self.trailing_newline = text.endswith("\n")
+        if self.trailing_newline:
+            text = text[:-1]
+        self.loading = True
+        self.editor.setPlainText(text)
+        self.editor.setReadOnly(read_only)
+        self.loading = False
+        self.window_first = first
+        self.window_last = last
+        self.update_status()
+
+    def on_scrolled(self, value):
+        if self.document is None:
+            return
+        visible = self.visible_lines()
+        if value < self.window_first or value + visible > self.window_last:
+            if self.editor.document().isModified():
+                self.scroll_bar.setValue(max(self.window_first, min(value, self.window_last - visible)))
+                return
+            self.load_window(value)
+        self.loading = True
+        self.editor.verticalScrollBar().setValue(value - self.window_first)
+        self.loading = False
+
+    def on_editor_scrolled(self, value):
+        """移动光标等使编辑器自己滚动时，外侧的滚动条跟着走"""
+        if not self.loading:
+            self.scroll_bar.setValue(self.window_first + value)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Wheel:
+            QApplication.sendEvent(self.scroll_bar, event)
+            return True
+        return super().eventFilter(watched, event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_range()
+
+    def go_to_line(self, line, term=None):
+        """跳到第 line 行（从 1 开始）；还没有建立索引到这一行时，索引到了再跳"""
+        if self.document is None:
+            return
+        line -= 1
+        count = self.document.line_count()
+        if line >= count and not self.document.complete:
+            self.pending_line = (line + 1, term)
+            return
+        line = max(0, min(line, count - 1))
+        if not self.window_first <= line < self.window_last:
+            if self.editor.document().isModified():
+                return
+            self.load_window(line)
+        self.scroll_bar.setValue(max(0, line - self.visible_lines() // 2))
+        select_line(self.editor, line - self.window_first, term)
+
+    def save(self):
+        """把当前窗口的修改写回文件：只替换这几行对应的字节"""
+        if not self.is_modified():
+            return False
+        text = self.editor.toPlainText()
+        if self.trailing_newline:
+            text += "\n"
+        lines = text.count("\n") + (0 if self.trailing_newline else 1)
+        if self.crlf:
+            text = text.replace("\n", "\r\n")
+        data = text.encode("utf-8")
+        began = time.perf_counter()
+        moved = self.document.splice(self.window_first, self.window_last, data)
+        logging.info(f"大文件保存: {self.document.path}，替换第 {self.window_first + 1}-{self.window_last} 行，"
+                     f"写入 {moved:,} 字节（文件 {self.document.size:,} 字节），{time.perf_counter() - began:.2f} s")
+        self.window_last = min(self.window_first + lines, self.document.line_count())
+        self.editor.document().setModified(False)
+        self.update_range()
+        self.update_status()
+        return True
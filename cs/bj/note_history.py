@@ -0,0 +1,335 @@
+# bj/note_history.py
+import os
+import json
+import time
+import zlib
+import difflib
+import hashlib
+import sqlite3
+import logging
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPlainTextEdit, \
+    QPushButton, QCheckBox, QLabel
+
+NOTE_HISTORY_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "note_history")
+SNAPSHOT_INTERVAL = 32  # 每隔多少个版本保存一次完整内容
+MAX_HISTORY_BYTES = 8 * 1024 * 1024  # 超过这个大小的笔记（大文件模式）不记录历史
+THIN_EVERY = 50  # 一个笔记每记录多少个版本检查一次是否需要精简
+HOUR = 3600
+DAY = 24 * HOUR
+MONTH = 30 * DAY
+WEEK = 7 * DAY
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    path TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    saved REAL NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    lines INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    base INTEGER,
+    data BLOB NOT NULL,
+    PRIMARY KEY (path, number)
+);
+CREATE INDEX IF NOT EXISTS revisions_segment ON revisions (path, segment, depth);
+"""
+
+
+def history_path(root):
+    """每个笔记目录一个历史文件，和全文索引一样放在本机"""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(NOTE_HISTORY_FOLDER, f"{digest}.sqlite3")
+
+
+def encode_delta(old_lines, new_lines):
+    """行级增量：相同的行记为 [起始行, 行数]，新的行直接记下，压缩后保存"""
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2 - i1])
+        elif j2 > j1:
+            ops.append(new_lines[j1:j2])
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def apply_delta(old_lines, data):
+    lines = []
+    for op in json.loads(zlib.decompress(data)):
+        if isinstance(op[0], int):
+            lines.extend(old_lines[op[0]:op[0] + op[1]])
+        else:
+            lines.extend(op)
+    return lines
+
+
+def thin_revisions(times, now):
+    """按保存时间挑出要保留的版本（下标）：一小时内的全部保留，一天内每小时、一个月内每天、
+    更早的每周只保留最后一个；最新的版本总是保留"""
+    keep = set()
+    buckets = {}
+    for index, saved in enumerate(times):
+        age = now - saved
+        if age < HOUR:
+            keep.add(index)
+        elif age < DAY:
+            buckets[("hour", int(saved // HOUR))] = index
+        elif age < MONTH:
+            buckets[("day", int(saved // DAY))] = index
+        else:
+            buckets[("week", int(saved // WEEK))] = index
+    keep.update(buckets.values())
+    if times:
+        keep.add(len(times) - 1)
+    return sorted(keep)
+
+
+class NoteHistory:
+    """笔记目录的版本历史（SQLite）：每次保存记录一个版本
+
+    每个笔记的版本分成若干段，段首保存完整内容，其余保存相对段内较早版本的行级增量。
+    第 k 个增量基于段内第 k & (k - 1) 个版本（跳跃增量），恢复任何版本最多依次应用 log2(SNAPSHOT_INTERVAL) 个增量，
+    不必从段首逐个应用。旧版本按时间自动精简，只重新编码第一个被删除的版本之后的部分。
+    保存线程和界面线程各自打开连接，可以同时使用。
+    """
+
+    def __init__(self, root, db_path=None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or history_path(self.root)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def relative_path(self, path):
+        """目录中的笔记返回相对路径，目录以外的返回 None"""
+        try:
+            relative = os.path.relpath(os.path.abspath(path), self.root)
+        except ValueError:  # Windows 上不在同一个盘
+            return None
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return relative.replace(os.sep, "/")
+
+    def record_previous(self, path):
+        """写入前调用：文件的当前内容还不是最新版本时（第一次保存，或在程序外改过）先记下来"""
+        relative = self.relative_path(path)
+        if relative is None:
+            return
+        try:
+            stat = os.stat(path)
+            if stat.st_size > MAX_HISTORY_BYTES:
+                return
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT number, size, mtime FROM revisions WHERE path = ? ORDER BY number DESC LIMIT 1",
+                                   (relative,)).fetchone()
+                if row is not None and row[1:] == (stat.st_size, stat.st_mtime):
+                    return
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                if row is not None and self._text(conn, relative, row[0]) == text:
+                    return
+                self._append(conn, relative, text, stat.st_mtime, stat)
+                conn.commit()
+            finally:
+                conn.close()
+        except FileNotFoundError:
+            pass  # 新文件，没有旧内容
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"记录笔记原有版本失败: {path}, 错误: {e}")
+
+    def record(self, path, text, saved=None):
+        """写入后调用：记录刚写入的内容；和最新版本相同时不记录"""
+        relative = self.relative_path(path)
+        if relative is None:
+            return
+        try:
+            stat = os.stat(path)
+            if stat.st_size > MAX_HISTORY_BYTES:
+                return
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT number FROM revisions WHERE path = ? ORDER BY number DESC LIMIT 1",
+                                   (relative,)).fetchone()
+                if row is not None and self._text(conn, relative, row[0]) == text:
+                    conn.execute("UPDATE revisions SET size = ?, mtime = ? WHERE path = ? AND number = ?",
+                                 (stat.st_size, stat.st_mtime, relative, row[0]))
+                    conn.commit()
+                    return
+                number = self._append(conn, relative, text, time.time() if saved is None else saved, stat)
+                conn.commit()
+                if number % THIN_EVERY == 0:
+                    self._thin(conn, relative, time.time() if saved is None else saved)
+            finally:
+                conn.close()
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"记录笔记版本失败: {path}, 错误: {e}")
+
+    def _append(self, conn, path, text, saved, stat):
+        row = conn.execute("SELECT number, segment, depth FROM revisions WHERE path = ? ORDER BY number DESC LIMIT 1",
+                           (path,)).fetchone()
+        number = row[0] + 1 if row else 1
+        self._insert(conn, path, number, text, saved, stat.st_size, stat.st_mtime, row[1:] if row else None)
+        return number
+
+    def _insert(self, conn, path, number, text, saved, size, mtime, previous):
+        """previous 是前一个版本的 (段首版本号, 段内序号)，没有前一个版本时为 None"""
+        lines = text.split("\n")
+        full = zlib.compress(text.encode("utf-8"))
+        segment, depth, base, data = number, 0, None, full
+        if previous is not None and previous[1] + 1 < SNAPSHOT_INTERVAL:
+            depth = previous[1] + 1
+            base = conn.execute("SELECT number FROM revisions WHERE path = ? AND segment = ? AND depth = ?",
+                                (path, previous[0], depth & (depth - 1))).fetchone()[0]
+            delta = encode_delta(self._text(conn, path, base).split("\n"), lines)
+            if len(delta) < len(full):
+                segment, data = previous[0], delta
+            else:  # 改动太多，增量不比完整内容小，从这里开始新的一段
+                depth, base = 0, None
+        conn.execute("INSERT INTO revisions (path, number, saved, size, mtime, lines, segment, depth, base, data) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (path, number, saved, size, mtime, len(lines), segment, depth, base, data))
+
+    def _text(self, conn, path, number):
+        chain = []
+        while True:
+            row = conn.execute("SELECT depth, base, data FROM revisions WHERE path = ? AND number = ?",
+                               (path, number)).fetchone()
+            if row is None:
+                raise KeyError(f"{path} 没有第 {number} 个版本")
+            chain.append(row[2])
+            if row[0] == 0:
+                break
+            number = row[1]
+        lines = zlib.decompress(chain.pop()).decode("utf-8").split("\n")
+        while chain:
+            lines = apply_delta(lines, chain.pop())
+        return "\n".join(lines)
+
+    def _thin(self, conn, path, now):
+        rows = conn.execute("SELECT number, saved, size, mtime, segment, depth FROM revisions WHERE path = ? "
+                            "ORDER BY number", (path,)).fetchall()
+        keep = thin_revisions([row[1] for row in rows], now)
+        if len(keep) == len(rows):
+            return
+        first_dropped = next(index for index, kept in enumerate(keep + [len(rows)]) if kept != index)
+        # 第一个被删除的版本之前的不变；之后保留的版本先恢复出内容，再接着前面重新编码
+        texts = [(rows[index], self._text(conn, path, rows[index][0])) for index in keep[first_dropped:]]
+        conn.execute("DELETE FROM revisions WHERE path = ? AND number >= ?", (path, rows[first_dropped][0]))
+        previous = rows[first_dropped - 1][4:] if first_dropped else None
+        for (number, saved, size, mtime, _, _), text in texts:
+            self._insert(conn, path, number, text, saved, size, mtime, previous)
+            previous = conn.execute("SELECT segment, depth FROM revisions WHERE path = ? AND number = ?",
+                                    (path, number)).fetchone()
+        conn.commit()
+        logging.info(f"精简笔记历史: {path}，{len(rows)} 个版本保留 {len(keep)} 个")
+
+    def revisions(self, path):
+        """返回 [(版本号, 保存时间, 大小, 行数)]，最新的在前；只读元数据，不解压内容"""
+        relative = self.relative_path(path)
+        if relative is None:
+            return []
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT number, saved, size, lines FROM revisions WHERE path = ? ORDER BY number DESC",
+                                (relative,)).fetchall()
+        finally:
+            conn.close()
+
+    def text(self, path, number):
+        conn = self._connect()
+        try:
+            return self._text(conn, self.relative_path(path), number)
+        finally:
+            conn.close()
+
+    def storage(self, path):
+        """返回 (版本数, 各版本内容合计字节数, 历史实际占用的字节数)"""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) "
+                                "FROM revisions WHERE path = ?", (self.relative_path(path),)).fetchone()
+        finally:
+            conn.close()
+
+
+def diff_text(old, new, old_name, new_name):
+    return "\n".join(difflib.unified_diff(old.split("\n"), new.split("\n"), old_name, new_name, lineterm=""))
+
+
+class NoteHistoryDialog(QDialog):
+    """一个笔记的历史版本：选中的版本与前一个版本（或编辑器中的内容）的差异，可以恢复选中的版本"""
+
+    def __init__(self, history, path, current_text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"历史版本 - {os.path.basename(path)}")
+        self.resize(900, 600)
+        self.history = history
+        self.path = path
+        self.current_text = current_text
+        self.restored_text = None
+
+        self.revision_list = QListWidget()
+        for number, saved, size, lines in history.revisions(path):
+            item = QListWidgetItem(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved))}\n"
+                                   f"{size:,} 字节，{lines:,} 行")
+            item.setData(Qt.UserRole, number)
+            self.revision_list.addItem(item)
+        self.revision_list.currentRowChanged.connect(self.show_diff)
+        self.compare_current = QCheckBox("与编辑器中的内容比较")
+        self.compare_current.toggled.connect(lambda: self.show_diff(self.revision_list.currentRow()))
+        self.diff_view = QPlainTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        restore_button = QPushButton("恢复此版本")
+        restore_button.clicked.connect(self.restore)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.reject)
+
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel(f"共 {self.revision_list.count()} 个版本"))
+        left_layout.addWidget(self.revision_list)
+        right_layout = QVBoxLayout()
+        right_layout.addWidget(self.compare_current)
+        right_layout.addWidget(self.diff_view)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(restore_button)
+        buttons.addWidget(close_button)
+        right_layout.addLayout(buttons)
+        layout = QHBoxLayout()
+        layout.addLayout(left_layout, 1)
+        layout.addLayout(right_layout, 3)
+        self.setLayout(layout)
+        if self.revision_list.count():
+            self.revision_list.setCurrentRow(0)
+
+    def show_diff(self, row):
+        if row < 0:
+            self.diff_view.clear()
+            return
+        number = self.revision_list.item(row).data(Qt.UserRole)
+        text = self.history.text(self.path, number)
+        if self.compare_current.isChecked():
+            diff = diff_text(text, self.current_text, f"版本 {number}", "编辑器中的内容")
+        elif row + 1 < self.revision_list.count():
+            previous = self.revision_list.item(row + 1).data(Qt.UserRole)
+            diff = diff_text(self.history.text(self.path, previous), text, f"版本 {previous}", f"版本 {number}")
+        else:
+            diff = diff_text("", text, "（无）", f"版本 {number}")
+        self.diff_view.setPlainText(diff or "（没有差异）")
+
+    def restore(self):
+        row = self.revision_list.currentRow()
+        if row >= 0:
+            self.restored_text = self.history.text(self.path, self.revision_list.item(row).data(Qt.UserRole))
+            self.accept()
@@ -0,0 +1,416 @@
+# bj/note_index.py
+import os
+import time
+import bisect
+import logging
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QThread, QTimer, QFileSystemWatcher, Signal
+
+NOTE_SUFFIX = ".txt"
+NOTE_PATH_ROLE = Qt.UserRole + 1  # 文件的绝对路径
+SCAN_BATCH_SECONDS = 0.1  # 扫描线程每隔这么久把已列出的目录交给界面线程（开始时间隔更短，尽快显示第一批）
+FIRST_BATCH_SECONDS = 0.01
+RESCAN_DELAY_MS = 200  # 目录变化后等这么久再重新列出，合并保存文件时的连续通知
+BULK_CHANGES = 200  # 一次变化超过这么多行时直接重置模型，不逐行插入
+COLUMNS = ("名称", "大小", "修改时间")
+
+
+def folder_path(root, folder):
+    """相对目录（/ 分隔，根目录为 ""）对应的绝对路径"""
+    return os.path.join(root, *folder.split("/")) if folder else root
+
+
+def list_folder(root, folder):
+    """列出一个目录中的笔记文件和子目录，返回 ([(相对路径, 大小, 修改时间), ...], [子目录, ...])；
+    目录已不存在时返回 None。以 . 开头的目录（.git 等）不列出"""
+    prefix = folder + "/" if folder else ""
+    files = []
+    folders = []
+    try:
+        with os.scandir(folder_path(root, folder)) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            folders.append(prefix + entry.name)
+                    elif entry.name.lower().endswith(NOTE_SUFFIX) and entry.is_file():
+                        stat = entry.stat()  # Windows 上直接取自目录项，不需要再访问文件
+                        files.append((prefix + entry.name, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return files, folders
+
+
+def format_size(size):
+    return f"{(size + 1023) // 1024:,} KB"
+
+
+class NoteScanner(QThread):
+    """在后台用 os.scandir 列出目录，分批交给界面线程；批次间隔从 FIRST_BATCH_SECONDS 翻倍增长到 SCAN_BATCH_SECONDS"""
+    listed = Signal(object)  # 信号：[(目录, 文件列表, 子目录列表, 是否递归), ...]，目录不存在时两个列表为 None
+
+    def __init__(self, root, jobs):
+        super().__init__()
+        self.root = root
+        self.jobs = jobs  # [(相对目录, 是否递归), ...]
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        stack = list(self.jobs)
+        batch = []
+        last = time.monotonic()
+        interval = FIRST_BATCH_SECONDS
+        while stack and self._is_running:
+            folder, recursive = stack.pop()
+            listing = list_folder(self.root, folder)
+            files, folders = listing if listing is not None else (None, None)
+            batch.append((folder, files, folders, recursive))
+            if recursive and folders:
+                stack.extend((subfolder, True) for subfolder in folders)
+            now = time.monotonic()
+            if now - last >= interval:
+                self.listed.emit(batch)
+                batch = []
+                last = now
+                interval = min(interval * 2, SCAN_BATCH_SECONDS)
+        if batch and self._is_running:
+            self.listed.emit(batch)
+
+
+class NoteFileModel(QAbstractTableModel):
+    """笔记文件列表：名称（相对路径）、大小、修改时间三列，可按任一列排序
+
+    排序键（最后一项是路径本身）按升序保存在列表中，降序时反过来读，所以排序不经过 QSortFilterProxyModel，
+    只切换升降序时不用重新排序；增删单个文件时用 bisect 找到位置后只插入或删除一行。
+    """
+    files_changed = Signal(object, object)  # 信号：新增或大小、修改时间变化的 [(相对路径, (大小, 修改时间))]，删除的 [相对路径]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = ""
+        self.entries = {}  # 相对路径 -> (大小, 修改时间)
+        self.folder_files = {}  # 相对目录 -> 其中的文件
+        self.subfolders = {}  # 相对目录 -> 其中的子目录
+        self.paths = []  # 按排序键升序
+        self.keys = []
+        self.sort_column = 0
+        self.descending = False
+
+    def _key_function(self):
+        entries = self.entries
+        if self.sort_column == 1:
+            return lambda path: (entries[path][0], path)
+        if self.sort_column == 2:
+            return lambda path: (entries[path][1], path)
+        return lambda path: (path.lower(), path)
+
+    def _key(self, path):
+        return self._key_function()(path)
+
+    def _view_row(self, position):
+        return len(self.paths) - 1 - position if self.descending else position
+
+    def path_at(self, row):
+        return self.paths[self._view_row(row)]
+
+    def absolute_path(self, path):
+        return os.path.join(self.root, *path.split("/"))
+
+    def relative_path(self, absolute_path):
+        """绝对路径在根目录中的相对路径，不在根目录中时返回 None"""
+        if not self.root:
+            return None
+        try:
+            relative = os.path.relpath(os.path.abspath(absolute_path), self.root)
+        except ValueError:  # Windows 上不在同一个盘
+            return None
+        if relative in (os.curdir, os.pardir) or relative.startswith(os.pardir + os.sep):
+            return None
+        return relative.replace(os.sep, "/")
+
+    def row_of(self, path):
+        """文件所在的行，不在列表中时返回 -1"""
+        if path not in self.entries:
+            return -1
+        return self._view_row(bisect.bisect_left(self.keys, self._key(path)))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.path_at(index.row())
+        if role == Qt.DisplayRole:
+            size, mtime = self.entries[path]
+            if index.column() == 0:
+                return path.replace("/", os.sep)
+            if index.column() == 1:
+                return format_size(size)
+            return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+        if role == NOTE_PATH_ROLE:
+            return self.absolute_path(path)
+        if role == Qt.ToolTipRole:
+            return self.absolute_path(path)
+        if role == Qt.TextAlignmentRole and index.column() == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按列排序；选中的行通过持久索引跟着文件走"""
+        descending = order == Qt.DescendingOrder
+        if column == self.sort_column and descending == self.descending:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = [(index, self.path_at(index.row())) for index in self.persistentIndexList()]
+        self.descending = descending
+        if column != self.sort_column:
+            self.sort_column = column
+            self._rebuild()
+        for index, path in persistent:
+            self.changePersistentIndex(index, self.index(self.row_of(path), index.column()))
+        self.layoutChanged.emit()
+
+    def _rebuild(self):
+        self.keys = sorted(map(self._key_function(), self.entries))
+        self.paths = [key[-1] for key in self.keys]
+
+    def _merge(self, removed, upserts):
+        """批量合并：保留的键本来有序，新键排好序后接在后面，Timsort 只需合并这两段"""
+        changed = set(removed)
+        changed.update(path for path, _ in upserts)
+        keys = [key for key in self.keys if key[-1] not in changed] if changed & self.entries.keys() else self.keys
+        for path in removed:
+            self.entries.pop(path, None)
+        self.entries.update(upserts)
+        key = self._key_function()
+        keys.extend(sorted(key(path) for path, _ in upserts))
+        keys.sort()
+        self.keys = keys
+        self.paths = [key[-1] for key in keys]
+
+    def set_root(self, root):
+        self.beginResetModel()
+        self.root = os.path.abspath(root) if root else ""
+        self.entries = {}
+        self.folder_files = {}
+        self.subfolders = {}
+        self.paths = []
+        self.keys = []
+        self.endResetModel()
+
+    def _insert(self, path, size, mtime):
+        self.entries[path] = (size, mtime)
+        key = self._key(path)
+        position = bisect.bisect_left(self.keys, key)
+        row = len(self.paths) - position if self.descending else position
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.paths.insert(position, path)
+        self.keys.insert(position, key)
+        self.endInsertRows()
+
+    def _remove(self, path):
+        position = bisect.bisect_left(self.keys, self._key(path))
+        row = self._view_row(position)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.paths[position]
+        del self.keys[position]
+        del self.entries[path]
+        self.endRemoveRows()
+
+    def _drop_folder(self, folder, removed, gone):
+        """目录已不存在：它和所有子目录中的文件都要删除"""
+        removed.extend(self.folder_files.pop(folder, ()))
+        gone.append(folder)
+        for subfolder in self.subfolders.pop(folder, ()):
+            self._drop_folder(subfolder, removed, gone)
+
+    def apply(self, listings):
+        """合并扫描结果，返回 (已列出的目录, 已不存在的目录, 新出现但还没列出的目录)"""
+        removed = []
+        upserts = []
+        listed = []
+        gone = []
+        unlisted = []
+        for folder, files, folders, recursive in listings:
+            if files is None:
+                if folder in self.folder_files:
+                    self._drop_folder(folder, removed, gone)
+                    parent = folder.rpartition("/")[0]
+                    self.subfolders.get(parent, set()).discard(folder)
+                continue
+            listed.append(folder)
+            current = {path: (size, mtime) for path, size, mtime in files}
+            removed.extend(self.folder_files.get(folder, set()) - current.keys())
+            upserts.extend((path, entry) for path, entry in current.items() if self.entries.get(path) != entry)
+            self.folder_files[folder] = set(current)
+            old_folders = self.subfolders.get(folder, set())
+            new_folders = set(folders)
+            for subfolder in old_folders - new_folders:
+                self._drop_folder(subfolder, removed, gone)
+            if not recursive:  # 递归扫描时子目录由同一个扫描线程接着列出
+                unlisted.extend(new_folders - old_folders)
+            self.subfolders[folder] = new_folders
+
+        if len(removed) + len(upserts) > BULK_CHANGES or not self.paths:
+            if removed or upserts:
+                self.beginResetModel()
+                self._merge(removed, upserts)
+                self.endResetModel()
+        else:
+            for path in removed:
+                if path in self.entries:
+                    self._remove(path)
+            for path, (size, mtime) in upserts:
+                if path in self.entries:
+                    self._remove(path)
+                self._insert(path, size, mtime)
+        if removed or upserts:
+            self.files_changed.emit(upserts, removed)
+        return listed, gone, unlisted
+
+    def refresh_file(self, path):
+        """重新读取单个文件的大小和修改时间（保存、打开文件时调用，不必等目录通知）"""
+        try:
+            stat = os.stat(self.absolute_path(path))
+        except OSError:
+            stat = None
+        folder = path.rpartition("/")[0]
+        if folder not in self.folder_files:  # 所在目录还没列出，等扫描结果
+            return
+        if stat is None:
+            if path in self.entries:
+                self.folder_files[folder].discard(path)
+                self._remove(path)
+                self.files_changed.emit([], [path])
+            return
+        entry = (stat.st_size, stat.st_mtime)
+        if self.entries.get(path) == entry:
+            return
+        if path in self.entries:
+            self._remove(path)
+        self.folder_files[folder].add(path)
+        self._insert(path, *entry)
+        self.files_changed.emit([(path, entry)], [])
+
+
+class NoteIndex(QObject):
+    """笔记目录的索引：后台扫描填充 NoteFileModel，之后用 QFileSystemWatcher 监视各目录，
+    某个目录变化时只重新列出这个目录
+
+    Linux 上目录通知不包括原地改写文件内容（多数编辑器保存时先写临时文件再改名，会有通知），
+    这种情况下大小和修改时间在打开或保存该文件时由 refresh_file 更新。
+    """
+    scan_finished = Signal()  # 信号：第一次完整扫描结束
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = NoteFileModel(self)
+        self.watcher = None
+        self.watched = set()  # 正在监视的目录（绝对路径）
+        self.scanner = None
+        self.jobs = []  # 等当前扫描线程结束后再执行的 (相对目录, 是否递归)
+        self.dirty = set()  # 有变化、等待重新列出的相对目录
+        self.initial_scan = False
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.rescan_dirty)
+
+    def set_folder(self, folder):
+        """切换到新的笔记目录并开始后台扫描"""
+        self.stop()
+        # 换一个新的监视器，旧目录的成千上万个监视一次释放
+        if self.watcher is not None:
+            self.watcher.deleteLater()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watched = set()
+        self.model.set_root(folder)
+        self.jobs = []
+        self.dirty = set()
+        if folder:
+            self.initial_scan = True
+            self.scan([("", True)])
+
+    def scan(self, jobs):
+        if self.scanner is not None and self.scanner.isRunning():
+            self.jobs.extend(jobs)
+            return
+        scanner = NoteScanner(self.model.root, jobs)
+        scanner.listed.connect(lambda listings: self.on_listed(scanner, listings))
+        scanner.finished.connect(lambda: self.on_scanner_finished(scanner))
+        self.scanner = scanner
+        scanner.start()
+
+    def on_listed(self, scanner, listings):
+        if scanner is not self.scanner:  # 已切换目录，旧扫描的结果丢弃
+            return
+        listed, gone, unlisted = self.model.apply(listings)
+        root = self.model.root
+        new_paths = [path for path in (folder_path(root, folder) for folder in listed) if path not in self.watched]
+        if new_paths:
+            failed = self.watcher.addPaths(new_paths)
+            if failed:
+                logging.warning(f"无法监视 {len(failed)} 个目录（例如 {failed[0]}），这些目录的变化需要重新选择文件夹才能看到")
+            self.watched.update(new_paths)
+            self.watched.difference_update(failed)
+        gone_paths = [path for path in (folder_path(root, folder) for folder in gone) if path in self.watched]
+        if gone_paths:
+            self.watcher.removePaths(gone_paths)
+            self.watched.difference_update(gone_paths)
+        if unlisted:
+            self.scan([(folder, True) for folder in unlisted])
+
+    def on_scanner_finished(self, scanner):
+        scanner.wait()
+        if scanner is not self.scanner:
+            return
+        self.scanner = None
+        if self.jobs:
+            jobs, self.jobs = self.jobs, []
+            self.scan(jobs)
+        elif self.initial_scan:
+            self.initial_scan = False
+            logging.info(f"笔记目录扫描完成: {self.model.root}，共 {len(self.model.entries)} 个文件")
+            self.scan_finished.emit()
+
+    def on_directory_changed(self, path):
+        folder = self.model.relative_path(path)
+        if path == self.model.root:
+            folder = ""
+        if folder is None:
+            return
+        self.dirty.add(folder)
+        self.rescan_timer.start()
+
+    def rescan_dirty(self):
+        """只重新列出有变化的目录，不递归"""
+        jobs = [(folder, False) for folder in sorted(self.dirty)]
+        self.dirty = set()
+        if jobs:
+            self.scan(jobs)
+
+    def refresh_file(self, absolute_path):
+        path = self.model.relative_path(absolute_path)
+        if path is not None and path.lower().endswith(NOTE_SUFFIX):
+            self.model.refresh_file(path)
+
+    def stop(self):
+        self.rescan_timer.stop()
+        if self.scanner is not None:
+            self.scanner.stop()
+            self.scanner.wait()
+            self.scanner = None
@@ -0,0 +1,243 @@
+# bj/note_search.py
+import os
+import hashlib
+import sqlite3
+import logging
+from PySide6.QtCore import QObject, QThread, Signal
+from text_search import QUERY_PATTERN, build_query, make_snippet, segment_cjk, term_pattern
+
+NOTE_INDEX_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "note_index")
+COMMIT_INTERVAL = 500  # 每索引多少个笔记提交一次
+MAX_INDEX_BYTES = 16 * 1024 * 1024  # 超过这个大小的笔记只按文件名索引
+SEARCH_LIMIT = 50  # 最多返回多少个笔记
+LINES_PER_NOTE = 3  # 每个笔记最多列出几行命中
+MAX_LINE_MATCHES = 2000  # 在一个笔记中最多检查多少处命中来挑选最好的几行
+NAME_WEIGHT = 10.0  # 排序时文件名命中的权重
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+
+def index_path(root):
+    """每个笔记目录一个索引文件，放在本机，不写进（可能是共享的）笔记目录"""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(NOTE_INDEX_FOLDER, f"{digest}.sqlite3")
+
+
+def connect(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")  # 后台索引时界面线程仍可查询
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def matching_lines(body, terms, limit=LINES_PER_NOTE):
+    """返回命中的行 [(行号, 预览)]：包含的查询词种类多的行在前，同样多时按行号
+
+    segment_cjk 不改变换行，所以存储的正文中的行号就是文件中的行号。
+    """
+    if not terms:
+        return []
+    pattern = term_pattern(terms)
+    lines = {}  # 行开头位置 -> 该行命中的词
+    for count, match in enumerate(pattern.finditer(body)):
+        if count >= MAX_LINE_MATCHES:
+            break
+        start = body.rfind("\n", 0, match.start()) + 1
+        lines.setdefault(start, set()).add("".join(match.group(0).split()).lower())
+    best = sorted(lines, key=lambda start: (-len(lines[start]), start))[:limit]
+    numbers = {}
+    line_number = 1
+    position = 0
+    for start in sorted(best):  # 从前往后数换行，只数一遍
+        line_number += body.count("\n", position, start)
+        position = start
+        numbers[start] = line_number
+    results = []
+    for start in best:
+        end = body.find("\n", start)
+        results.append((numbers[start], make_snippet(body[start:end if end >= 0 else len(body)], terms)))
+    return results
+
+
+class NoteSearchIndexer(QThread):
+    """后台线程：重新索引大小或修改时间变化了的笔记，从索引中删除已不存在的笔记"""
+    indexed = Signal(int, int)  # 信号：本次重新索引的笔记数、删除的笔记数
+
+    def __init__(self, db_path, root, upserts, removed, keep=None):
+        super().__init__()
+        self.db_path = db_path
+        self.root = root
+        self.upserts = upserts  # {相对路径: (大小, 修改时间)}
+        self.removed = removed  # {相对路径}
+        self.keep = keep  # 完整扫描后的全部相对路径；不为 None 时索引中其余的笔记都删除
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        added = deleted = 0
+        try:
+            conn = connect(self.db_path)
+            for path, (size, mtime) in self.upserts.items():
+                if not self._is_running:
+                    break
+                row = conn.execute("SELECT id, size, mtime FROM notes WHERE path = ?", (path,)).fetchone()
+                if row is not None and row[1:] == (size, mtime):
+                    continue
+                if self.index_file(conn, path, size, mtime, row[0] if row else None):
+                    added += 1
+                    if added % COMMIT_INTERVAL == 0:
+                        conn.commit()
+            removed = set(self.removed)
+            if self.keep is not None and self._is_running:
+                removed.update(path for path, in conn.execute("SELECT path FROM notes") if path not in self.keep)
+            for path in removed:
+                row = conn.execute("SELECT id FROM notes WHERE path = ?", (path,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM notes WHERE id = ?", row)
+                    conn.execute("DELETE FROM notes_fts WHERE rowid = ?", row)
+                    deleted += 1
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"索引笔记失败: {e}")
+        if added or deleted:
+            logging.info(f"笔记全文索引更新：重新索引 {added} 个，删除 {deleted} 个")
+        self.indexed.emit(added, deleted)
+
+    def index_file(self, conn, path, size, mtime, note_id):
+        body = ""
+        if size <= MAX_INDEX_BYTES:
+            try:
+                with open(os.path.join(self.root, *path.split("/")), "r", encoding="utf-8", errors="replace") as f:
+                    body = f.read()
+            except OSError as e:
+                logging.warning(f"读取笔记失败: {path}, 错误: {e}")
+                return False
+        if note_id is None:
+            note_id = conn.execute("INSERT INTO notes (path, size, mtime) VALUES (?, ?, ?)",
+                                   (path, size, mtime)).lastrowid
+        else:
+            conn.execute("UPDATE notes SET size = ?, mtime = ? WHERE id = ?", (size, mtime, note_id))
+            conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+        name = os.path.splitext(path)[0].replace("/", " ")
+        conn.execute("INSERT INTO notes_fts (rowid, name, body) VALUES (?, ?, ?)",
+                     (note_id, segment_cjk(name), segment_cjk(body)))
+        return True
+
+
+class NoteSearchIndex(QObject):
+    """笔记目录的全文索引（SQLite FTS5），保存在本机，切换目录后继续使用上次的索引
+
+    由 NoteIndex 报告的文件变化驱动：只重新读取和分词大小或修改时间变了的笔记。
+    中文按单字加短语查询匹配，可以和英文单词混合搜索。
+    """
+    updated = Signal(int, int)  # 信号：后台索引完成（重新索引的笔记数、删除的笔记数）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = ""
+        self.db_path = None
+        self.conn = None
+        self.indexer = None
+        self.pending = None  # 正在索引时收到的变化：[upserts, removed, keep]
+
+    def set_root(self, root):
+        self.close()
+        self.root = os.path.abspath(root) if root else ""
+        self.db_path = index_path(self.root) if root else None
+        self.conn = connect(self.db_path) if root else None
+
+    def update(self, upserts=(), removed=(), keep=None):
+        """在后台合并文件变化；正在索引时先记下，本轮结束后再来一轮"""
+        if self.conn is None:
+            return
+        if self.pending is None:
+            self.pending = [{}, set(), None]
+        pending_upserts, pending_removed, _ = self.pending
+        for path, entry in upserts:
+            pending_upserts[path] = entry
+            pending_removed.discard(path)
+        for path in removed:
+            pending_upserts.pop(path, None)
+            pending_removed.add(path)
+        if keep is not None:
+            self.pending[2] = keep
+        if self.indexer is None or not self.indexer.isRunning():
+            self.start_indexer()
+
+    def start_indexer(self):
+        upserts, removed, keep = self.pending
+        self.pending = None
+        indexer = NoteSearchIndexer(self.db_path, self.root, upserts, removed, keep)
+        indexer.indexed.connect(lambda added, deleted: self.on_indexed(indexer, added, deleted))
+        self.indexer = indexer
+        indexer.start()
+
+    def on_indexed(self, indexer, added, deleted):
+        indexer.wait()
+        if indexer is not self.indexer:  # 已切换目录
+            return
+        self.updated.emit(added, deleted)
+        if self.pending is not None:
+            self.start_indexer()
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """返回 [(绝对路径, 行号, 预览)]，最相关的笔记在前，每个笔记列出最相关的几行；只有文件名命中时行号为 0
+
+        和知识库搜索一样，先取文件名命中的笔记，再对全部命中的笔记按 BM25 排序；
+        只为最终返回的笔记读出正文查找命中行。
+        """
+        query = build_query(text)
+        if not query or self.conn is None:
+            return []
+        try:
+            name_hits = self.conn.execute(
+                "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts, ?, 1.0) LIMIT ?",
+                (f"name : ({query})", NAME_WEIGHT, limit)
+            ).fetchall()
+            body_hits = self.conn.execute(
+                "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts, ?, 1.0) LIMIT ?",
+                (query, NAME_WEIGHT, limit)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logging.warning(f"搜索笔记失败: {query}, 错误: {e}")
+            return []
+        note_ids = list(dict.fromkeys(note_id for note_id, in name_hits + body_hits))[:limit]
+        terms = QUERY_PATTERN.findall(text)
+        results = []
+        for note_id in note_ids:
+            row = self.conn.execute(
+                "SELECT notes.path, notes_fts.body FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid "
+                "WHERE notes_fts.rowid = ?", (note_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            path, body = row
+            lines = matching_lines(body, terms) or [(0, make_snippet(body, []))]
+            results.extend((os.path.join(self.root, *path.split("/")), line_number, preview)
+                           for line_number, preview in lines)
+        return results
+
+    def close(self):
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+            self.indexer = None
+        self.pending = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
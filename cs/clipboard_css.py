@@ -1,25 +1,28 @@
 # clipboard_css.py
 
 # 样式常量
-DEFAULT_FRAME_STYLE = """
-    QFrame {
-        background-color: #FFFFFF;
-        border-radius: 15px;
-        padding: 10px;
-        border: 2px solid transparent;
-        margin: 10px;  /* 控制框架与其他元素的间距 */
-    }
-"""
-HIGHLIGHTED_FRAME_STYLE = """
-    QFrame {
-        background-color: #E6F7FF;
-        border-radius: 15px;
-        padding: 10px;
-        border: 2px solid #1890FF;
-        margin: 10px;
+SCROLL_AREA_STYLE = "background-color: #F0F2F5; padding: 10px; margin: 0px;"
+SEARCH_BOX_STYLE = """
+    QLineEdit {
+        background: white;
+        border: 1px solid #D6D6D6;
+        border-radius: 10px;
+        padding: 5px 10px;
+        margin: 10px 10px 0px 10px;
+        font-size: 14px;
     }
 """
-LABEL_STYLE = "border: none; padding: 5px; margin: 5px;"  # 设置标签的内外边距
-TIME_LABEL_STYLE = "color: #8C8C8C; border: none; padding: 0px; margin: 5px;"
-FOOTER_STYLE = "background-color: #1890FF; border-radius: 0px 0px 10px 10px; border: none; padding: 2px;"
-SCROLL_AREA_STYLE = "background-color: #F0F2F5; padding: 10px; margin: 0px;"
+
+# 委托绘制卡片使用的颜色与尺寸（与原 QFrame 样式保持一致）
+CARD_SIZE = 388  # 卡片宽高
+CARD_MARGIN = 10  # 卡片与其他元素的间距
+CARD_PADDING = 10  # 卡片内边距
+CARD_RADIUS = 15  # 卡片圆角
+CARD_BACKGROUND = "#FFFFFF"
+CARD_HIGHLIGHT_BACKGROUND = "#E6F7FF"
+CARD_HIGHLIGHT_BORDER = "#1890FF"
+TIME_COLOR = "#8C8C8C"
+CONTENT_COLOR = "#000000"
+SEPARATOR_COLOR = "#E8E8E8"
+FOOTER_COLOR = "#1890FF"
+FOOTER_HEIGHT = 5
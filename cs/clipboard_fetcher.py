@@ -0,0 +1,189 @@
+# clipboard_fetcher.py
+import os
+import json
+import hashlib
+import mimetypes
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+FETCH_TIMEOUT = (3, 10)  # 连接超时、读取超时（秒）
+MAX_IMAGE_BYTES = 20 * 1024 * 1024  # 单个图片的下载上限
+POOL_SIZE = 4  # 连接池大小，与捕获线程数一致
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 16  # 判断图片格式所需的文件头长度
+IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",
+    b"GIF87a",
+    b"GIF89a",
+    b"BM",
+    b"\x00\x00\x01\x00",  # ICO
+)
+
+
+def looks_like_image(head):
+    """根据文件头判断是否为常见图片格式；只用于没有声明图片类型的响应"""
+    if head.startswith(IMAGE_SIGNATURES):
+        return True
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+def media_type(response):
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+class FetchTooLarge(Exception):
+    """下载内容超过大小上限"""
+
+
+class UrlCache:
+    """按 URL 哈希保存下载内容和 ETag / Last-Modified 等元数据的磁盘缓存"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def meta_path(self, url):
+        return os.path.join(self.folder, f"{self.key(url)}.json")
+
+    def data_path(self, url, content_type):
+        extension = mimetypes.guess_extension(content_type) or ".img"
+        return os.path.join(self.folder, f"{self.key(url)}{extension}")
+
+    def load(self, url):
+        """读取缓存元数据，对应的数据文件不存在时视为没有缓存"""
+        try:
+            with open(self.meta_path(url), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(meta.get("path", "")) else None
+
+    def save(self, url, meta):
+        temp_path = self.meta_path(url) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self.meta_path(url))
+
+
+class ImageFetcher:
+    """下载剪贴板中复制的图片链接
+
+    - 共享连接池的 requests.Session，每个请求都有超时
+    - 首次下载前先用 HEAD（必要时用 Range 取文件头）判断是否为图片、大小是否超限
+    - 边下载边写入按 URL 区分的缓存文件，超过上限立即中止
+    - 已缓存的 URL 使用 If-None-Match / If-Modified-Since 重新验证，未修改时不再下载
+    """
+
+    def __init__(self, cache_folder, max_bytes=MAX_IMAGE_BYTES, session=None):
+        self.cache = UrlCache(cache_folder)
+        self.max_bytes = max_bytes
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, url):
+        """同一个 URL 同时只下载一次"""
+        with self._locks_guard:
+            return self._locks.setdefault(self.cache.key(url), threading.Lock())
+
+    def fetch(self, url):
+        """返回图片在缓存中的路径；不是图片、超过上限或下载失败时返回 None"""
+        with self._lock(url):
+            try:
+                return self._fetch(url)
+            except FetchTooLarge:
+                print("图片超过大小上限，已忽略:", url)
+            except Exception as e:
+                print("下载图片失败:", e)
+            return None
+
+    def _fetch(self, url):
+        meta = self.cache.load(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        elif not self.probe(url):
+            return None
+
+        with self.session.get(url, headers=headers, stream=True, timeout=FETCH_TIMEOUT) as response:
+            if response.status_code == 304 and meta:
+                return meta["path"]
+            if response.status_code != 200:
+                return None
+            content_type = media_type(response)
+            if content_type and not content_type.startswith("image/") and content_type != "application/octet-stream":
+                return None
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise FetchTooLarge(url)
+            path = self.cache.data_path(url, content_type or "application/octet-stream")
+            # 声明了 image/* 时相信服务器（SVG、TIFF、AVIF 等没有列在文件头里的格式），能否解码由调用方决定
+            if not self.write_stream(response, path, sniff=not content_type.startswith("image/")):
+                return None
+            if meta and meta["path"] != path and os.path.exists(meta["path"]):  # 内容类型变化后旧文件不再使用
+                os.remove(meta["path"])
+            self.cache.save(url, {
+                "path": path,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": content_type,
+            })
+            return path
+
+    def probe(self, url):
+        """下载前判断链接是否指向大小合适的图片"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=FETCH_TIMEOUT)
+        except requests.RequestException:
+            return True  # HEAD 不可用时交给 GET 再判断
+        if response.status_code >= 400 and response.status_code not in (403, 405, 501):
+            return False
+        length = response.headers.get("Content-Length")
+        if response.ok and length and length.isdigit() and int(length) > self.max_bytes:
+            return False
+        content_type = media_type(response) if response.ok else ""
+        if content_type.startswith("image/"):
+            return True
+        if content_type and content_type != "application/octet-stream":
+            return False
+        # 类型未知时只取文件头判断
+        headers = {"Range": f"bytes=0-{SNIFF_BYTES - 1}"}
+        with self.session.get(url, headers=headers, stream=True, timeout=FETCH_TIMEOUT) as response:
+            if response.status_code not in (200, 206):
+                return False
+            head = response.raw.read(SNIFF_BYTES, decode_content=True)
+        return looks_like_image(head)
+
+    def write_stream(self, response, path, sniff=True):
+        """流式写入临时文件，超过上限时中止；sniff 为真时文件头不是图片就丢弃，完成后原子替换"""
+        temp_path = path + ".part"
+        size = 0
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if size == 0 and sniff and not looks_like_image(chunk[:SNIFF_BYTES]):
+                        return False
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise FetchTooLarge(response.url)
+                    f.write(chunk)
+            if size == 0:
+                return False
+            os.replace(temp_path, path)
+            return True
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
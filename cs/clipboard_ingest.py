@@ -0,0 +1,146 @@
+# clipboard_ingest.py
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage
+from urllib.parse import unquote
+import os
+import re
+import base64
+import mimetypes
+
+from clipboard_thumbnails import make_thumbnails
+from clipboard_store import content_fingerprint
+
+INGEST_THREADS = 4  # 解码、下载、生成缩略图的线程数
+INLINE_TEXT_LIMIT = 64 * 1024  # 不超过此长度的普通文本直接在 GUI 线程处理
+BASE64_PATTERN = re.compile(r"^data:image/([a-zA-Z]*);base64,([^\"]*)$")
+URL_PATTERN = re.compile(r"^https?://\S+$")  # 单独一行的链接才尝试下载
+
+
+def text_capture(text):
+    return {"content": text, "file_type": "text", "display_name": None,
+            "fingerprint": content_fingerprint(text, "text")}
+
+
+def image_capture(image):
+    """图片捕获：在后台线程计算指纹并生成各尺寸缩略图（只使用线程安全的 QImage）"""
+    if image.isNull():
+        return None
+    return {"content": image, "file_type": "image", "display_name": None,
+            "fingerprint": content_fingerprint(image, "image"),
+            "thumbnails": make_thumbnails(image)}
+
+
+def decode_data_uri(text):
+    """data:image/...;base64,... 形式的文本，解码失败时按普通文本处理"""
+    match = BASE64_PATTERN.match(text)
+    if match:
+        try:
+            image_bytes = base64.b64decode(match.group(2))
+        except ValueError:
+            image_bytes = b""
+        image = QImage()
+        if image.loadFromData(image_bytes):
+            return image_capture(image)
+    return text_capture(text)
+
+
+def load_file_url(text):
+    """file:/// 链接：图片读取为图片，其余按文件记录"""
+    local_path = unquote(text[8:])
+    file_type, _ = mimetypes.guess_type(local_path)
+    if not file_type:
+        return None
+    if file_type.startswith("image"):
+        return image_capture(QImage(local_path))
+    file_type = file_type.split('/')[0]
+    return {"content": local_path, "file_type": file_type, "display_name": os.path.basename(local_path),
+            "fingerprint": content_fingerprint(local_path, file_type)}
+
+
+class IngestSignals(QObject):
+    finished = Signal(int, object)  # 信号：任务完成（序号，捕获结果或 None）
+
+
+class IngestTask(QRunnable):
+    """在线程池中执行的单个捕获任务"""
+
+    def __init__(self, sequence, handler, payload, signals):
+        super().__init__()
+        self.sequence = sequence
+        self.handler = handler
+        self.payload = payload
+        self.signals = signals
+
+    def run(self):
+        try:
+            capture = self.handler(self.payload)
+        except Exception as e:
+            print("处理剪贴板内容失败:", e)
+            capture = None
+        self.signals.finished.emit(self.sequence, capture)
+
+
+class ClipboardIngestPipeline(QObject):
+    """剪贴板捕获流水线
+
+    GUI 线程只按前缀和长度做廉价分类，解码、下载、哈希和缩略图交给线程池；
+    每个捕获按到达顺序编号，结果按编号依次发出，后台任务再慢也不会丢失或乱序。
+    """
+    captured = Signal(object)  # 信号：按捕获顺序发出处理完成的结果
+
+    def __init__(self, fetcher, parent=None):
+        super().__init__(parent)
+        self.fetcher = fetcher
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(INGEST_THREADS)
+        self.signals = IngestSignals(self)
+        self.signals.finished.connect(self.complete)
+        self._next_sequence = 0
+        self._next_commit = 0
+        self._pending = {}
+
+    def classify(self, mime_data, clipboard):
+        """GUI 线程上的分类，只看前缀和长度"""
+        if mime_data.hasText():
+            text = mime_data.text()
+            if text.startswith("data:image/"):
+                self.submit(decode_data_uri, text)
+            elif text.startswith("file:///"):
+                self.submit(load_file_url, text)
+            elif URL_PATTERN.match(text):
+                self.submit(self.load_http_url, text)
+            elif len(text) > INLINE_TEXT_LIMIT:
+                self.submit(text_capture, text)
+            else:
+                self.complete(self._take_sequence(), text_capture(text))
+        elif mime_data.hasImage():
+            self.submit(image_capture, clipboard.image())
+
+    def load_http_url(self, url):
+        """http 链接：指向图片时下载为图片，否则按普通文本记录链接"""
+        image_path = self.fetcher.fetch(url)
+        if image_path:
+            capture = image_capture(QImage(image_path))
+            if capture is not None:
+                return capture
+        return text_capture(url)
+
+    def submit(self, handler, payload):
+        self.pool.start(IngestTask(self._take_sequence(), handler, payload, self.signals))
+
+    def _take_sequence(self):
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        return sequence
+
+    def complete(self, sequence, capture):
+        """收集完成的结果，按序号依次发出"""
+        self._pending[sequence] = capture
+        while self._next_commit in self._pending:
+            capture = self._pending.pop(self._next_commit)
+            self._next_commit += 1
+            if capture is not None:
+                self.captured.emit(capture)
+
+    def wait(self):
+        self.pool.waitForDone()
@@ -1,157 +1,51 @@
-from PySide6.QtCore import Qt, QUrl, QMimeData, QPoint, QByteArray, QBuffer, QIODevice
-from PySide6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QScrollArea, QFrame, QLabel, QHBoxLayout
-)
-from PySide6.QtGui import QFont, QPixmap, QIcon, QDrag
-from urllib.parse import unquote
-from datetime import datetime
+from PySide6.QtCore import Qt, QUrl, QMimeData, QPoint, QTimer, QByteArray
+from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLineEdit
+from PySide6.QtGui import QPixmap, QImage
 import os
-import requests
-from tempfile import gettempdir
-import mimetypes
-import base64
-import re
+import uuid
 
 # 从 clipboard_css.py 导入样式常量
-from clipboard_css import (
-    DEFAULT_FRAME_STYLE,
-    HIGHLIGHTED_FRAME_STYLE,
-    LABEL_STYLE,
-    TIME_LABEL_STYLE,
-    FOOTER_STYLE,
-    SCROLL_AREA_STYLE
+from clipboard_css import SCROLL_AREA_STYLE, SEARCH_BOX_STYLE
+from clipboard_model import (
+    ENTRY_ROLE,
+    ClipboardHistoryModel,
+    ClipboardItemDelegate,
+    ClipboardListView
 )
+from clipboard_store import ClipboardStore, content_fingerprint
+from clipboard_ingest import ClipboardIngestPipeline
+from clipboard_fetcher import ImageFetcher
+from clipboard_thumbnails import ThumbnailCache
+from clipboard_memory import DecodedImageCache, DECODED_IMAGE_BUDGET
 
-
-class ClipboardItem(QFrame):
-    def __init__(self, content, timestamp, clipboard_window, file_type=None, display_name=None):
-        super().__init__()
-        self.content = content
-        self.clipboard_window = clipboard_window
-        self.file_type = file_type
-        self.display_name = display_name or content
-        self.setFixedSize(388, 388)
-        self.setStyleSheet(DEFAULT_FRAME_STYLE)  # 设置样式表
-        self.init_ui(timestamp)
-
-    def init_ui(self, timestamp):
-        # 主布局
-        main_layout = QVBoxLayout(self)
-
-        # 头部布局
-        header_layout = QHBoxLayout()
-
-        # 图标
-        icon_label = QLabel()
-        icon_label.setPixmap(QIcon("icon.png").pixmap(24, 24))
-        icon_label.setStyleSheet(LABEL_STYLE)
-        header_layout.addWidget(icon_label)
-
-        # 时间标签
-        time_label = QLabel(timestamp)
-        time_label.setFont(QFont("Arial", 8))
-        time_label.setStyleSheet(TIME_LABEL_STYLE)
-        header_layout.addWidget(time_label)
-        header_layout.addStretch()
-        main_layout.addLayout(header_layout)
-
-        # 分隔线
-        separator = QLabel()
-        separator.setFixedHeight(1)
-        separator.setStyleSheet("background-color: #E8E8E8;")
-        main_layout.addWidget(separator)
-
-        # 内容显示
-        self.label = QLabel()
-        self.label.setAlignment(Qt.AlignCenter)
-        self.label.setWordWrap(True)
-        self.label.setStyleSheet(LABEL_STYLE + "font-size: 14px;")
-        self.display_content()
-        main_layout.addWidget(self.label, alignment=Qt.AlignCenter)
-
-        # 底部
-        footer = QWidget()
-        footer.setFixedHeight(5)
-        footer.setStyleSheet(FOOTER_STYLE)
-        main_layout.addWidget(footer)
-
-    def display_content(self):
-        if self.file_type == "image":
-            self.label.setPixmap(self.content.scaled(350, 250, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        elif self.file_type == "text":
-            self.label.setText(self.content)
-        else:
-            self.label.setText(f"{self.file_type.capitalize()} 文件: {self.display_name}")
-
-    def copy_to_clipboard(self):
-        clipboard = QApplication.clipboard()
-        if self.file_type == "image":
-            image = self.content.toImage()
-            clipboard.setImage(image)
-        elif self.file_type == "text":
-            clipboard.setText(self.content)
-        else:
-            mime_data = QMimeData()
-            mime_data.setUrls([QUrl.fromLocalFile(self.content)])
-            clipboard.setMimeData(mime_data)
-        self.clipboard_window.block_add = True
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.drag_start_position = event.pos()
-        self.clipboard_window.clear_selection()
-        self.setStyleSheet(HIGHLIGHTED_FRAME_STYLE)
-        super().mousePressEvent(event)
-
-    def mouseMoveEvent(self, event):
-        if not self.drag_start_position:
-            return
-        if (event.pos() - self.drag_start_position).manhattanLength() < QApplication.startDragDistance():
-            return
-        if self.file_type == "image":
-            drag = QDrag(self)
-            mime_data = QMimeData()
-
-            # 检查是否是 QPixmap 实例，如果是，则保存为临时文件
-            if isinstance(self.content, QPixmap):
-                temp_dir = gettempdir()
-                temp_file_path = os.path.join(temp_dir, "clipboard_image.png")
-                self.content.save(temp_file_path, "PNG")  # 将图片保存为 PNG 文件
-                mime_data.setUrls([QUrl.fromLocalFile(temp_file_path)])  # 设置文件路径
-
-            elif isinstance(self.content, str) and os.path.isfile(self.content):  # 如果是文件路径
-                mime_data.setUrls([QUrl.fromLocalFile(self.content)])  # 使用文件路径
-
-            drag.setMimeData(mime_data)
-
-            # 设置图标，用于拖拽效果
-            if isinstance(self.content, QPixmap):
-                pixmap = self.content.scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            else:
-                pixmap = QPixmap(self.content).scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-
-            drag.setPixmap(pixmap)
-            drag.exec(Qt.CopyAction)
-        super().mouseMoveEvent(event)
-
-    def mouseDoubleClickEvent(self, event):
-        # 双击复制内容
-        self.copy_to_clipboard()
-        super().mouseDoubleClickEvent(event)
+CHANGE_DEBOUNCE_MS = 80  # 一次复制触发的多次 dataChanged 合并为一次捕获
+SELF_COPY_FORMAT = "application/x-clipboard-history-token"  # 本程序写入剪贴板时附带的标记格式
 
 
 class ClipboardWindow(QWidget):
-    def __init__(self):
+    def __init__(self, store=None, image_budget=DECODED_IMAGE_BUDGET):
         super().__init__()
         self.setWindowTitle("剪贴板内容")
         self.resize(420, 800)
-        self.block_add = False
+        self.self_copy_token = None  # 最近一次由本程序写入剪贴板的标记
+        self.change_events = 0  # 收到的 dataChanged 次数
+        self.captures = 0  # 合并后实际处理的捕获次数
+        self.store = store or ClipboardStore()  # 历史记录的磁盘存储
+        self.image_cache = DecodedImageCache(image_budget, self)  # 解码图片的内存预算，decoded_bytes 为当前占用
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.Tool)
         self.init_ui()
 
+        # 捕获流水线：解码、下载、缩略图在线程池中完成，结果按捕获顺序回到 GUI 线程
+        self.ingest = ClipboardIngestPipeline(ImageFetcher(os.path.join(self.store.folder, "url_cache")), self)
+        self.ingest.captured.connect(self.add_capture)
+
         # 监听剪贴板
         self.clipboard = QApplication.clipboard()
         self.clipboard.dataChanged.connect(self.update_clipboard_content)
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+        self.change_timer.timeout.connect(self.capture_clipboard)
 
         # 将窗口移动到右侧
         self.move_to_right()
@@ -162,93 +56,100 @@ class ClipboardWindow(QWidget):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
 
-        # 滚动区域
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        scroll_area.setStyleSheet(SCROLL_AREA_STYLE)
-
-        # 滚动内容
-        self.scroll_content = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)
-        self.scroll_layout.setSpacing(15)
-        self.scroll_layout.setContentsMargins(10, 10, 10, 10)
-        scroll_area.setWidget(self.scroll_content)
-        main_layout.addWidget(scroll_area)
+        # 搜索框：输入时即时过滤历史记录
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("搜索剪贴板历史...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setStyleSheet(SEARCH_BOX_STYLE)
+        self.search_box.textChanged.connect(self.on_search)
+        main_layout.addWidget(self.search_box)
+
+        # 历史记录：模型 + 委托，控件数量与历史长度无关
+        self.thumbnail_cache = ThumbnailCache(os.path.join(self.store.folder, "thumbnails"), self)
+        self.history_model = ClipboardHistoryModel(self.store, self.thumbnail_cache, self.image_cache, self)
+        self.history_model.fetchMore()  # 启动时只读取最新的一页
+        self.history_view = ClipboardListView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setItemDelegate(ClipboardItemDelegate(self.history_view))
+        self.history_view.setStyleSheet(SCROLL_AREA_STYLE)
+        self.history_view.doubleClicked.connect(self.copy_to_clipboard)  # 双击复制内容
+        main_layout.addWidget(self.history_view)
 
     def add_clipboard_item(self, content, file_type=None, display_name=None):
-        if self.block_add:
-            self.block_add = False
+        """直接添加一条记录（不经过后台流水线）"""
+        self.add_capture({"content": content, "file_type": file_type, "display_name": display_name,
+                          "fingerprint": content_fingerprint(content, file_type)})
+
+    def add_capture(self, capture):
+        """流水线处理完成的捕获结果，按指纹去重后加入历史"""
+        content = capture["content"]
+        image = None
+        if isinstance(content, QImage):
+            image = content
+            content = QPixmap.fromImage(image)
+        entry = self.history_model.add_or_touch(content, capture["file_type"], capture["display_name"],
+                                                capture["fingerprint"])
+        if entry is None:
             return
-        timestamp = datetime.now().strftime("%H:%M")
-        item = ClipboardItem(content, timestamp, self, file_type=file_type, display_name=display_name)
-        self.scroll_layout.addWidget(item)
+        if capture.get("thumbnails"):
+            self.history_model.cache_thumbnails(entry, capture["thumbnails"])
+            self.thumbnail_cache.save(entry.cache_key, capture["thumbnails"])
+        self.store.save(entry, image)
+        if self.history_model.searching:
+            self.on_search(self.search_box.text())
+
+    def on_search(self, text):
+        """按索引搜索历史，清空搜索框时恢复完整历史"""
+        query = text.strip()
+        if query:
+            self.history_model.show_search_results(self.store.search.search(query))
+        else:
+            self.history_model.clear_search()
 
-    def clear_selection(self):
-        for i in range(self.scroll_layout.count()):
-            widget = self.scroll_layout.itemAt(i).widget()
-            widget.setStyleSheet(DEFAULT_FRAME_STYLE)
+    def copy_to_clipboard(self, index):
+        entry = index.data(ENTRY_ROLE)
+        if entry is None:
+            return
+        content = self.history_model.load_content(entry)
+        if content is None:
+            return
+        mime_data = QMimeData()
+        if entry.file_type == "image":
+            mime_data.setImageData(content.toImage())
+        elif entry.file_type == "text":
+            mime_data.setText(content)
+        else:
+            mime_data.setUrls([QUrl.fromLocalFile(content)])
+        # 附带标记：只要剪贴板里还是这份数据，无论触发多少次 dataChanged 都不会再次捕获
+        self.self_copy_token = uuid.uuid4().hex.encode("ascii")
+        mime_data.setData(SELF_COPY_FORMAT, QByteArray(self.self_copy_token))
+        self.clipboard.setMimeData(mime_data)
 
-    def update_clipboard_content(self):
-        mime_data = self.clipboard.mimeData()
-        if mime_data.hasText():
-            text = mime_data.text()
-            if self.handle_base64_image(text):
-                return
-            elif text.startswith("file:///"):
-                self.handle_file_url(text)
-            elif text.startswith("http"):
-                self.handle_http_url(text)
-            else:
-                self.add_clipboard_item(text, "text")
-        elif mime_data.hasImage():
-            image = self.clipboard.image()
-            pixmap = QPixmap.fromImage(image)
-            self.add_clipboard_item(pixmap, "image")
+    def clear_selection(self):
+        self.history_view.clearSelection()
 
-    def handle_base64_image(self, text):
-        base64_pattern = r"^data:image/([a-zA-Z]*);base64,([^\"]*)$"
-        match = re.match(base64_pattern, text)
-        if match:
-            image_data = match.group(2)
-            image_bytes = base64.b64decode(image_data)
-            pixmap = QPixmap()
-            if pixmap.loadFromData(image_bytes):
-                self.add_clipboard_item(pixmap, "image")
-                return True
-        return False
+    def cleanup(self):
+        """退出前等待正在处理的捕获和历史记录写入完成"""
+        self.ingest.wait()
+        self.thumbnail_cache.wait()
+        self.store.close()
 
-    def handle_file_url(self, text):
-        local_path = unquote(text[8:])
-        file_type, _ = mimetypes.guess_type(local_path)
-        if file_type:
-            if file_type.startswith("image"):
-                pixmap = QPixmap(local_path)
-                if not pixmap.isNull():
-                    self.add_clipboard_item(pixmap, "image")
-            else:
-                display_name = os.path.basename(local_path)
-                self.add_clipboard_item(local_path, file_type.split('/')[0], display_name)
+    def update_clipboard_content(self):
+        """剪贴板变化后等待一小段时间，同一次复制的多次通知只处理最后一次"""
+        self.change_events += 1
+        self.change_timer.start()
 
-    def handle_http_url(self, url):
-        image_path = self.download_image(url)
-        if image_path:
-            pixmap = QPixmap(image_path)
-            self.add_clipboard_item(pixmap, "image")
+    def is_self_copy(self, mime_data):
+        if self.self_copy_token is None or not mime_data.hasFormat(SELF_COPY_FORMAT):
+            return False
+        return mime_data.data(SELF_COPY_FORMAT).data() == self.self_copy_token
 
-    def download_image(self, url):
-        try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                temp_dir = gettempdir()
-                file_extension = os.path.splitext(url)[1] or ".jpg"
-                file_path = os.path.join(temp_dir, f"clipboard_image{file_extension}")
-                with open(file_path, "wb") as f:
-                    f.write(response.content)
-                return file_path
-        except Exception as e:
-            print("下载图片失败:", e)
-        return None
+    def capture_clipboard(self):
+        mime_data = self.clipboard.mimeData()
+        if mime_data is None or self.is_self_copy(mime_data):
+            return
+        self.captures += 1
+        self.ingest.classify(mime_data, self.clipboard)
 
     def move_to_right(self):
         screen = QApplication.primaryScreen()
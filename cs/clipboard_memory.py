@@ -0,0 +1,84 @@
+# clipboard_memory.py
+from PySide6.QtCore import QObject, Signal
+from collections import OrderedDict
+
+DECODED_IMAGE_BUDGET = 256 * 1024 * 1024  # 内存中解码图片（原图和缩略图）的总字节上限
+
+
+def pixmap_bytes(pixmap):
+    """QPixmap 解码后占用的字节数"""
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class DecodedImageCache(QObject):
+    """按字节预算保存解码后的 QPixmap，超出预算时淘汰最久未查看的图片
+
+    键为 (内容哈希, 尺寸名)，原图使用尺寸名 "full"。超出预算时先淘汰原图，原图都淘汰后
+    才淘汰缩略图，避免可见卡片的缩略图被大图挤出去反复读盘。被淘汰的图片在磁盘上仍有
+    编码后的 blob 和缩略图，下次需要时重新解码。
+    """
+    usage_changed = Signal(int)  # 信号：当前解码图片占用的字节数
+
+    def __init__(self, budget=DECODED_IMAGE_BUDGET, parent=None):
+        super().__init__(parent)
+        self.budget = budget
+        self.decoded_bytes = 0
+        self.evictions = 0
+        # 键 -> (QPixmap, 字节数)，最近使用的在末尾
+        self._full = OrderedDict()
+        self._thumbnails = OrderedDict()
+
+    def _bucket(self, key):
+        return self._full if key[1] == "full" else self._thumbnails
+
+    def __len__(self):
+        return len(self._full) + len(self._thumbnails)
+
+    def __contains__(self, key):
+        return key in self._bucket(key)
+
+    def get(self, key):
+        """取出图片并标记为最近使用，不存在时返回 None"""
+        bucket = self._bucket(key)
+        item = bucket.get(key)
+        if item is None:
+            return None
+        bucket.move_to_end(key)
+        return item[0]
+
+    def touch(self, key):
+        """只标记为最近使用"""
+        bucket = self._bucket(key)
+        if key in bucket:
+            bucket.move_to_end(key)
+
+    def put(self, key, pixmap):
+        bucket = self._bucket(key)
+        old = bucket.pop(key, None)
+        if old is not None:
+            self.decoded_bytes -= old[1]
+        size = pixmap_bytes(pixmap)
+        bucket[key] = (pixmap, size)
+        self.decoded_bytes += size
+        self._evict(key)
+        self.usage_changed.emit(self.decoded_bytes)
+        return pixmap
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self._evict()
+        self.usage_changed.emit(self.decoded_bytes)
+
+    def _evict(self, keep=None):
+        # 刚放入的图片即使单独超出预算也保留，保证当前复制、绘制的图片可用
+        for bucket in (self._full, self._thumbnails):
+            while self.decoded_bytes > self.budget and bucket:
+                key = next(iter(bucket))
+                if key == keep:
+                    if len(bucket) == 1:
+                        break
+                    bucket.move_to_end(key)
+                    continue
+                _, size = bucket.pop(key)
+                self.decoded_bytes -= size
+                self.evictions += 1
@@ -0,0 +1,426 @@
+# clipboard_model.py
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QMimeData, QUrl, QSize, QRect
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PySide6.QtGui import QPixmap, QIcon, QFont, QColor, QPen, QPainter, QDrag
+from tempfile import gettempdir
+from datetime import datetime, date
+import os
+
+from clipboard_css import (
+    CARD_SIZE,
+    CARD_MARGIN,
+    CARD_PADDING,
+    CARD_RADIUS,
+    CARD_BACKGROUND,
+    CARD_HIGHLIGHT_BACKGROUND,
+    CARD_HIGHLIGHT_BORDER,
+    TIME_COLOR,
+    CONTENT_COLOR,
+    SEPARATOR_COLOR,
+    FOOTER_COLOR,
+    FOOTER_HEIGHT
+)
+from clipboard_thumbnails import scale_image
+
+ENTRY_ROLE = Qt.UserRole + 1  # 取出 ClipboardEntry 对象的角色
+THUMBNAIL_ROLE = Qt.UserRole + 2  # 卡片中显示的缩略图
+DRAG_PIXMAP_ROLE = Qt.UserRole + 3  # 拖拽时的图标
+PREVIEW_CHARS = 1000  # 卡片最多绘制的文本字符数，超出部分本来也显示不下
+
+
+def format_timestamp(created):
+    """卡片上显示的时间，非当天的记录带上日期"""
+    moment = datetime.fromtimestamp(created)
+    if moment.date() == date.today():
+        return moment.strftime("%H:%M")
+    return moment.strftime("%m-%d %H:%M")
+
+
+class ClipboardEntry:
+    """一条剪贴板记录，只保存数据，不创建任何控件
+
+    content 为内存中的完整内容（图片为 QPixmap，文本为字符串，文件为路径），
+    落盘后图片和长文本会释放 content：图片的原图和缩略图交给 DecodedImageCache 按预算保存，
+    长文本需要时通过 ClipboardStore.load_content 读取。
+    """
+
+    def __init__(self, entry_id, created, file_type, content=None, display_name=None, blob_path=None,
+                 preview=None, fingerprint=None):
+        self.entry_id = entry_id
+        self.set_created(created)
+        self.file_type = file_type
+        self.fingerprint = fingerprint
+        self.content = content
+        self.display_name = display_name
+        self.blob_path = blob_path
+        self.drag_path = None  # 未落盘图片拖拽时使用的临时 PNG，只写一次
+        self._preview = preview
+
+    def set_created(self, created):
+        self.created = created
+        self.timestamp = format_timestamp(created)
+
+    @property
+    def cache_key(self):
+        """缩略图缓存使用的内容哈希，旧记录没有指纹时使用 blob 文件名"""
+        if self.fingerprint:
+            return self.fingerprint
+        if self.blob_path:
+            return os.path.splitext(os.path.basename(self.blob_path))[0]
+        return None
+
+    def preview_text(self):
+        """卡片中显示的文字"""
+        if self._preview is None:
+            if self.file_type == "text":
+                self._preview = (self.content or "")[:PREVIEW_CHARS]
+            else:
+                self._preview = f"{self.file_type.capitalize()} 文件: {self.display_name or self.content}"
+        return self._preview
+
+    def release_content(self, blob_path):
+        """记录落盘后释放大块内容：图片只保留 blob 路径，长文本只保留预览"""
+        if blob_path:
+            self.blob_path = blob_path
+        if self.file_type == "image" and self.blob_path:
+            self.content = None
+        elif self.file_type == "text" and len(self.content or "") > PREVIEW_CHARS:
+            self.preview_text()
+            self.content = None
+
+
+class ClipboardHistoryModel(QAbstractListModel):
+    """剪贴板历史列表模型，最新的记录在最前面；更早的记录在滚动到底部时分页读取
+
+    history 为已读入内存的历史记录，entries 为当前显示的行：平时两者是同一个列表，
+    搜索时 entries 为搜索结果。
+    """
+    dedupe_hit = Signal(int)  # 信号：重复捕获被合并（累计命中次数）
+
+    def __init__(self, store, thumbnail_cache, image_cache, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.thumbnail_cache = thumbnail_cache
+        self.image_cache = image_cache
+        self.thumbnail_cache.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.history = []
+        self.entries = self.history
+        self.searching = False
+        self._by_id = {}
+        self._by_fingerprint = {}  # 指纹 -> 已读入内存的记录
+        self._moved_ids = set()  # 从数据库中找到并置顶的记录的旧 id，分页时跳过
+        self._has_more = True
+        self.dedupe_hits = 0
+        self.store.entry_stored.connect(self.on_entry_stored)
+        self.store.entries_pruned.connect(self.on_entries_pruned)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == ENTRY_ROLE:
+            return entry
+        if role == Qt.DisplayRole:
+            return entry.preview_text() if entry.file_type != "image" else None
+        if role == THUMBNAIL_ROLE:
+            return self.thumbnail(entry, "card")
+        if role == DRAG_PIXMAP_ROLE:
+            return self.thumbnail(entry, "drag")
+        return None
+
+    def thumbnail(self, entry, size_name):
+        """依次查找内存、磁盘缓存；都没有时在后台生成，生成前返回 None"""
+        if entry.file_type != "image":
+            return None
+        key = entry.cache_key
+        if not key:
+            return QPixmap.fromImage(scale_image(entry.content.toImage(), size_name)) \
+                if isinstance(entry.content, QPixmap) else None
+        self.image_cache.touch((key, "full"))  # 卡片被查看时原图也算最近使用
+        pixmap = self.image_cache.get((key, size_name))
+        if pixmap is not None:
+            return pixmap
+        pixmap = self.thumbnail_cache.load(key, size_name)
+        if pixmap is not None:
+            return self.image_cache.put((key, size_name), pixmap)
+        source = entry.content if isinstance(entry.content, QPixmap) else self.image_cache.get((key, "full"))
+        if source is not None:
+            self.thumbnail_cache.request(key, source.toImage())
+        elif entry.blob_path:
+            self.thumbnail_cache.request(key, entry.blob_path)
+        return None
+
+    def cache_thumbnails(self, entry, thumbnails):
+        """放入后台生成的缩略图（尺寸名 -> QImage）"""
+        for size_name, image in thumbnails.items():
+            self.image_cache.put((entry.cache_key, size_name), QPixmap.fromImage(image))
+
+    def load_content(self, entry):
+        """复制时取得完整内容，被淘汰的原图从 blob 重新解码"""
+        if entry.file_type != "image" or isinstance(entry.content, QPixmap) or not entry.cache_key:
+            return self.store.load_content(entry)
+        pixmap = self.image_cache.get((entry.cache_key, "full"))
+        if pixmap is None:
+            pixmap = self.store.load_content(entry)
+            if pixmap is None or pixmap.isNull():
+                return None
+            self.image_cache.put((entry.cache_key, "full"), pixmap)
+        return pixmap
+
+    def on_thumbnail_ready(self, key, thumbnails):
+        cached = False
+        for row, entry in enumerate(self.entries):
+            if entry.file_type == "image" and entry.cache_key == key:
+                if not cached:
+                    self.cache_thumbnails(entry, thumbnails)
+                    cached = True
+                self.dataChanged.emit(self.index(row), self.index(row), [THUMBNAIL_ROLE])
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self.entries[index.row()].file_type == "image":
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+
+    def add_entry(self, entry):
+        """在顶部插入一条记录"""
+        self._index_entry(entry)
+        if self.searching:
+            self.history.insert(0, entry)
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.history.insert(0, entry)
+        self.endInsertRows()
+
+    def _move_to_front(self, entry):
+        row = self.history.index(entry)
+        if self.searching:
+            self.history.insert(0, self.history.pop(row))
+            return
+        if row != 0:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), 0)
+            self.history.insert(0, self.history.pop(row))
+            self.endMoveRows()
+        self.dataChanged.emit(self.index(0), self.index(0))  # 时间已更新
+
+    def _index_entry(self, entry):
+        self._by_id[entry.entry_id] = entry
+        if entry.fingerprint:
+            self._by_fingerprint[entry.fingerprint] = entry
+
+    def add_or_touch(self, content, file_type, display_name, fingerprint):
+        """按指纹去重：重复的内容把已有记录移到最前面，否则新建记录。返回新建的记录，重复时返回 None"""
+        entry = self._by_fingerprint.get(fingerprint)
+        if entry is None:
+            entry = self.store.find_fingerprint(fingerprint)
+            if entry is not None:  # 记录在数据库中但还没分页读入
+                self._moved_ids.add(self.store.touch(entry))
+                self.add_entry(entry)
+        else:
+            old_id = self.store.touch(entry)
+            del self._by_id[old_id]
+            self._by_id[entry.entry_id] = entry
+            self._move_to_front(entry)
+        if entry is not None:
+            self.dedupe_hits += 1
+            self.dedupe_hit.emit(self.dedupe_hits)
+            return None
+        entry = self.store.create_entry(content, file_type, display_name, fingerprint)
+        self.add_entry(entry)
+        return entry
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.searching and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        """从数据库读取下一页更早的记录"""
+        if parent.isValid() or self.searching:
+            return
+        before_id = self.history[-1].entry_id if self.history else None
+        page = []
+        while not page:
+            page = self.store.load_page(before_id)
+            if not page:
+                self._has_more = False
+                return
+            before_id = page[-1].entry_id
+            page = [entry for entry in page if entry.entry_id not in self._moved_ids]
+        first = len(self.history)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self.history.extend(page)
+        for entry in page:
+            self._index_entry(entry)
+        self.endInsertRows()
+
+    def show_search_results(self, entry_ids):
+        """显示搜索结果，已在内存中的记录直接复用，其余从数据库读取"""
+        missing = [entry_id for entry_id in entry_ids if entry_id not in self._by_id]
+        loaded = self.store.load_entries(missing) if missing else {}
+        results = []
+        for entry_id in entry_ids:
+            entry = self._by_id.get(entry_id) or loaded.get(entry_id)
+            if entry is not None:
+                results.append(entry)
+        self.beginResetModel()
+        self.searching = True
+        self.entries = results
+        self.endResetModel()
+
+    def clear_search(self):
+        if not self.searching:
+            return
+        self.beginResetModel()
+        self.searching = False
+        self.entries = self.history
+        self.endResetModel()
+
+    def on_entry_stored(self, entry_id, blob_path, fingerprint):
+        # 信号到达前记录可能已被置顶换了 id，此时按指纹找到它
+        entry = self._by_id.get(entry_id) or self._by_fingerprint.get(fingerprint)
+        if entry is None:
+            return
+        if entry.file_type == "image" and isinstance(entry.content, QPixmap) and entry.cache_key:
+            self.image_cache.put((entry.cache_key, "full"), entry.content)  # 原图交给缓存按预算淘汰
+        entry.release_content(blob_path)
+
+    def on_entries_pruned(self, cutoff_id):
+        """后台已删除 id 不大于 cutoff_id 的记录：移除这些行，之后再复制同样的内容时作为新记录保存"""
+        # history 按 id 从大到小排列，被删除的记录都在末尾
+        row = len(self.history)
+        while row and self.history[row - 1].entry_id <= cutoff_id:
+            row -= 1
+        if row == len(self.history):
+            return
+        for entry in self.history[row:]:
+            self._by_id.pop(entry.entry_id, None)
+            if self._by_fingerprint.get(entry.fingerprint) is entry:
+                del self._by_fingerprint[entry.fingerprint]
+        self._moved_ids = {entry_id for entry_id in self._moved_ids if entry_id > cutoff_id}
+        if self.searching:
+            del self.history[row:]
+            return
+        self.beginRemoveRows(QModelIndex(), row, len(self.history) - 1)
+        del self.history[row:]
+        self.endRemoveRows()
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        mime_data = QMimeData()
+        if not indexes:
+            return mime_data
+        entry = self.entries[indexes[0].row()]
+        if entry.file_type == "image" and entry.blob_path:  # 已落盘的图片直接使用 blob 文件
+            mime_data.setUrls([QUrl.fromLocalFile(entry.blob_path)])
+        # 尚未落盘的 QPixmap 保存为临时文件，同一条记录只编码一次
+        elif isinstance(entry.content, QPixmap):
+            if entry.drag_path is None or not os.path.exists(entry.drag_path):
+                name = f"clipboard_{entry.cache_key or entry.entry_id}.png"
+                entry.drag_path = os.path.join(gettempdir(), name)
+                entry.content.save(entry.drag_path, "PNG")
+            mime_data.setUrls([QUrl.fromLocalFile(entry.drag_path)])
+        elif isinstance(entry.content, str) and os.path.isfile(entry.content):  # 如果是文件路径
+            mime_data.setUrls([QUrl.fromLocalFile(entry.content)])
+        return mime_data
+
+
+class ClipboardItemDelegate(QStyledItemDelegate):
+    """直接绘制剪贴板卡片，只有可见行才会被绘制"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon_pixmap = QIcon("icon.png").pixmap(24, 24)
+        self.time_font = QFont("Arial", 8)
+        self.content_font = QFont()
+        self.content_font.setPixelSize(14)
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_SIZE, CARD_SIZE)
+
+    def paint(self, painter, option, index):
+        entry = index.data(ENTRY_ROLE)
+        if entry is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # 卡片背景，选中时高亮
+        card = option.rect.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(QPen(QColor(CARD_HIGHLIGHT_BORDER), 2))
+            painter.setBrush(QColor(CARD_HIGHLIGHT_BACKGROUND))
+        else:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(CARD_BACKGROUND))
+        painter.drawRoundedRect(card, CARD_RADIUS, CARD_RADIUS)
+        inner = card.adjusted(CARD_PADDING, CARD_PADDING, -CARD_PADDING, -CARD_PADDING)
+
+        # 头部：图标和时间
+        if not self.icon_pixmap.isNull():
+            painter.drawPixmap(inner.left(), inner.top(), self.icon_pixmap)
+        painter.setFont(self.time_font)
+        painter.setPen(QColor(TIME_COLOR))
+        painter.drawText(QRect(inner.left() + 34, inner.top(), inner.width() - 34, 24),
+                         Qt.AlignLeft | Qt.AlignVCenter, entry.timestamp)
+
+        # 分隔线
+        separator_y = inner.top() + 34
+        painter.fillRect(QRect(inner.left(), separator_y, inner.width(), 1), QColor(SEPARATOR_COLOR))
+
+        # 底部
+        footer = QRect(inner.left(), inner.bottom() - FOOTER_HEIGHT + 1, inner.width(), FOOTER_HEIGHT)
+        painter.fillRect(footer, QColor(FOOTER_COLOR))
+
+        # 内容显示
+        content_rect = QRect(inner.left(), separator_y + 6, inner.width(), footer.top() - separator_y - 12)
+        painter.setClipRect(content_rect)
+        if entry.file_type == "image":
+            thumbnail = index.data(THUMBNAIL_ROLE)  # 后台生成完成前不绘制
+            if thumbnail is not None:
+                x = content_rect.left() + (content_rect.width() - thumbnail.width()) // 2
+                y = content_rect.top() + (content_rect.height() - thumbnail.height()) // 2
+                painter.drawPixmap(x, y, thumbnail)
+        else:
+            painter.setFont(self.content_font)
+            painter.setPen(QColor(CONTENT_COLOR))
+            painter.drawText(content_rect, Qt.AlignCenter | Qt.TextWordWrap, entry.preview_text())
+        painter.restore()
+
+
+class ClipboardListView(QListView):
+    """剪贴板历史视图，所有卡片尺寸一致，滚动时只绘制可见部分"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)  # 分批布局，显示窗口时不必一次排完所有行
+        self.setBatchSize(100)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(20)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragOnly)
+
+    def startDrag(self, supported_actions):
+        """只拖拽图片，拖拽图标使用小尺寸缩略图"""
+        index = self.currentIndex()
+        if not index.isValid():
+            return
+        entry = index.data(ENTRY_ROLE)
+        if entry is None or entry.file_type != "image":
+            return
+        drag = QDrag(self)
+        drag.setMimeData(self.model().mimeData([index]))
+        pixmap = index.data(DRAG_PIXMAP_ROLE)
+        if pixmap is not None:
+            drag.setPixmap(pixmap)
+        drag.exec(Qt.CopyAction)
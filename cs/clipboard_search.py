@@ -0,0 +1,216 @@
+# clipboard_search.py
+from PySide6.QtCore import QObject, QThread, Signal
+from bisect import bisect_left, insort
+import heapq
+import sqlite3
+import re
+
+INDEX_CHARS = 1000  # 每条文本只索引前面这么多字符，与卡片预览长度一致
+SEARCH_LIMIT = 200  # 最多返回的结果数
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"  # 假名、汉字、谚文
+TOKEN_PATTERN = re.compile(f"[{CJK_RANGES}]+|[^\\W{CJK_RANGES}]+")
+CJK_PATTERN = re.compile(f"[{CJK_RANGES}]")
+
+
+def tokenize(text):
+    """分词：拉丁文字按单词切分；中日韩文字没有空格，按单字和相邻两字切分"""
+    tokens = set()
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if CJK_PATTERN.match(run):
+            tokens.update(run)
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.add(run)
+    return tokens
+
+
+def query_terms(query):
+    """把查询拆成 (词, 是否前缀匹配)：中日韩文字用两字词（单字时用单字），
+    拉丁单词在输入过程中按前缀匹配"""
+    terms = []
+    for run in TOKEN_PATTERN.findall(query.lower()):
+        if CJK_PATTERN.match(run):
+            if len(run) == 1:
+                terms.append((run, False))
+            else:
+                terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+        else:
+            terms.append((run, len(run) > 1))
+    return terms
+
+
+class SearchIndex:
+    """内存中的倒排索引
+
+    postings 为 词 -> 按 id 递增排列的记录 id 列表（新记录的 id 总是最大，直接追加），
+    查询时从最新的记录往回扫描最短的列表，凑够结果数即停止；
+    docs 为 id -> 该记录的词集合，用于校验其余查询词，并按 id 递增排列。
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.vocabulary = []  # 排好序的非中日韩词，用于前缀匹配
+
+    def add(self, entry_id, text):
+        self.remove(entry_id)
+        tokens = frozenset(tokenize(text[:INDEX_CHARS]))
+        self.docs[entry_id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = []
+                if not CJK_PATTERN.match(token):
+                    insort(self.vocabulary, token)
+            if not ids or ids[-1] < entry_id:
+                ids.append(entry_id)
+            else:
+                insort(ids, entry_id)
+
+    def remove(self, entry_id):
+        tokens = self.docs.pop(entry_id, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            ids = self.postings[token]
+            del ids[bisect_left(ids, entry_id)]
+            if not ids:
+                del self.postings[token]
+                if not CJK_PATTERN.match(token):
+                    del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def remove_through(self, cutoff_id):
+        """删除 id 不大于 cutoff_id 的记录（docs 按 id 递增排列，只需从头遍历）"""
+        stale = []
+        for entry_id in self.docs:
+            if entry_id > cutoff_id:
+                break
+            stale.append(entry_id)
+        for entry_id in stale:
+            self.remove(entry_id)
+
+    def prefix_ids(self, prefix):
+        """按 id 从大到小依次产生含有以 prefix 开头的词的记录（可能重复）"""
+        start = bisect_left(self.vocabulary, prefix)
+        lists = []
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            lists.append(reversed(self.postings[token]))
+        return heapq.merge(*lists, reverse=True)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """返回同时包含全部查询词的记录 id，最新的在前"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        exact = []
+        prefixes = []
+        for token, is_prefix in terms:
+            if is_prefix:
+                prefixes.append(token)
+            else:
+                ids = self.postings.get(token)
+                if not ids:
+                    return []
+                exact.append((token, ids))
+        if exact:
+            exact.sort(key=lambda item: len(item[1]))
+            candidates = reversed(exact[0][1])
+            required = [token for token, _ in exact[1:]]
+        else:
+            candidates = self.prefix_ids(prefixes[0])
+            prefixes = prefixes[1:]
+            required = []
+
+        results = []
+        last_id = None
+        for entry_id in candidates:
+            if entry_id == last_id:
+                continue
+            last_id = entry_id
+            tokens = self.docs[entry_id]
+            if all(token in tokens for token in required) and \
+                    all(any(token.startswith(prefix) for token in tokens) for prefix in prefixes):
+                results.append(entry_id)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class SearchIndexBuilder(QThread):
+    """后台线程：启动时从数据库读取历史文本构建索引"""
+    built = Signal(object)  # 信号：构建完成的 SearchIndex
+
+    def __init__(self, db_path, before_id):
+        super().__init__()
+        self.db_path = db_path
+        self.before_id = before_id
+
+    def run(self):
+        index = SearchIndex()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute(
+                "SELECT id, CASE WHEN file_type = 'text' THEN substr(text, 1, ?) ELSE display_name END "
+                "FROM entries WHERE id < ? AND file_type != 'image' ORDER BY id",
+                (INDEX_CHARS, self.before_id)
+            )
+            for entry_id, text in rows:
+                if text:
+                    index.add(entry_id, text)
+            conn.close()
+        except Exception as e:
+            print("构建剪贴板搜索索引失败:", e)
+        self.built.emit(index)
+
+
+class ClipboardSearch(QObject):
+    """剪贴板历史的全文搜索，索引随捕获、置顶和清理增量更新
+
+    启动时在后台线程构建索引，构建期间的增量操作先排队，构建完成后按顺序重放。
+    """
+
+    def __init__(self, db_path, before_id, parent=None):
+        super().__init__(parent)
+        self.index = SearchIndex()
+        self.ready = False
+        self._pending = []
+        self.builder = SearchIndexBuilder(db_path, before_id)
+        self.builder.built.connect(self.on_built)
+        self.builder.start()
+
+    def on_built(self, index):
+        self.index = index
+        self.ready = True
+        for operation, args in self._pending:
+            operation(*args)
+        self._pending = []
+
+    def _apply(self, operation, *args):
+        if self.ready:
+            operation(*args)
+        else:
+            self._pending.append((operation, args))
+
+    def add_entry(self, entry):
+        """索引文本记录的内容和文件记录的文件名，图片不参与搜索"""
+        if entry.file_type == "image":
+            return
+        if entry.file_type == "text":
+            text = entry.content if entry.content is not None else entry.preview_text()
+        else:
+            text = entry.display_name or entry.content or ""
+        self._apply(lambda entry_id, text: self.index.add(entry_id, text), entry.entry_id, text)
+
+    def remove(self, entry_id):
+        self._apply(lambda entry_id: self.index.remove(entry_id), entry_id)
+
+    def remove_through(self, cutoff_id):
+        self._apply(lambda cutoff_id: self.index.remove_through(cutoff_id), cutoff_id)
+
+    def search(self, query):
+        return self.index.search(query)
+
+    def wait(self):
+        self.builder.wait()
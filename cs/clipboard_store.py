@@ -0,0 +1,278 @@
+# clipboard_store.py
+from PySide6.QtCore import QThread, Signal, QByteArray, QBuffer, QIODevice
+from PySide6.QtGui import QPixmap, QImage
+import os
+import time
+import queue
+import sqlite3
+import hashlib
+
+from clipboard_model import ClipboardEntry, PREVIEW_CHARS
+from clipboard_search import ClipboardSearch
+
+# 剪贴板历史保存在 cs/clipboard_data 下：history.db 保存元数据，blobs 目录保存按内容哈希命名的图片
+CLIPBOARD_DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clipboard_data")
+MAX_HISTORY = 5000  # 最多保留的历史条数，超出后删除最旧的记录
+PAGE_SIZE = 50  # 启动和滚动时每次从数据库读取的条数
+BATCH_SIZE = 64  # 后台写入线程单个事务最多写入的条数
+BATCH_INTERVAL = 0.2  # 后台写入线程攒批的最长等待时间（秒）
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        created REAL NOT NULL,
+        file_type TEXT NOT NULL,
+        display_name TEXT,
+        text TEXT,
+        blob TEXT,
+        fingerprint TEXT
+    );
+    CREATE INDEX IF NOT EXISTS entries_blob ON entries (blob);
+"""
+ENTRY_COLUMNS = "id, created, file_type, display_name, substr(text, 1, ?), length(text), blob, fingerprint"
+FINGERPRINT_INDEX = "CREATE INDEX IF NOT EXISTS entries_fingerprint ON entries (fingerprint)"
+
+
+def connect(db_path):
+    """打开数据库连接，使用 WAL 模式让读写互不阻塞"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+    if "fingerprint" not in columns:  # 旧版本数据库没有指纹列
+        conn.execute("ALTER TABLE entries ADD COLUMN fingerprint TEXT")
+    conn.execute(FINGERPRINT_INDEX)
+    conn.commit()
+    return conn
+
+
+def content_fingerprint(content, file_type):
+    """计算捕获内容的指纹：文本和文件路径哈希其字符串，图片哈希原始像素"""
+    digest = hashlib.blake2b(file_type.encode("utf-8"), digest_size=16)
+    if isinstance(content, QPixmap):
+        content = content.toImage()
+    if isinstance(content, QImage):
+        digest.update(f"{content.width()}x{content.height()}:{content.format()}".encode("utf-8"))
+        digest.update(bytes(content.constBits()))
+    else:
+        digest.update(content.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def blob_path(blob_folder, key):
+    """按内容哈希得到 blob 文件路径，前两位作为子目录避免单目录文件过多"""
+    return os.path.join(blob_folder, key[:2], f"{key}.png")
+
+
+class ClipboardStoreWriter(QThread):
+    """后台写入线程：攒批写入数据库，图片编码为 PNG 后按内容哈希保存"""
+    entry_stored = Signal(int, str, str)  # 信号：记录已落盘（记录 id，blob 路径，非图片为空字符串；指纹）
+    entries_pruned = Signal(int)  # 信号：id 不大于该值的记录已被清理
+
+    def __init__(self, db_path, blob_folder, max_entries):
+        super().__init__()
+        self.db_path = db_path
+        self.blob_folder = blob_folder
+        self.max_entries = max_entries
+        self.queue = queue.Queue()
+
+    def run(self):
+        conn = connect(self.db_path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if None in batch:  # None 表示停止，先把之前排队的写完
+                batch = batch[:batch.index(None)]
+                running = False
+            if batch:
+                try:
+                    self.write_batch(conn, batch)
+                except Exception as e:
+                    print("保存剪贴板历史失败:", e)
+        conn.close()
+
+    def write_batch(self, conn, batch):
+        stored = []
+        with conn:
+            for operation in batch:
+                if operation[0] == "insert":
+                    _, record, image = operation
+                    key = None
+                    if image is not None:
+                        key = self.save_blob(image)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (id, created, file_type, display_name, text, blob, fingerprint) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (record["id"], record["created"], record["file_type"], record["display_name"],
+                         record["text"], key, record["fingerprint"])
+                    )
+                    stored.append([record["id"], blob_path(self.blob_folder, key) if key else "",
+                                   record["fingerprint"] or ""])
+                elif operation[0] == "touch":
+                    # 重复捕获：换成新的 id 使记录排到最前面
+                    _, old_id, new_id, created = operation
+                    conn.execute("UPDATE entries SET id = ?, created = ? WHERE id = ?", (new_id, created, old_id))
+                    for item in stored:
+                        if item[0] == old_id:
+                            item[0] = new_id
+            cutoff_id = self.prune(conn)
+        for entry_id, path, fingerprint in stored:
+            self.entry_stored.emit(entry_id, path, fingerprint)
+        if cutoff_id is not None:
+            self.entries_pruned.emit(cutoff_id)
+
+    def save_blob(self, image):
+        """把图片编码为 PNG，以内容哈希命名写入 blobs 目录，相同内容只保存一份"""
+        byte_array = QByteArray()
+        buffer = QBuffer(byte_array)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "PNG")
+        buffer.close()
+        data = byte_array.data()
+        key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = blob_path(self.blob_folder, key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return key
+
+    def prune(self, conn):
+        """超出条数上限时删除最旧的记录，并清理不再被引用的 blob，返回被清理的最大 id"""
+        row = conn.execute("SELECT id FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?",
+                           (self.max_entries,)).fetchone()
+        if row is None:
+            return None
+        keys = {key for (key,) in conn.execute(
+            "SELECT DISTINCT blob FROM entries WHERE id <= ? AND blob IS NOT NULL", row)}
+        conn.execute("DELETE FROM entries WHERE id <= ?", row)
+        for key in keys:
+            if conn.execute("SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (key,)).fetchone() is None:
+                try:
+                    os.remove(blob_path(self.blob_folder, key))
+                except OSError:
+                    pass
+        return row[0]
+
+
+class ClipboardStore:
+    """剪贴板历史的磁盘存储：GUI 线程只做小查询，所有写入交给后台线程"""
+
+    def __init__(self, folder=CLIPBOARD_DATA_FOLDER, max_entries=MAX_HISTORY):
+        self.folder = folder
+        self.blob_folder = os.path.join(folder, "blobs")
+        os.makedirs(self.blob_folder, exist_ok=True)
+        db_path = os.path.join(folder, "history.db")
+        self.conn = connect(db_path)
+        self.next_id = (self.conn.execute("SELECT MAX(id) FROM entries").fetchone()[0] or 0) + 1
+
+        # 全文搜索索引在后台从数据库构建，之后随写入增量更新
+        self.search = ClipboardSearch(db_path, self.next_id)
+
+        self.writer = ClipboardStoreWriter(db_path, self.blob_folder, max_entries)
+        self.entry_stored = self.writer.entry_stored
+        self.entries_pruned = self.writer.entries_pruned
+        self.writer.entries_pruned.connect(self.search.remove_through)
+        self.writer.start()
+
+    def create_entry(self, content, file_type, display_name=None, fingerprint=None):
+        """为新捕获的内容分配 id 并生成记录"""
+        entry = ClipboardEntry(self.next_id, time.time(), file_type, content=content, display_name=display_name,
+                               fingerprint=fingerprint)
+        self.next_id += 1
+        self.search.add_entry(entry)
+        return entry
+
+    def touch(self, entry):
+        """把已有记录移到最前面：分配新的 id 并交给后台线程更新"""
+        old_id = entry.entry_id
+        entry.entry_id = self.next_id
+        entry.set_created(time.time())
+        self.next_id += 1
+        self.writer.queue.put(("touch", old_id, entry.entry_id, entry.created))
+        self.search.remove(old_id)
+        self.search.add_entry(entry)
+        return old_id
+
+    def find_fingerprint(self, fingerprint):
+        """在数据库中按指纹查找尚未读入内存的记录"""
+        row = self.conn.execute(
+            "SELECT id FROM entries WHERE fingerprint = ? ORDER BY id DESC LIMIT 1", (fingerprint,)
+        ).fetchone()
+        if row is None:
+            return None
+        page = self.load_page(row[0] + 1, limit=1)
+        return page[0] if page else None
+
+    def save(self, entry, image=None):
+        """把记录交给后台线程写入，图片以 QImage 形式传给后台编码"""
+        record = {
+            "id": entry.entry_id,
+            "created": entry.created,
+            "file_type": entry.file_type,
+            "display_name": entry.display_name,
+            "text": entry.content if isinstance(entry.content, str) else None,
+            "fingerprint": entry.fingerprint,
+        }
+        if image is None and isinstance(entry.content, QPixmap):
+            image = entry.content.toImage()
+        self.writer.queue.put(("insert", record, image))
+
+    def load_page(self, before_id=None, limit=PAGE_SIZE):
+        """按从新到旧的顺序读取一页记录，长文本只读取预览部分"""
+        if before_id is None:
+            before_id = self.next_id
+        rows = self.conn.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM entries WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (PREVIEW_CHARS, before_id, limit)
+        ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def load_entries(self, entry_ids):
+        """按 id 读取记录，返回 id -> 记录"""
+        entries = {}
+        entry_ids = list(entry_ids)
+        for start in range(0, len(entry_ids), 500):  # 分批查询，避免超出 SQL 参数个数限制
+            chunk = entry_ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM entries WHERE id IN ({','.join('?' * len(chunk))})",
+                (PREVIEW_CHARS, *chunk)
+            ).fetchall()
+            for row in rows:
+                entries[row[0]] = self._row_to_entry(row)
+        return entries
+
+    def _row_to_entry(self, row):
+        entry_id, created, file_type, display_name, text, length, key, fingerprint = row
+        # 完整内容不超过预览长度时直接放入内存，否则复制时再从数据库读取
+        content = text if length is not None and length <= PREVIEW_CHARS else None
+        return ClipboardEntry(
+            entry_id, created, file_type, content=content, display_name=display_name,
+            blob_path=blob_path(self.blob_folder, key) if key else None,
+            preview=text if file_type == "text" else None, fingerprint=fingerprint
+        )
+
+    def load_content(self, entry):
+        """取得记录的完整内容：图片返回 QPixmap，文本返回完整字符串，文件返回路径"""
+        if entry.content is not None:
+            return entry.content
+        if entry.file_type == "image":
+            return QPixmap(entry.blob_path) if entry.blob_path else None
+        row = self.conn.execute("SELECT text FROM entries WHERE id = ?", (entry.entry_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        """等待后台线程写完排队的记录后关闭"""
+        self.writer.queue.put(None)
+        self.writer.wait()
+        self.search.wait()
+        self.conn.close()
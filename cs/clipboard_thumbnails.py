@@ -0,0 +1,102 @@
+# clipboard_thumbnails.py
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+import os
+
+# 缩略图尺寸：card 为卡片中显示的尺寸，drag 为拖拽图标尺寸
+THUMBNAIL_SIZES = {
+    "card": (350, 250),
+    "drag": (100, 100),
+}
+THUMBNAIL_THREADS = 2  # 后台生成缩略图的线程数
+
+
+def scale_image(image, size_name):
+    return image.scaled(*THUMBNAIL_SIZES[size_name], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def make_thumbnails(image):
+    """由原图生成全部尺寸的缩略图（QImage，可在后台线程调用）"""
+    return {size_name: scale_image(image, size_name) for size_name in THUMBNAIL_SIZES}
+
+
+class ThumbnailSignals(QObject):
+    finished = Signal(str, object)  # 信号：缩略图生成完成（内容哈希，尺寸名 -> QImage）
+
+
+class ThumbnailTask(QRunnable):
+    """后台任务：由原图文件或 QImage 生成缩略图并写入磁盘缓存"""
+
+    def __init__(self, cache, key, source, signals):
+        super().__init__()
+        self.cache = cache
+        self.key = key
+        self.source = source
+        self.signals = signals
+
+    def run(self):
+        thumbnails = None
+        try:
+            if isinstance(self.source, dict):  # 已生成好的缩略图，只需写盘
+                thumbnails = self.source
+            else:
+                image = self.source if isinstance(self.source, QImage) else QImageReader(self.source).read()
+                if not image.isNull():
+                    thumbnails = make_thumbnails(image)
+            if thumbnails:
+                for size_name, thumbnail in thumbnails.items():
+                    path = self.cache.path(self.key, size_name)
+                    if not os.path.exists(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        temp_path = path + ".tmp"
+                        thumbnail.save(temp_path, "PNG")
+                        os.replace(temp_path, path)
+        except Exception as e:
+            print("生成缩略图失败:", e)
+        self.signals.finished.emit(self.key, thumbnails)
+
+
+class ThumbnailCache(QObject):
+    """按内容哈希保存多种尺寸缩略图的磁盘缓存，缺失的缩略图在后台生成"""
+    thumbnail_ready = Signal(str, object)  # 信号：某个内容哈希的缩略图已生成（内容哈希，尺寸名 -> QImage）
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(THUMBNAIL_THREADS)
+        self.signals = ThumbnailSignals(self)
+        self.signals.finished.connect(self.on_finished)
+        self._requested = set()
+
+    def path(self, key, size_name):
+        width, height = THUMBNAIL_SIZES[size_name]
+        return os.path.join(self.folder, key[:2], f"{key}_{width}x{height}.png")
+
+    def load(self, key, size_name):
+        """读取磁盘上已有的缩略图，不存在时返回 None"""
+        path = self.path(key, size_name)
+        if not os.path.exists(path):
+            return None
+        pixmap = QPixmap(path)
+        return None if pixmap.isNull() else pixmap
+
+    def request(self, key, source):
+        """在后台由原图文件或 QImage 生成缩略图并写盘，完成后发出 thumbnail_ready"""
+        if key in self._requested:
+            return
+        self._requested.add(key)
+        self.pool.start(ThumbnailTask(self, key, source, self.signals))
+
+    def save(self, key, thumbnails):
+        """在后台把已生成的缩略图（尺寸名 -> QImage）写入磁盘"""
+        self.pool.start(ThumbnailTask(self, key, dict(thumbnails), self.signals))
+
+    def on_finished(self, key, thumbnails):
+        # 生成失败的内容保留在 _requested 中，避免每次绘制都重新尝试
+        if key in self._requested and thumbnails:
+            self._requested.discard(key)
+            self.thumbnail_ready.emit(key, thumbnails)
+
+    def wait(self):
+        self.pool.waitForDone()
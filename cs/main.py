@@ -4,28 +4,32 @@ from PySide6.QtGui import QIcon, QPalette, QColor
 from PySide6.QtCore import QThread, Signal, Qt
 import os
 import sys
-import keyboard
-from zsku.ui_module import KnowledgeBaseApp
 from clipboard_manager import ClipboardWindow
-from settings import SettingsPage
-from bj.bji import NotePage
 
 
 class GlobalShortcutListener(QThread):
     """线程类，用于监听全局快捷键"""
     triggered = Signal()  # 自定义信号，用于唤出剪贴板
+    ready = Signal()  # 信号：快捷键已注册，可以使用
 
     def __init__(self, shortcut="ctrl+k"):
         super().__init__()
         self.shortcut = shortcut
 
     def run(self):
-        """线程运行时启动快捷键监听"""
-        keyboard.add_hotkey(self.shortcut, self.triggered.emit)  # 绑定全局快捷键
+        """线程运行时启动快捷键监听（keyboard 在监听线程中导入，不占用启动时间）"""
+        try:
+            import keyboard
+            keyboard.add_hotkey(self.shortcut, self.triggered.emit)  # 绑定全局快捷键
+        except Exception as e:
+            print("注册全局快捷键失败:", e)
+            return
+        self.ready.emit()
         keyboard.wait()  # 保持线程运行
 
     def update_shortcut(self, new_shortcut):
         """更新全局快捷键"""
+        import keyboard
         keyboard.remove_hotkey(self.shortcut)  # 移除旧快捷键
         self.shortcut = new_shortcut  # 更新快捷键
         keyboard.add_hotkey(self.shortcut, self.triggered.emit)  # 绑定新快捷键
@@ -106,15 +110,14 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        # 各个页面
-        self.settings_page = SettingsPage()
-        self.knowledge_base = KnowledgeBaseApp()
-        self.note_page = NotePage()
-
-        # 添加到堆叠窗口中
-        self.stacked_widget.addWidget(self.settings_page)
-        self.stacked_widget.addWidget(self.knowledge_base)
-        self.stacked_widget.addWidget(self.note_page)
+        # 各个页面在第一次切换到时才创建，堆叠窗口中先放占位控件
+        self.page_factories = [self.create_settings_page, self.create_knowledge_base, self.create_note_page]
+        self.pages = [None] * len(self.page_factories)
+        for _ in self.page_factories:
+            self.stacked_widget.addWidget(QWidget())
+        self.settings_page = None
+        self.knowledge_base = None
+        self.note_page = None
 
         # 主布局
         main_layout = QHBoxLayout()
@@ -132,11 +135,50 @@ class MainWindow(QMainWindow):
         self.global_shortcut.triggered.connect(self.toggle_clipboard_visibility)
         self.global_shortcut.start()
 
+        self.display_page(0)  # 默认显示设置页（创建开销很小）
+
+    def create_settings_page(self):
+        from settings import SettingsPage
+        self.settings_page = SettingsPage()
         # 将 SettingsPage 中的快捷键信号连接到 update_shortcut 方法
         self.settings_page.shortcut_changed.connect(self.update_shortcut)
+        return self.settings_page
+
+    def create_knowledge_base(self):
+        # QtWebEngine 只在第一次打开知识库时导入并启动；文档协议要在创建第一个 QWebEngineView 之前注册
+        from zsku.doc_scheme import register_scheme
+        register_scheme()
+        from zsku.ui_module import KnowledgeBaseApp
+        self.knowledge_base = KnowledgeBaseApp()
+        QApplication.instance().aboutToQuit.connect(self.knowledge_base.document_handler.cleanup)  # 停止后台下载、校验和索引线程
+        return self.knowledge_base
+
+    def create_note_page(self):
+        from bj.bji import NotePage
+        self.note_page = NotePage()
+        QApplication.instance().aboutToQuit.connect(self.note_page.autosave)  # 保存正在编辑的笔记
+        QApplication.instance().aboutToQuit.connect(self.note_page.save_large_file)  # 大文件的修改同步写回
+        QApplication.instance().aboutToQuit.connect(self.note_page.autosaver.close)  # 等后台写入完成
+        QApplication.instance().aboutToQuit.connect(self.note_page.note_index.stop)  # 停止后台扫描
+        QApplication.instance().aboutToQuit.connect(self.note_page.note_search.close)  # 停止后台索引
+        QApplication.instance().aboutToQuit.connect(self.note_page.large_view.close_file)  # 停止建立行索引
+        return self.note_page
+
+    def page(self, index):
+        """取得页面，第一次访问时创建并替换占位控件"""
+        if self.pages[index] is None:
+            page = self.page_factories[index]()
+            placeholder = self.stacked_widget.widget(index)
+            self.stacked_widget.insertWidget(index, page)
+            self.stacked_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.pages[index] = page
+        return self.pages[index]
 
     def display_page(self, index):
-        self.stacked_widget.setCurrentIndex(index)
+        if index < 0:
+            return
+        self.stacked_widget.setCurrentWidget(self.page(index))
 
     def toggle_clipboard_visibility(self):
         """切换剪贴板窗口的显示/隐藏"""
@@ -152,7 +194,10 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # QtWebEngine 延迟导入，需要在创建 QApplication 之前开启 OpenGL 上下文共享
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     window = MainWindow()
+    app.aboutToQuit.connect(window.clipboard_window.cleanup)
     window.show()
     sys.exit(app.exec())
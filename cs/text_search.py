@@ -0,0 +1,60 @@
+# text_search.py
+import re
+
+SNIPPET_CHARS = 60  # 摘要中命中词前后大致保留的字符数（汉字在正文中占两个字符）
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"  # 假名、汉字、谚文
+CJK_CHAR = re.compile(f"([{CJK_RANGES}])")
+CJK_SPACING = re.compile(f"(?:(?<=[{CJK_RANGES}])|(?<=[{CJK_RANGES}]】)) +(?=【?[{CJK_RANGES}])")
+QUERY_PATTERN = re.compile(f"[{CJK_RANGES}]+|[^\\W{CJK_RANGES}]+")
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+def segment_cjk(text):
+    """中日韩文字没有空格，每个字单独成词；查询时按相邻位置的短语匹配，相当于按词搜索"""
+    return CJK_CHAR.sub(r" \1 ", text)
+
+
+def join_cjk(text):
+    """去掉 segment_cjk 在相邻汉字之间加入的空格（用于显示标题和摘要）"""
+    return SPACE_PATTERN.sub(" ", CJK_SPACING.sub("", text)).strip()
+
+
+def build_query(text):
+    """把用户输入转成 FTS5 查询：拉丁单词最后一个按前缀匹配，中日韩文字按短语匹配，全部词都要出现"""
+    terms = QUERY_PATTERN.findall(text.lower())
+    parts = []
+    for i, term in enumerate(terms):
+        if CJK_CHAR.match(term):
+            parts.append('"' + " ".join(term) + '"')
+        elif i == len(terms) - 1 and len(term) >= 2:
+            parts.append(f'"{term}"*')
+        else:
+            parts.append(f'"{term}"')
+    return " ".join(parts)
+
+
+def term_pattern(terms):
+    """在分词后的文本中查找查询词的正则，长的词优先
+
+    存储的正文中汉字两侧都有空格，查询词中的汉字之间允许任意空白。
+    """
+    alternatives = ["\\s*".join(re.escape(char) for char in term) if CJK_CHAR.match(term) else re.escape(term)
+                    for term in sorted(terms, key=len, reverse=True)]
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def make_snippet(body, terms):
+    """从分词后的正文中截取第一个命中词附近的文字，命中词用【】标出
+
+    先在存储的正文里定位，只对截取的片段做 join_cjk，不必处理整篇正文。
+    """
+    if not terms:
+        return join_cjk(body[:SNIPPET_CHARS * 4])
+    pattern = term_pattern(terms)
+    match = pattern.search(body)
+    if match is None:
+        return join_cjk(body[:SNIPPET_CHARS * 4])
+    start = max(0, match.start() - SNIPPET_CHARS * 2)
+    end = min(len(body), match.end() + SNIPPET_CHARS * 2)
+    snippet = join_cjk(pattern.sub(lambda hit: f"【{hit.group(0)}】", body[start:end]))
+    return ("…" if start else "") + snippet + ("…" if end < len(body) else "")
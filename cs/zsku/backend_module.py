@@ -1,11 +1,22 @@
 import os
 import requests
-import subprocess
 import json
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from PySide6.QtCore import QThread, Signal, QUrl
 from PySide6.QtWidgets import QMessageBox
-from .config import ZY_FOLDER, DOWNLOAD_FOLDER, EXTRACT_FOLDER, JY_FOLDER
+from .config import ZY_FOLDER, DOWNLOAD_FOLDER, EXTRACT_FOLDER, DOWNLOAD_CONNECTIONS, DOC_INDEX_PATH, \
+    CATALOG_CACHE_PATH, EXTRACT_ARCHIVES, DOC_SCHEME, DOWNLOAD_RATE_LIMIT
+from .catalog import Catalog, CatalogModel
+from .download_queue import DownloadQueue, RateLimiter, FOREGROUND, BACKGROUND
+from .zip_archive import ZipArchive
+from .mirror import MirrorThread, mirrored_page
+from .zip_stream import SegmentReader, ZipStreamExtractor, split_zip_order
+from .integrity import Manifest, VerificationState, VerifyThread, hash_file, new_hash, verify_file
+from .doc_search import DocSearchIndex
 
 # 配置日志格式
 logging.basicConfig(
@@ -14,105 +25,399 @@ logging.basicConfig(
 )
 
 
+DOWNLOAD_TIMEOUT = (10, 30)  # 连接超时、读取超时（秒）
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 每次从连接读取的初始（也是最小）字节数
+MAX_CHUNK_SIZE = 4 * 1024 * 1024  # 每次读取的最大字节数
+CHUNK_SECONDS = 0.05  # 按测得的速度调整读取大小，使每次读取大约用这么久
+PROGRESS_INTERVAL = 0.1  # 进度信号的最短间隔（秒），即最多 10 次/秒
+SPEED_SMOOTHING = 0.3  # 下载速度的指数平滑系数，越大越跟随最近的速度
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class DownloadStopped(Exception):
+    """下载线程被停止，未完成的分卷保留为 .part 文件，下次续传"""
+
+
+def segment_paths(links, download_folder=DOWNLOAD_FOLDER):
+    """各分卷下载后的保存路径，按分卷数据顺序排列"""
+    return [os.path.join(download_folder, os.path.basename(link)) for link in split_zip_order(links)]
+
+
 class DownloadThread(QThread):
     progress = Signal(int)  # 信号：用于更新进度条
+    # 信号：{"downloaded": 已下载字节数, "total": 总字节数, "speed": 字节/秒, "eta": 剩余秒数}，未知的值为 None
+    transfer_progress = Signal(object)
+    file_extracted = Signal(str)  # 信号：某个文件已解压完成，可以打开
     finished = Signal(str, str)  # 信号：下载完成（解压路径或错误消息）
+    stopped = Signal()  # 信号：被 stop() 停下，未下载完
 
-    def __init__(self, key, download_links):
+    def __init__(self, key, download_links, max_connections=DOWNLOAD_CONNECTIONS, download_folder=DOWNLOAD_FOLDER,
+                 extract=EXTRACT_ARCHIVES, limiter=None):
         super().__init__()
         self.key = key
-        self.download_links = download_links
+        self.download_links = split_zip_order(download_links)  # 按分卷数据顺序下载，前面的分卷先到
+        self.max_connections = max_connections
+        self.download_folder = download_folder
+        self.extract = extract  # 为 False 时只下载分卷，文档从压缩包中读取
+        self.limiter = limiter  # 多个资源同时下载时共享的 RateLimiter
         self._is_running = True
+        self._lock = threading.Lock()
+        self.downloaded_bytes = 0  # 包括续传前已在本地的部分
+        self.received_bytes = 0  # 本次从网络收到的字节数，用于计算速度
+        self.total_bytes = None
+        self.speed = None
+        self._last_percent = -1
+        self._last_report = 0.0
+        self._reported_received = 0
+        self.segment_paths = segment_paths(self.download_links, download_folder)
+        self._parts = threading.Condition()  # 保护各分卷的下载进度，解压线程在上面等待数据
+        self.part_offsets = {}  # 分卷路径 -> .part 文件中已写入的字节数
+        self.completed = set()  # 已下载完整的分卷路径
+        self.manifest = Manifest.load(key)  # 没有清单时，下载解压成功后根据本次结果生成
+        self.part_state = VerificationState.shared("parts")  # 各资源的下载线程共用
+        self.part_hashes = {}  # 分卷文件名 -> {"size", "hash"}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def run(self):
         try:
-            temp_dir = DOWNLOAD_FOLDER
-            os.makedirs(temp_dir, exist_ok=True)
-
-            # 下载所有文件
-            for i, link in enumerate(self.download_links):
-                if not self._is_running:
-                    logging.info("下载线程已停止")
-                    return
-                file_name = os.path.join(temp_dir, os.path.basename(link))
-                if not os.path.exists(file_name):  # 避免重复下载
-                    self.download_file(link, file_name)
-                self.progress.emit(int((i + 1) / len(self.download_links) * 100))  # 更新进度条
-
-            # 解压主 ZIP 文件
-            main_zip = os.path.join(temp_dir, [f for f in self.download_links if f.endswith(".zip")][0].split("/")[-1])
-            self.extract_with_7z(main_zip, EXTRACT_FOLDER)
-            self.finished.emit(EXTRACT_FOLDER, None)  # 解压成功，返回解压路径
+            if self.extract:
+                self.download_and_extract(EXTRACT_FOLDER)
+                self.flush_progress()
+                self.finished.emit(EXTRACT_FOLDER, None)  # 解压成功，返回解压路径
+            else:
+                self.download_parts()
+                self.flush_progress()
+                self.finished.emit(self.download_folder, None)
+        except DownloadStopped:
+            logging.info("下载线程已停止")
+            self.stopped.emit()
         except Exception as e:
             logging.error(f"下载或解压失败: {e}")
             self.finished.emit(None, str(e))  # 返回错误消息
+        finally:
+            self.session.close()
 
     def stop(self):
         """停止线程"""
-        self._is_running = False
-
-    def download_file(self, url, save_path):
-        """下载文件"""
-        logging.info(f"下载文件: {url}")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(save_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
+        with self._parts:
+            self._is_running = False
+            self._parts.notify_all()
+
+    def download_and_extract(self, output_folder):
+        """下载分卷的同时按顺序解压：某个条目的数据一到齐就解压，不等全部分卷下载完成"""
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            futures = self.start_downloads(executor)
+            try:
+                reader = SegmentReader(self, len(self.segment_paths))
+                extractor = ZipStreamExtractor(reader, output_folder, self.file_extracted.emit, new_hash=new_hash)
+                extractor.extract()
+                self.wait_downloads(futures)
+                self.record_manifest(output_folder, extractor.file_hashes)
+            except BaseException:
+                self.stop()
+                # 解压线程等待数据时看到的是 DownloadStopped，真正的原因是下载出错
+                error = self.download_error(futures)
+                if error is not None:
+                    raise error
+                raise
+        logging.info(f"解压完成: {output_folder}，共 {extractor.extracted} 个文件")
+
+    def record_manifest(self, output_folder, file_hashes):
+        """解压出的文件与清单比对并记入校验状态，之后重新打开时不必再计算哈希；
+        没有清单时用本次下载的结果生成本地清单"""
+        files = {name: {"size": size, "hash": file_hash} for name, (size, file_hash) in file_hashes.items()}
+        if self.manifest is None or not self.manifest.files:
+            parts = self.manifest.parts if self.manifest is not None else {}
+            self.manifest = Manifest(self.key, parts or dict(self.part_hashes), files)
+            self.manifest.save()
+        state = VerificationState(f"files-{self.key}")
+        corrupt = []
+        for name, actual in files.items():
+            expected = self.manifest.files.get(name)
+            if expected is None:
+                continue
+            if expected != actual:
+                corrupt.append(name)
+                continue
+            state.record(name, os.stat(os.path.join(output_folder, *name.split("/"))), actual["hash"])
+        state.save()
+        if corrupt:
+            raise IOError(f"{len(corrupt)} 个文件与清单不符，例如: {corrupt[0]}")
+
+    def download_parts(self):
+        """只下载全部分卷，不解压"""
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            self.wait_downloads(self.start_downloads(executor))
+        return self.segment_paths
+
+    def start_downloads(self, executor):
+        """在线程池中并发下载全部分卷，按总字节数报告进度"""
+        os.makedirs(self.download_folder, exist_ok=True)
+        sizes = list(executor.map(self.remote_size, self.download_links))
+        if all(size is not None for size in sizes):
+            self.total_bytes = sum(sizes)
+        for path, size in zip(self.segment_paths, sizes):
+            self.check_cached_part(path)
+            local = self.local_size(path, size)
+            with self._parts:
+                if os.path.exists(path):
+                    self.completed.add(path)
+                else:
+                    self.part_offsets[path] = local
+            self._add_progress(local)
+        return [executor.submit(self.download_file, link, path, size)
+                for link, path, size in zip(self.download_links, self.segment_paths, sizes)]
+
+    def expected_part(self, path):
+        return self.manifest.parts.get(os.path.basename(path)) if self.manifest is not None else None
+
+    def check_cached_part(self, path):
+        """已下载的分卷与清单不符时删除重新下载；大小和修改时间没变的分卷不重新计算哈希"""
+        if not os.path.exists(path):
+            return
+        expected = self.expected_part(path)
+        name = os.path.basename(path)
+        if expected is None:  # 没有清单时记录现有分卷的哈希，用于生成本地清单
+            stat = os.stat(path)
+            recorded = self.part_state.entries.get(f"{self.key}/{name}")
+            if recorded and recorded[:2] == [stat.st_size, stat.st_mtime_ns]:
+                file_hash = recorded[2]
+            else:
+                file_hash = hash_file(path)
+                self.part_state.record(f"{self.key}/{name}", stat, file_hash)
+                self.part_state.save()
+            self.part_hashes[name] = {"size": stat.st_size, "hash": file_hash}
+            return
+        if verify_file(path, f"{self.key}/{name}", expected, self.part_state) == "ok":
+            self.part_hashes[name] = expected
+        else:
+            logging.warning(f"分卷与清单不符，重新下载: {path}")
+            os.remove(path)
+        self.part_state.save()
+
+    def verify_part(self, save_path):
+        """新下载完成的分卷计算哈希，与清单比对"""
+        name = os.path.basename(save_path)
+        stat = os.stat(save_path)
+        file_hash = hash_file(save_path)
+        expected = self.expected_part(save_path)
+        if expected is not None and (expected["size"] != stat.st_size or expected["hash"] != file_hash):
+            os.remove(save_path)
+            raise IOError(f"分卷校验失败: {name}")
+        self.part_hashes[name] = {"size": stat.st_size, "hash": file_hash}
+        self.part_state.record(f"{self.key}/{name}", stat, file_hash)
+        self.part_state.save()
+
+    def wait_downloads(self, futures):
+        """等待全部分卷下载完成；任一分卷失败时停止其余分卷并抛出异常"""
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            self.stop()  # 让其余分卷尽快停下，已下载的部分保留用于续传
+            raise
+
+    def download_error(self, futures):
+        for future in futures:
+            error = future.exception()
+            if error is not None and not isinstance(error, DownloadStopped):
+                return error
+        return None
+
+    def read_segment(self, index, position, size):
+        """供解压线程读取第 index 个分卷：数据未到时等待，分卷完整且已读完时返回 b"""""
+        path = self.segment_paths[index]
+        with self._parts:
+            while True:
+                if path in self.completed:
+                    read_path = path
+                    available = os.path.getsize(path)
+                    break
+                available = self.part_offsets.get(path, 0)
+                if available > position:
+                    read_path = path + ".part"
+                    break
                 if not self._is_running:
-                    logging.info("下载线程中止，文件未完成: {url}")
-                    return
+                    raise DownloadStopped(path)
+                self._parts.wait()
+            if position >= available:
+                return b""
+            # 持有锁读取，避免下载线程同时重命名正在读取的文件（Windows 上会失败）
+            with open(read_path, "rb") as file:
+                file.seek(position)
+                return file.read(min(size, available - position))
+
+    def remote_size(self, url):
+        """用 HEAD 取得分卷大小，服务器不提供时返回 None"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        except requests.RequestException:
+            return None
+        length = response.headers.get("Content-Length")
+        return int(length) if response.ok and length and length.isdigit() else None
+
+    def local_size(self, save_path, size):
+        """已在本地的字节数：完整的分卷按其大小计算，否则为 .part 文件的大小"""
+        part_path = save_path + ".part"
+        if os.path.exists(save_path):
+            current = os.path.getsize(save_path)
+            if size is None or current == size:
+                return current
+            # 旧版本直接写入目标文件，中断后留下不完整的文件，改为 .part 继续续传
+            if current < size and not os.path.exists(part_path):
+                os.replace(save_path, part_path)
+            else:
+                os.remove(save_path)
+        return os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+    def download_file(self, url, save_path, size=None):
+        """下载单个分卷：写入 .part 文件，从已有大小处用 Range 续传，完整后原子重命名"""
+        if os.path.exists(save_path):
+            self._part_complete(save_path)
+            return
+        part_path = save_path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if size is not None and offset > size:  # 服务器上的文件变小了，重新下载
+            self._add_progress(-offset)
+            offset = 0
+        if size is None or offset < size:
+            logging.info(f"下载文件: {url}（从 {offset} 字节处开始）")
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            with self.session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code == 416 and offset:  # 已下载完整
+                    pass
+                else:
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:  # 服务器不支持 Range，从头下载
+                        self._add_progress(-offset)
+                        offset = 0
+                    offset = self.write_part(response, part_path, offset)
+        if size is not None and offset != size:
+            raise IOError(f"分卷大小不符: {url}，应为 {size} 字节，实际 {offset} 字节")
+        self._part_complete(save_path, part_path)
+        self.verify_part(save_path)
+        logging.info(f"下载完成: {save_path}")
+
+    def _part_complete(self, save_path, part_path=None):
+        with self._parts:  # 重命名和标记完成必须同时发生，解压线程才不会去读已不存在的 .part
+            if part_path is not None:
+                os.replace(part_path, save_path)
+            self.completed.add(save_path)
+            self.part_offsets.pop(save_path, None)
+            self._parts.notify_all()
+
+    def write_part(self, response, part_path, offset):
+        """写入 .part 文件；每次读取的大小随测得的速度调整：慢速连接小块读取，进度和边下边解压都及时，
+        快速连接大块读取，减少每块在 Python 层的开销"""
+        with self._parts:  # 从头重新下载时先让解压线程看到文件被截断
+            self.part_offsets[part_path[:-len(".part")]] = offset
+        chunk_size = DOWNLOAD_CHUNK_SIZE
+        with open(part_path, "ab" if offset else "wb") as file:
+            started = time.perf_counter()
+            while True:
+                if not self._is_running:  # 在读取前检查，已读到的数据都写入文件，续传时不必重新下载
+                    logging.info(f"下载中止，已保存 {offset} 字节: {part_path}")
+                    raise DownloadStopped(part_path)
+                chunk = response.raw.read(chunk_size, decode_content=True)
+                if not chunk:
+                    break
                 file.write(chunk)
+                file.flush()  # 解压线程从磁盘读取已下载的数据
+                offset += len(chunk)
+                with self._parts:
+                    self.part_offsets[part_path[:-len(".part")]] = offset
+                    self._parts.notify_all()
+                self._add_progress(len(chunk), received=True)
+                if self.limiter is not None:
+                    self.limiter.consume(len(chunk))
+                now = time.perf_counter()
+                if now > started:  # 每次最多翻倍，偶尔一块来得快不会一下子跳到最大
+                    wanted = int(len(chunk) / (now - started) * CHUNK_SECONDS)
+                    chunk_size = max(DOWNLOAD_CHUNK_SIZE, min(wanted, chunk_size * 2, MAX_CHUNK_SIZE))
+                started = now
+        return offset
 
-    def extract_with_7z(self, zip_file_path, output_folder):
-        """使用 7-Zip 解压分割文件"""
-        seven_zip_exe = os.path.join(JY_FOLDER, "7z.exe")
-        if not os.path.exists(seven_zip_exe):
-            raise FileNotFoundError(f"7z.exe 未找到，请检查路径: {seven_zip_exe}")
+    def _add_progress(self, count, received=False):
+        """累计已下载的字节数；received 为 True 时是刚从网络收到的，计入下载速度"""
+        with self._lock:
+            self.downloaded_bytes += count
+            if received:
+                self.received_bytes += count
+            now = time.monotonic()
+            complete = self.total_bytes is not None and self.downloaded_bytes >= self.total_bytes
+            if now - self._last_report >= PROGRESS_INTERVAL or complete:
+                self._report(now)
 
-        logging.info(f"使用 7-Zip 解压文件: {zip_file_path}")
-        command = [
-            seven_zip_exe,
-            "x",  # 解压命令
-            zip_file_path,  # 要解压的主文件
-            f"-o{output_folder}",  # 输出路径
-            "-mmt",  # 启用多线程
-            "-y"  # 自动回答 "yes"
-        ]
+    def flush_progress(self):
+        with self._lock:
+            self._report(time.monotonic())
 
-        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if process.returncode != 0:
-            raise RuntimeError(f"7-Zip 解压失败: {process.stderr}")
-        logging.info(f"解压完成: {output_folder}")
+    def _report(self, now):
+        """发出进度信号；每块都发会塞满界面线程的事件队列，所以最多每 PROGRESS_INTERVAL 秒一次"""
+        elapsed = now - self._last_report
+        if self._last_report and elapsed > 0:
+            speed = (self.received_bytes - self._reported_received) / elapsed
+            self.speed = speed if self.speed is None else SPEED_SMOOTHING * speed + (1 - SPEED_SMOOTHING) * self.speed
+        self._last_report = now
+        self._reported_received = self.received_bytes
+        eta = None
+        if self.total_bytes and self.speed:
+            eta = max(0, self.total_bytes - self.downloaded_bytes) / self.speed
+        self.transfer_progress.emit({"downloaded": self.downloaded_bytes, "total": self.total_bytes,
+                                     "speed": self.speed, "eta": eta})
+        if self.total_bytes:
+            percent = min(100, self.downloaded_bytes * 100 // self.total_bytes)
+            if percent != self._last_percent:
+                self._last_percent = percent
+                self.progress.emit(percent)
 
 
 class DocumentHandler:
     def __init__(self, browser, progress_bar):
         self.browser = browser
         self.progress_bar = progress_bar
-        self.resources = self.load_luj_json()
         self.download_links = self.load_wd_json()
-        self.download_thread = None  # 初始化线程对象
-
-    def load_luj_json(self):
-        """加载 luj.json 文件并解析路径为绝对路径"""
-        json_path = os.path.join(ZY_FOLDER, "luj.json")
-        logging.info(f"加载 luj.json 文件，路径: {json_path}")
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # 遍历资源并将相对路径转换为绝对路径
-                for category, subcategories in data.get("资源", {}).items():
-                    for subcategory, links in subcategories.items():
-                        if isinstance(links, list):
-                            # 将所有相对路径转为基于 EXTRACT_FOLDER 的绝对路径
-                            data["资源"][category][subcategory] = [
-                                os.fspath(os.path.abspath(os.path.join(EXTRACT_FOLDER, link))) for link in links
-                            ]
-                logging.info("成功加载并解析 luj.json 文件")
-                return data
-        else:
-            logging.error("luj.json 文件未找到")
-            return {}
+        self.catalog = Catalog.load(os.path.join(ZY_FOLDER, "luj.json"), CATALOG_CACHE_PATH)
+        self.catalog_model = CatalogModel(self.catalog)  # 导航树模型，展开时才加入子节点
+        self.refresh_availability()
+        self.limiter = RateLimiter(DOWNLOAD_RATE_LIMIT)
+        self.downloads = DownloadQueue(self.create_download)  # 排队下载的资源
+        self.downloads.progress.connect(self.on_download_progress)
+        self.downloads.transfer.connect(self.on_download_transfer)
+        self.downloads.file_extracted.connect(self.on_file_extracted)
+        self.downloads.finished.connect(self.on_download_finished)
+        self.downloads.cancelled.connect(self.on_download_cancelled)
+        self.download_progress = {}  # 资源键 -> 进度百分比（排队中为 QUEUED）
+        self.download_transfer = {}  # 资源键 -> 最近一次的字节数、速度和剩余时间
+        self.mirror_thread = None  # 正在镜像在线资源的线程
+        self.pending_document = None  # 等待下载解压后显示的文档
+        self.pending_key = None
+        self.archives = {}  # 资源键 -> 已打开的 ZipArchive
+        # 在这里导入 QtWebEngineCore，只用 DownloadThread 时不需要 QtWebEngine
+        from .doc_scheme import ArchiveSchemeHandler
+        self.scheme_handler = ArchiveSchemeHandler(self.open_archive)
+        self.browser.page().profile().installUrlSchemeHandler(DOC_SCHEME.encode(), self.scheme_handler)
+        self.verify_threads = {}  # 资源键 -> 正在后台校验的线程
+        self.verified_keys = set()  # 本次运行中已校验过的资源
+        self.search_index = DocSearchIndex(DOC_INDEX_PATH, EXTRACT_FOLDER)  # 已解压文档的全文索引
+        self.search_index.update()
 
     def load_wd_json(self):
         """加载 wd.json 文件"""
@@ -126,69 +431,226 @@ class DocumentHandler:
             logging.error("wd.json 文件未找到")
             return {}
 
-    def load_content(self, path, key=None):
-        """加载文档内容"""
-        absolute_path = os.path.join(EXTRACT_FOLDER, path)
-        logging.info(f"当前工作目录: {os.getcwd()}")
-        logging.info(f"尝试加载文档路径: {absolute_path}")
+    def archive_complete(self, key):
+        """资源的全部分卷都已下载完整（没有 .part 文件）"""
+        links = self.download_links.get("resources", {}).get(key)
+        return bool(links) and all(os.path.isfile(path) for path in segment_paths(links))
+
+    def open_archive(self, key):
+        """打开资源的压缩包，打开后缓存；分卷不完整或损坏时返回 None"""
+        archive = self.archives.get(key)
+        if archive is None and self.archive_complete(key):
+            try:
+                archive = ZipArchive(segment_paths(self.download_links["resources"][key]))
+            except (OSError, ValueError) as e:
+                logging.error(f"打开压缩包失败: {key}, 错误: {e}")
+                return None
+            logging.info(f"打开压缩包 {key}: {len(archive)} 个文件")
+            self.archives[key] = archive
+        return archive
+
+    def close_archive(self, key):
+        """重新下载前关闭映射，分卷文件才能被替换"""
+        archive = self.archives.pop(key, None)
+        if archive is not None:
+            archive.close()
 
+    def refresh_availability(self):
+        archived = {key for key in self.download_links.get("resources", {}) if self.archive_complete(key)}
+        self.catalog_model.refresh_availability(EXTRACT_FOLDER, archived)
+
+    def open_document(self, path, key=None):
+        """显示文档：已解压的文件直接打开，否则从下载好的压缩包中读取；都没有时返回 False"""
+        absolute_path = os.path.join(EXTRACT_FOLDER, path)
         if os.path.exists(absolute_path):
             logging.info(f"加载本地文档: {absolute_path}")
-            content = self.read_file(absolute_path)
-            if content.strip():  # 检查内容是否为空
-                self.browser.setHtml(content, baseUrl=QUrl.fromLocalFile(absolute_path))
-            else:
-                self.browser.setHtml("<h1>文档内容为空</h1>")
-        else:
-            logging.warning(f"文档未找到: {absolute_path}")
-            self.browser.setHtml("<h1>文件未找到，尝试下载中...</h1>")
+            self.browser.setUrl(QUrl.fromLocalFile(absolute_path))
             if key:
-                self.download_and_extract(key)
-            else:
-                self.browser.setHtml("<h1>文档未找到</h1>")
+                self.verify_in_background(key)
+            return True
+        name = os.path.relpath(absolute_path, EXTRACT_FOLDER).replace(os.sep, "/")
+        archive = self.open_archive(key) if key else None
+        if archive is not None and name in archive:
+            from .doc_scheme import archive_url
+            logging.info(f"从压缩包加载文档: {key}/{name}")
+            self.browser.setUrl(archive_url(key, name))
+            return True
+        return False
 
-    def read_file(self, path):
-        """读取文件内容"""
-        try:
-            with open(path, "r", encoding="utf-8") as file:
-                content = file.read()
-                logging.info(f"读取文件内容: {content[:500]}")  # 仅打印前500字符，避免日志过长
-                return content
-        except Exception as e:
-            logging.error(f"读取文件出错: {path}, 错误: {e}")
-            return f"<h1>无法加载文档: {path}</h1>"
+    def load_content(self, path, key=None):
+        """加载文档，本地没有时下载"""
+        logging.info(f"尝试加载文档: {path}")
+        if self.open_document(path, key):
+            self.pending_document = self.pending_key = None  # 之前等待下载的文档不再自动打开
+            return
+        absolute_path = os.path.join(EXTRACT_FOLDER, path)
+        logging.warning(f"文档未找到: {absolute_path}")
+        if key:
+            self.browser.setHtml("<h1>文件未找到，尝试下载中...</h1>")
+            self.pending_document = os.path.normcase(os.path.abspath(absolute_path))
+            self.pending_key = key
+            self.download_and_extract(key)
+        else:
+            self.browser.setHtml("<h1>文档未找到</h1>")
 
-    def download_and_extract(self, key):
-        """异步下载并解压资源"""
+    def load_url(self, url):
+        """在线资源已镜像时打开本地副本，否则在浏览器中在线打开"""
+        self.pending_document = self.pending_key = None
+        path = mirrored_page(url)
+        if path is not None:
+            logging.info(f"打开离线镜像: {path}")
+            self.browser.setUrl(QUrl.fromLocalFile(path))
+            return
+        logging.info(f"打开在线资源: {url}")
+        self.browser.setUrl(QUrl(url))
+
+    def mirror_site(self, url):
+        """在后台把在线资源镜像到本地；已镜像过时只重新下载有变化的文件"""
+        if self.mirror_thread and self.mirror_thread.isRunning():
+            logging.warning(f"正在镜像 {self.mirror_thread.url}，请稍后再试")
+            return
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        self.progress_bar.show()
+        self.mirror_thread = MirrorThread(url)
+        self.mirror_thread.progress.connect(self.progress_bar.setValue)
+        self.mirror_thread.finished.connect(self.on_mirror_finished)
+        self.mirror_thread.start()
+
+    def on_mirror_finished(self, url, path, error):
+        self.update_progress_bar()
+        if error:
+            self.browser.setHtml(f"<h1>镜像失败: {error}</h1>")
+            return
+        self.search_index.update()  # 镜像放在解压目录中，一并加入全文索引
+        self.browser.setUrl(QUrl.fromLocalFile(path))
+
+    def verify_in_background(self, key):
+        """每次运行第一次打开某个资源时，在后台检查解压出的文档是否完整"""
+        if key in self.verified_keys or key in self.verify_threads:
+            return
+        manifest = Manifest.load(key)
+        if manifest is None or not manifest.files:
+            return
+        thread = VerifyThread(key, manifest, EXTRACT_FOLDER)
+        thread.verified.connect(self.on_verified)
+        self.verify_threads[key] = thread
+        thread.start()
+
+    def on_verified(self, key, report):
+        thread = self.verify_threads.pop(key, None)
+        if thread is not None:
+            thread.wait()
+        self.verified_keys.add(key)
+        if report["missing"] or report["corrupt"]:
+            logging.warning(f"资源 {key} 的文档不完整（缺失 {len(report['missing'])} 个，"
+                            f"损坏 {len(report['corrupt'])} 个），重新解压")
+            self.download_and_extract(key, show_message=False)
+
+    def download_and_extract(self, key, show_message=True):
+        """把资源加入下载队列；show_message 为 False 时在后台修复，排在用户点击的资源之后，也不替换正在显示的文档"""
         if key not in self.download_links.get("resources", {}):
             logging.error(f"资源 {key} 的下载链接未找到。")
             self.browser.setHtml(f"<h1>资源未找到: {key}</h1>")
             return
+        if key not in self.downloads:
+            self.close_archive(key)
+        if show_message:
+            self.browser.setHtml("<h1>下载中，请稍后...</h1>")
+        self.downloads.enqueue(key, FOREGROUND if show_message else BACKGROUND)
 
-        links = self.download_links["resources"][key]
-        self.progress_bar.setValue(0)
+    def create_download(self, key):
+        return DownloadThread(key, self.download_links["resources"][key], limiter=self.limiter)
+
+    def cancel_download(self, key):
+        self.downloads.cancel(key)
+
+    def on_download_progress(self, key, percent):
+        self.download_progress[key] = percent
+        self.catalog_model.set_download_progress(key, percent)
+        self.update_progress_bar()
+
+    def update_progress_bar(self):
+        """进度条显示正在等待的资源的进度；没有等待的文档时显示最早开始的下载"""
+        if not self.download_progress:
+            self.progress_bar.hide()
+            return
+        key = self.pending_key if self.pending_key in self.download_progress else next(iter(self.download_progress))
+        self.progress_bar.setValue(max(self.download_progress[key], 0))
+        self.progress_bar.setFormat(self.progress_text(key))
         self.progress_bar.show()
-        self.browser.setHtml("<h1>下载中，请稍后...</h1>")
 
-        self.download_thread = DownloadThread(key, links)
-        self.download_thread.progress.connect(self.progress_bar.setValue)
-        self.download_thread.finished.connect(self.on_download_finished)
-        self.download_thread.start()
+    def progress_text(self, key):
+        """进度条上的文字：百分比、已下载/总大小、速度和剩余时间"""
+        info = self.download_transfer.get(key)
+        if self.download_progress[key] < 0:  # 排队中，或让位后等待续传
+            return f"{key}: 排队中"
+        if info is None:
+            return f"{key}: %p%"
+        text = f"{key}: %p%  {format_size(info['downloaded'])}"
+        if info["total"]:
+            text += f" / {format_size(info['total'])}"
+        if info["speed"]:
+            text += f"  {format_size(info['speed'])}/s"
+        if info["eta"] is not None:
+            text += f"  剩余 {format_eta(info['eta'])}"
+        return text
+
+    def on_download_transfer(self, key, info):
+        self.download_transfer[key] = info
+        if key in self.download_progress:
+            self.update_progress_bar()
+
+    def download_ended(self, key):
+        self.download_progress.pop(key, None)
+        self.download_transfer.pop(key, None)
+        self.catalog_model.set_download_progress(key, None)
+        self.update_progress_bar()
 
-    def on_download_finished(self, extract_path, error):
-        """处理下载完成"""
-        self.progress_bar.hide()
+    def on_file_extracted(self, key, path):
+        """边下载边解压：要看的文档一解压出来就显示，不等整个压缩包"""
+        if key == self.pending_key and self.pending_document \
+                and os.path.normcase(os.path.abspath(path)) == self.pending_document:
+            self.pending_document = None
+            self.load_content(path)
+
+    def on_download_finished(self, key, extract_path, error):
+        """某个资源下载完成；只有用户正在等的资源才打开文档或显示错误"""
+        self.download_ended(key)
+        waiting = key == self.pending_key
+        if waiting:
+            document = self.pending_document
+            self.pending_document = self.pending_key = None
         if error:
-            logging.error(f"下载失败: {error}")
-            self.browser.setHtml(f"<h1>下载失败: {error}</h1>")
-        else:
-            logging.info(f"下载完成，解压路径: {extract_path}")
-            self.browser.setHtml("<h1>解压完成，加载内容中...</h1>")
-            self.load_content(self.resources["资源"]["Java"]["Java_8"][0])
+            logging.error(f"资源 {key} 下载失败: {error}")
+            if waiting:
+                self.browser.setHtml(f"<h1>下载失败: {error}</h1>")
+            return
+        logging.info(f"资源 {key} 下载完成，解压路径: {extract_path}")
+        self.search_index.update()  # 新解压的文档加入全文索引
+        self.refresh_availability()
+        if not waiting or document is None:  # 解压过程中已经显示
+            return
+        if not self.open_document(document, key):
+            self.browser.setHtml("<h1>文档未找到</h1>")
+
+    def on_download_cancelled(self, key):
+        self.download_ended(key)
+        if key == self.pending_key:
+            self.pending_document = self.pending_key = None
+            self.browser.setHtml("<h1>下载已取消</h1>")
 
     def cleanup(self):
         """释放资源"""
-        if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.stop()
-            self.download_thread.wait()
+        for thread in list(self.verify_threads.values()):
+            thread.stop()
+            thread.wait()
+        self.downloads.stop_all()
+        if self.mirror_thread and self.mirror_thread.isRunning():
+            self.mirror_thread.stop()
+            self.mirror_thread.wait()
+        self.search_index.close()
+        self.catalog_model.stop()
+        for key in list(self.archives):
+            self.close_archive(key)
         logging.info("清理完成，安全退出")
@@ -0,0 +1,324 @@
+# catalog.py
+import os
+import json
+import logging
+import posixpath
+from urllib.parse import urlparse
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex, QThread, Signal
+from PySide6.QtGui import QBrush, QColor
+from .integrity import atomic_write_json
+from .nav_filter import NODE_ROLE, RESOURCE_ROLE, match_keys, lazy_pinyin
+from .download_queue import QUEUED
+
+CATALOG_VERSION = 1
+REMOTE_SCHEMES = ("http", "https")
+
+CATEGORY = "category"
+LOCAL = "local"  # 解压目录中的文档，link 为相对于解压目录的路径（/ 分隔）
+REMOTE = "remote"  # 在线网页，link 为 URL
+
+UNAVAILABLE_BRUSH = QBrush(QColor("gray"))
+
+
+def classify_link(link):
+    """返回 (类型, 链接)：URL 原样保留，本地路径规范化为相对于解压目录的 / 分隔路径"""
+    if urlparse(link).scheme.lower() in REMOTE_SCHEMES:
+        return REMOTE, link
+    return LOCAL, posixpath.normpath(link.replace("\\", "/"))
+
+
+class CatalogNode:
+    __slots__ = ("parent", "row", "name", "kind", "link", "keys", "children", "available")
+
+    def __init__(self, parent, name, kind, link, keys):
+        self.parent = parent  # 父节点序号，顶层为 -1
+        self.row = 0  # 在父节点中的行号
+        self.name = name
+        self.kind = kind
+        self.link = link
+        self.keys = keys  # 预先小写的匹配键，见 nav_filter.match_keys
+        self.children = []
+        self.available = kind == REMOTE  # 本地文档在扫描解压目录后更新
+
+    def resource_info(self):
+        if self.kind == CATEGORY:
+            return None
+        # 叶子节点的名称就是 wd.json 中的键
+        return {"path": self.link, "key": self.name, "remote": self.kind == REMOTE}
+
+
+class Catalog:
+    """编译后的资源目录：luj.json 展开成按先序排列的扁平节点列表
+
+    编译结果缓存在磁盘上，luj.json 的大小和修改时间都没变时直接读取缓存，
+    不再重新解析、分类链接和计算拼音匹配键。
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.roots = [node_id for node_id, node in enumerate(nodes) if node.parent < 0]
+        self._by_key = None  # 资源键 -> 本地文档节点序号，第一次用到时建立
+        for siblings in [self.roots] + [node.children for node in nodes]:
+            for row, node_id in enumerate(siblings):
+                nodes[node_id].row = row
+
+    @classmethod
+    def compile(cls, resources):
+        nodes = []
+
+        def add_children(parent, subcategories):
+            for name, links in subcategories.items():
+                if isinstance(links, dict):
+                    kind, link = CATEGORY, None
+                else:
+                    # links 是一个列表，第一个元素是文件路径或网址
+                    kind, link = classify_link(links[0]) if links else (LOCAL, "")
+                node_id = len(nodes)
+                nodes.append(CatalogNode(parent, name, kind, link, match_keys(name)))
+                if parent >= 0:
+                    nodes[parent].children.append(node_id)
+                if kind == CATEGORY:
+                    add_children(node_id, links)
+
+        add_children(-1, resources)
+        return cls(nodes)
+
+    @classmethod
+    def load(cls, source_path, cache_path):
+        """读取 luj.json 的编译结果，缓存失效时重新编译并保存"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            logging.error(f"资源目录文件未找到: {source_path}")
+            return cls([])
+        source = [stat.st_size, stat.st_mtime_ns]
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION and data.get("source") == source \
+                    and data.get("pinyin") == (lazy_pinyin is not None):
+                return cls.from_rows(data["nodes"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        with open(source_path, "r", encoding="utf-8") as f:
+            catalog = cls.compile(json.load(f).get("资源", {}))
+        logging.info(f"编译资源目录: {len(catalog.nodes)} 个节点")
+        try:
+            atomic_write_json(cache_path, {
+                "version": CATALOG_VERSION,
+                "source": source,
+                "pinyin": lazy_pinyin is not None,
+                "nodes": catalog.to_rows(),
+            })
+        except OSError as e:
+            logging.warning(f"保存资源目录缓存失败: {e}")
+        return catalog
+
+    def to_rows(self):
+        return [[node.parent, node.name, node.kind, node.link, list(node.keys)] for node in self.nodes]
+
+    @classmethod
+    def from_rows(cls, rows):
+        nodes = []
+        for parent, name, kind, link, keys in rows:
+            nodes.append(CatalogNode(parent, name, kind, link, tuple(keys)))
+            if parent >= 0:
+                nodes[parent].children.append(len(nodes) - 1)
+        return cls(nodes)
+
+    def local_paths(self):
+        return {node.link for node in self.nodes if node.kind == LOCAL}
+
+    def key_nodes(self, key):
+        """属于某个资源的本地文档节点"""
+        if self._by_key is None:
+            self._by_key = {}
+            for node_id, node in enumerate(self.nodes):
+                if node.kind == LOCAL:
+                    self._by_key.setdefault(node.name, []).append(node_id)
+        return self._by_key.get(key, ())
+
+    def update_available(self, present, archived=()):
+        """根据扫描到的本地文档和分卷已下载完整的资源键更新 available，返回状态变化的节点序号"""
+        changed = []
+        for node_id, node in enumerate(self.nodes):
+            if node.kind == LOCAL and (node.link in present or node.name in archived) != node.available:
+                node.available = not node.available
+                changed.append(node_id)
+        return changed
+
+
+class AvailabilityScanner(QThread):
+    """后台遍历一次解压目录，找出目录中哪些本地文档已经存在"""
+    scanned = Signal(object)  # 信号：已存在的文档路径集合（相对于解压目录，/ 分隔）
+
+    def __init__(self, root, wanted):
+        super().__init__()
+        self.root = root
+        self.wanted = wanted
+
+    def run(self):
+        present = set()
+        try:
+            inside = {}  # 大小写规范化后的路径 -> 目录中的写法
+            for link in self.wanted:
+                if link == ".." or link.startswith("../"):  # 不在解压目录中，单独检查
+                    if os.path.isfile(os.path.join(self.root, *link.split("/"))):
+                        present.add(link)
+                else:
+                    inside[os.path.normcase(link)] = link
+            if inside and os.path.isdir(self.root):
+                for folder, _, names in os.walk(self.root):
+                    relative = os.path.relpath(folder, self.root).replace(os.sep, "/")
+                    prefix = "" if relative == "." else relative + "/"
+                    for name in names:
+                        link = inside.get(os.path.normcase(prefix + name))
+                        if link is not None:
+                            present.add(link)
+        except Exception as e:
+            logging.error(f"扫描本地文档失败: {e}")
+        self.scanned.emit(present)
+
+
+class CatalogModel(QAbstractItemModel):
+    """资源目录的树模型：子节点在第一次展开时才加入（canFetchMore / fetchMore）
+
+    内部索引的 internalId 就是节点序号，不为每个节点创建 Qt 对象。
+    """
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.fetched = {-1: len(catalog.roots)}  # 节点序号 -> 已加入模型的子节点数
+        self.downloads = {}  # 资源键 -> 下载进度百分比（排队中为 QUEUED）
+        self.scanner = None
+        self._scan_again = None  # 扫描期间再次请求时记下参数，本轮结束后再扫描一次
+
+    def _children(self, node_id):
+        return self.catalog.roots if node_id < 0 else self.catalog.nodes[node_id].children
+
+    def _node_id(self, index):
+        return index.internalId() if index.isValid() else -1
+
+    def child_id(self, row, parent):
+        """父索引下第 row 个子节点的序号"""
+        return self._children(parent.internalId() if parent.isValid() else -1)[row]
+
+    def index(self, row, column, parent=QModelIndex()):
+        parent_id = self._node_id(parent)
+        if column != 0 or not 0 <= row < self.fetched.get(parent_id, 0):
+            return QModelIndex()
+        return self.createIndex(row, column, self._children(parent_id)[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_id = self.catalog.nodes[index.internalId()].parent
+        if parent_id < 0:
+            return QModelIndex()
+        return self.createIndex(self.catalog.nodes[parent_id].row, 0, parent_id)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return self.fetched.get(self._node_id(parent), 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return bool(self._children(self._node_id(parent)))
+
+    def canFetchMore(self, parent):
+        node_id = self._node_id(parent)
+        return self.fetched.get(node_id, 0) < len(self._children(node_id))
+
+    def fetchMore(self, parent):
+        node_id = self._node_id(parent)
+        count = len(self._children(node_id))
+        start = self.fetched.get(node_id, 0)
+        if start >= count:
+            return
+        self.beginInsertRows(parent, start, count - 1)
+        self.fetched[node_id] = count
+        self.endInsertRows()
+
+    def node_index(self, node_id):
+        """返回节点的索引，沿途未加入模型的祖先会先加入"""
+        if node_id < 0:
+            return QModelIndex()
+        node = self.catalog.nodes[node_id]
+        parent = self.node_index(node.parent)
+        if self.canFetchMore(parent):
+            self.fetchMore(parent)
+        return self.index(node.row, 0, parent)
+
+    def expandable_index(self, node_id):
+        """返回节点的索引，并把它的子节点加入模型，程序展开节点时立即可见"""
+        index = self.node_index(node_id)
+        if self.canFetchMore(index):
+            self.fetchMore(index)
+        return index
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = self.catalog.nodes[index.internalId()]
+        if role == Qt.DisplayRole:
+            percent = self.downloads.get(node.name) if node.kind == LOCAL else None
+            if percent is None:
+                return node.name
+            return f"{node.name}（排队中）" if percent == QUEUED else f"{node.name}（{percent}%）"
+        if role == NODE_ROLE:
+            return index.internalId()
+        if role == RESOURCE_ROLE:
+            return node.resource_info()
+        if role == Qt.ForegroundRole and node.kind == LOCAL and not node.available:
+            return UNAVAILABLE_BRUSH
+        if role == Qt.ToolTipRole:
+            if node.kind == REMOTE:
+                return node.link
+            if node.kind == LOCAL:
+                return node.link if node.available else f"{node.link}（未下载，打开时自动下载）"
+        return None
+
+    def refresh_availability(self, root, archived=()):
+        """在后台扫描解压目录，更新各文档是否已在本地（已解压，或 archived 中的资源压缩包已下载完整）；
+        正在扫描时等本轮结束后再来一轮"""
+        if self.scanner is not None and self.scanner.isRunning():
+            self._scan_again = (root, archived)
+            return
+        self.scanner = AvailabilityScanner(root, self.catalog.local_paths())
+        self.scanner.scanned.connect(lambda present: self.on_scanned(present, archived))
+        self.scanner.start()
+
+    def _node_changed(self, node_id, roles):
+        node = self.catalog.nodes[node_id]
+        if node.row < self.fetched.get(node.parent, 0):  # 还没展开过的节点不必通知
+            index = self.index(node.row, 0, self.node_index(node.parent))
+            self.dataChanged.emit(index, index, roles)
+
+    def set_download_progress(self, key, percent):
+        """在资源的文档节点后显示下载进度；percent 为 None 时恢复原名"""
+        if percent is None:
+            if self.downloads.pop(key, None) is None:
+                return
+        elif self.downloads.get(key) == percent:
+            return
+        else:
+            self.downloads[key] = percent
+        for node_id in self.catalog.key_nodes(key):
+            self._node_changed(node_id, [Qt.DisplayRole])
+
+    def on_scanned(self, present, archived):
+        for node_id in self.catalog.update_available(present, archived):
+            self._node_changed(node_id, [Qt.ForegroundRole, Qt.ToolTipRole])
+        if self._scan_again:
+            args, self._scan_again = self._scan_again, None
+            self.scanner.wait()
+            self.refresh_availability(*args)
+
+    def stop(self):
+        if self.scanner is not None:
+            self.scanner.wait()
@@ -9,3 +9,22 @@ DOWNLOAD_FOLDER = os.path.join(base_dir, "downloads")
 EXTRACT_FOLDER = os.path.join(base_dir, "extracted")
 JY_FOLDER = os.path.join(base_dir, "jy")
 ZY_FOLDER = os.path.join(base_dir, "zy")
+MANIFEST_FOLDER = os.path.join(ZY_FOLDER, "manifests")  # 随程序发布的完整性清单
+VERIFY_STATE_FOLDER = os.path.join(base_dir, "verify_state")  # 本地生成的清单和上次校验的状态
+DOC_INDEX_PATH = os.path.join(base_dir, "doc_index", "docs.sqlite3")  # 知识库文档的全文索引
+CATALOG_CACHE_PATH = os.path.join(base_dir, "doc_index", "catalog.json")  # luj.json 的编译结果
+
+# 下载设置
+DOWNLOAD_CONNECTIONS = 4  # 每个资源同时下载的分卷数
+MAX_ACTIVE_DOWNLOADS = 2  # 同时下载的资源数，其余排队
+DOWNLOAD_RATE_LIMIT = 0  # 全部下载合计的速度上限（字节/秒），0 表示不限速
+EXTRACT_ARCHIVES = True  # 下载后是否解压；为 False 时只保留压缩包，文档直接从压缩包中读取（不能全文搜索）
+
+# 在线资源的离线镜像，放在解压目录中，同样可以全文搜索
+MIRROR_FOLDER = os.path.join(EXTRACT_FOLDER, "mirror")
+MIRROR_CONNECTIONS = 4  # 镜像时同时下载的连接数
+MIRROR_MAX_PAGES = 300  # 每个站点最多镜像的页面数（不含样式、图片等资源）
+MIRROR_MAX_DEPTH = 3  # 从起始页出发最多跟随几层链接
+
+# 浏览器中从压缩包读取文档使用的协议
+DOC_SCHEME = "zsku-doc"
@@ -0,0 +1,105 @@
+# doc_scheme.py
+import logging
+import mimetypes
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QThreadPool, QUrl, Signal
+from PySide6.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+from .config import DOC_SCHEME
+
+READ_THREADS = 4  # 从压缩包读取、解压条目的线程数
+
+
+def register_scheme():
+    """注册文档协议；必须在创建第一个 QWebEngineView / QWebEngineProfile 之前调用
+
+    QtWebEngine 初始化时锁定已注册的协议，之后注册无效。不必在创建 QApplication 之前注册，
+    所以启动时不用导入 QtWebEngineCore，第一次打开知识库时再注册。
+
+    协议使用 Path 语法（zsku-doc:/资源键/压缩包内路径），页面中的相对链接、样式和脚本
+    按普通 URL 规则解析，同样由本协议提供。
+    """
+    scheme = QWebEngineUrlScheme(DOC_SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+                    | QWebEngineUrlScheme.Flag.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def archive_url(key, name):
+    url = QUrl()
+    url.setScheme(DOC_SCHEME)
+    url.setPath(f"/{key}/{name}")
+    return url
+
+
+def guess_type(name):
+    if name.lower().endswith((".html", ".htm")):
+        return "text/html"
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+class ArchiveReadSignals(QObject):
+    finished = Signal(int, object, str)  # 信号：读取完成（请求序号，内容或 None，错误信息）
+
+
+class ArchiveReadTask(QRunnable):
+    """在线程池中读取并解压压缩包中的一个条目"""
+
+    def __init__(self, request_id, archive, name, signals):
+        super().__init__()
+        self.request_id = request_id
+        self.archive = archive
+        self.name = name
+        self.signals = signals
+
+    def run(self):
+        try:
+            content, error = self.archive.read(self.name), ""
+        except Exception as e:  # 包括 CRC 错误，以及读取期间压缩包被关闭
+            content, error = None, str(e)
+        self.signals.finished.emit(self.request_id, content, error)
+
+
+class ArchiveSchemeHandler(QWebEngineUrlSchemeHandler):
+    """直接从下载的压缩包中读取页面和资源文件返回给浏览器，不需要先解压
+
+    open_archive(资源键) 返回对应的 ZipArchive，压缩包不完整时返回 None。
+    读取和解压在线程池中进行，完成后通过信号回到 GUI 线程答复请求；
+    请求在此之前被取消（job 已销毁）时丢弃读取结果。
+    """
+
+    def __init__(self, open_archive, parent=None):
+        super().__init__(parent)
+        self.open_archive = open_archive
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(READ_THREADS)
+        self.signals = ArchiveReadSignals(self)  # 属于 GUI 线程，工作线程发出的信号排队送达
+        self.signals.finished.connect(self.on_read)
+        self.jobs = {}  # 请求序号 -> (job, 资源键, 压缩包内路径)
+        self._next_id = 0
+
+    def requestStarted(self, job):
+        key, _, name = job.requestUrl().path().lstrip("/").partition("/")
+        archive = self.open_archive(key)
+        if archive is None or name not in archive:
+            logging.warning(f"压缩包中没有找到: {key}/{name}")
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        self._next_id += 1
+        request_id = self._next_id
+        self.jobs[request_id] = (job, key, name)
+        job.destroyed.connect(lambda: self.jobs.pop(request_id, None))
+        self.pool.start(ArchiveReadTask(request_id, archive, name, self.signals))
+
+    def on_read(self, request_id, content, error):
+        entry = self.jobs.pop(request_id, None)
+        if entry is None:  # 请求已取消
+            return
+        job, key, name = entry
+        if content is None:
+            logging.error(f"从压缩包读取失败: {key}/{name}, 错误: {error}")
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+        buffer = QBuffer(job)  # 请求结束时随 job 一起释放
+        buffer.setData(QByteArray(content))
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(guess_type(name).encode(), buffer)
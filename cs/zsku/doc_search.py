@@ -0,0 +1,193 @@
+# doc_search.py
+import os
+import re
+import html
+import sqlite3
+import logging
+from PySide6.QtCore import QObject, QThread, Signal
+from text_search import QUERY_PATTERN, build_query, join_cjk, make_snippet, segment_cjk
+
+INDEX_EXTENSIONS = (".html", ".htm")
+COMMIT_INTERVAL = 500  # 每索引多少个文档提交一次，中途退出时已索引的部分不会丢失
+SEARCH_LIMIT = 50
+TITLE_WEIGHT = 10.0  # 排序时标题命中的权重
+DROP_PATTERN = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+
+def html_to_text(markup):
+    """去掉脚本、样式和标签，返回 (标题, 正文)；用正则而不是 HTMLParser，索引大文档集时快一个数量级"""
+    match = TITLE_PATTERN.search(markup)
+    title = html.unescape(TAG_PATTERN.sub(" ", match.group(1))).strip() if match else ""
+    body = TAG_PATTERN.sub(" ", DROP_PATTERN.sub(" ", markup))
+    return SPACE_PATTERN.sub(" ", title), SPACE_PATTERN.sub(" ", html.unescape(body)).strip()
+
+
+def connect(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")  # 后台索引时界面线程仍可查询
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class DocIndexer(QThread):
+    """后台线程：扫描解压目录，只索引新增或大小、修改时间变化的 HTML，删除已不存在的文档"""
+    indexed = Signal(int, int)  # 信号：本次新索引的文档数、删除的文档数
+
+    def __init__(self, db_path, root):
+        super().__init__()
+        self.db_path = db_path
+        self.root = root
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        added = removed = 0
+        try:
+            conn = connect(self.db_path)
+            known = {path: (doc_id, size, mtime_ns)
+                     for doc_id, path, size, mtime_ns in conn.execute("SELECT id, path, size, mtime_ns FROM docs")}
+            seen = set()
+            for path, stat in self.scan():
+                if not self._is_running:
+                    break
+                relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+                seen.add(relative)
+                current = known.get(relative)
+                if current is not None and current[1:] == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                if self.index_file(conn, path, relative, stat, current[0] if current else None):
+                    added += 1
+                    if added % COMMIT_INTERVAL == 0:
+                        conn.commit()
+            if self._is_running:
+                for relative, (doc_id, _, _) in known.items():
+                    if relative not in seen:
+                        conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+                        conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+                        removed += 1
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f"索引知识库文档失败: {e}")
+        logging.info(f"知识库全文索引更新完成：新索引 {added} 个文档，删除 {removed} 个")
+        self.indexed.emit(added, removed)
+
+    def scan(self):
+        if not os.path.isdir(self.root):
+            return
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if name.lower().endswith(INDEX_EXTENSIONS):
+                    path = os.path.join(folder, name)
+                    try:
+                        yield path, os.stat(path)
+                    except OSError:
+                        continue
+
+    def index_file(self, conn, path, relative, stat, doc_id):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                title, body = html_to_text(f.read())
+        except OSError as e:
+            logging.warning(f"读取文档失败: {path}, 错误: {e}")
+            return False
+        if doc_id is None:
+            doc_id = conn.execute("INSERT INTO docs (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                  (relative, stat.st_size, stat.st_mtime_ns)).lastrowid
+        else:
+            conn.execute("UPDATE docs SET size = ?, mtime_ns = ? WHERE id = ?", (stat.st_size, stat.st_mtime_ns, doc_id))
+            conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+        conn.execute("INSERT INTO docs_fts (rowid, title, body) VALUES (?, ?, ?)",
+                     (doc_id, segment_cjk(title or os.path.basename(path)), segment_cjk(body)))
+        return True
+
+
+class DocSearchIndex(QObject):
+    """知识库文档的全文索引（SQLite FTS5，保存词的位置），按 BM25 排序并返回摘要
+
+    索引持久保存在磁盘上，启动和每次解压新的文档集后在后台增量更新。
+    """
+    updated = Signal(int, int)  # 信号：后台索引完成（新索引的文档数、删除的文档数）
+
+    def __init__(self, db_path, root, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.root = root
+        self.conn = connect(db_path)
+        self.indexer = None
+        self._update_again = False
+
+    def update(self):
+        """在后台增量更新索引；正在更新时等本轮结束后再来一轮"""
+        if self.indexer is not None and self.indexer.isRunning():
+            self._update_again = True
+            return
+        self.indexer = DocIndexer(self.db_path, self.root)
+        self.indexer.indexed.connect(self.on_indexed)
+        self.indexer.start()
+
+    def on_indexed(self, added, removed):
+        self.updated.emit(added, removed)
+        if self._update_again:
+            self._update_again = False
+            self.indexer.wait()
+            self.update()
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """返回 [(绝对路径, 标题, 摘要)]，最相关的在前；摘要中的命中词用【】标出
+
+        先取标题命中的文档，再对全部命中的文档按 BM25 排序；
+        摘要只为最终返回的文档生成。
+        """
+        query = build_query(text)
+        if not query:
+            return []
+        try:
+            title_hits = self.conn.execute(
+                "SELECT rowid FROM docs_fts WHERE docs_fts MATCH ? ORDER BY bm25(docs_fts, ?, 1.0) LIMIT ?",
+                (f"title : ({query})", TITLE_WEIGHT, limit)
+            ).fetchall()
+            body_hits = self.conn.execute(
+                "SELECT rowid FROM docs_fts WHERE docs_fts MATCH ? ORDER BY bm25(docs_fts, ?, 1.0) LIMIT ?",
+                (query, TITLE_WEIGHT, limit)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logging.warning(f"全文搜索失败: {query}, 错误: {e}")
+            return []
+        doc_ids = list(dict.fromkeys(doc_id for doc_id, in title_hits + body_hits))[:limit]
+        terms = QUERY_PATTERN.findall(text)
+        results = []
+        for doc_id in doc_ids:
+            row = self.conn.execute(
+                "SELECT docs.path, docs_fts.title, docs_fts.body FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid "
+                "WHERE docs_fts.rowid = ?", (doc_id,)
+            ).fetchone()
+            if row is not None:
+                path, title, body = row
+                results.append((os.path.join(self.root, *path.split("/")), join_cjk(title), make_snippet(body, terms)))
+        return results
+
+    def close(self):
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+        self.conn.close()
@@ -0,0 +1,161 @@
+# download_queue.py
+import time
+import logging
+import itertools
+import threading
+from PySide6.QtCore import QObject, Signal
+from .config import MAX_ACTIVE_DOWNLOADS
+
+FOREGROUND = 0  # 用户正在等着看的资源
+BACKGROUND = 1  # 后台修复等，不急
+QUEUED = -1  # progress 信号中表示排队等待
+
+
+class RateLimiter:
+    """所有下载线程共享的令牌桶，限制总下载速度；rate（字节/秒）为 0 时不限速
+
+    令牌不够时记为欠账，调用方按欠账睡眠，之后来的线程看到更多欠账，睡得更久，
+    各线程大致平分带宽。
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(rate // 4, 64 * 1024)  # 最多攒 0.25 秒的突发量
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, count):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate) - count
+            self.updated = now
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+class DownloadQueue(QObject):
+    """资源下载调度：多个资源排队，同时最多下载 max_active 个
+
+    - 排序键为 (优先级, 序号)：前台请求中最近点击的排最前，后台请求先来先下
+    - 名额已满时，前台请求让排序最靠后的下载让位：它停下后重新排队，已下载的分卷保留为 .part，轮到时续传
+    - 每个资源单独报告进度，可以单独取消
+    """
+    progress = Signal(str, int)  # 信号：资源键，百分比（排队中为 QUEUED）
+    transfer = Signal(str, object)  # 信号：资源键，字节数、速度和剩余时间，见 DownloadThread.transfer_progress
+    file_extracted = Signal(str, str)  # 信号：资源键，已解压的文件
+    finished = Signal(str, str, str)  # 信号：资源键，解压路径，错误消息
+    cancelled = Signal(str)  # 信号：资源键，下载已取消
+
+    def __init__(self, create_thread, max_active=MAX_ACTIVE_DOWNLOADS, parent=None):
+        super().__init__(parent)
+        self.create_thread = create_thread  # create_thread(资源键) 返回未启动的 DownloadThread
+        self.max_active = max_active
+        self.waiting = {}  # 资源键 -> 排序键
+        self.active = {}  # 资源键 -> (线程, 排序键)
+        self.stopping = {}  # 资源键 -> 被取消或让位、正在停下的线程
+        self._order = itertools.count()
+
+    def __contains__(self, key):
+        return key in self.waiting or key in self.active
+
+    def is_idle(self):
+        return not (self.waiting or self.active or self.stopping)
+
+    def enqueue(self, key, priority=BACKGROUND):
+        """加入队列；已在队列中或正在下载时只提高排序"""
+        order = next(self._order)
+        rank = (priority, -order if priority == FOREGROUND else order)
+        if key in self.active:
+            thread, old = self.active[key]
+            self.active[key] = (thread, min(old, rank))
+            return
+        old = self.waiting.get(key)
+        self.waiting[key] = rank if old is None else min(old, rank)
+        if old is None:
+            self.progress.emit(key, QUEUED)
+        self._schedule()
+
+    def cancel(self, key):
+        """取消排队或正在进行的下载；正在下载的线程停下后发出 cancelled"""
+        if self.waiting.pop(key, None) is not None and key not in self.stopping:
+            self.cancelled.emit(key)
+        if key in self.active:
+            self._stop(key)
+
+    def stop_all(self):
+        """退出程序时停止全部下载并等待线程结束"""
+        self.waiting.clear()
+        threads = [thread for thread, _ in self.active.values()] + list(self.stopping.values())
+        self.active.clear()
+        self.stopping.clear()
+        for thread in threads:
+            thread.stop()
+        for thread in threads:
+            thread.wait()
+
+    def _stop(self, key, requeue=False):
+        thread, rank = self.active.pop(key)
+        self.stopping[key] = thread
+        if requeue:
+            self.waiting[key] = rank
+            self.progress.emit(key, QUEUED)
+        thread.stop()
+
+    def _schedule(self):
+        while True:
+            # 上一个线程还没停下的资源等它结束后再开始，避免两个线程同时写同一个 .part
+            ready = [key for key in self.waiting if key not in self.stopping]
+            if not ready:
+                return
+            key = min(ready, key=self.waiting.get)
+            if len(self.active) + len(self.stopping) >= self.max_active:
+                if self.stopping:  # 已经有线程在让出名额
+                    return
+                victim = max(self.active, key=lambda active_key: self.active[active_key][1])
+                if self.active[victim][1] <= self.waiting[key]:
+                    return
+                logging.info(f"下载 {victim} 让位给 {key}，稍后续传")
+                self._stop(victim, requeue=True)
+                return
+            rank = self.waiting.pop(key)
+            thread = self.create_thread(key)
+            self._connect(key, thread)
+            self.active[key] = (thread, rank)
+            logging.info(f"开始下载资源 {key}")
+            thread.start()
+
+    def _connect(self, key, thread):
+        thread.progress.connect(lambda percent: self.progress.emit(key, percent))
+        thread.transfer_progress.connect(lambda info: self.transfer.emit(key, info))
+        thread.file_extracted.connect(lambda path: self.file_extracted.emit(key, path))
+        thread.finished.connect(lambda path, error: self._on_finished(key, thread, path, error))
+        thread.stopped.connect(lambda: self._on_stopped(key, thread))
+
+    def _release(self, key, thread):
+        """线程结束后移出队列，返回它是否已被取消或让位"""
+        thread.wait()  # 信号在 run 返回前发出，等线程真正结束再释放
+        if self.active.get(key, (None,))[0] is thread:
+            del self.active[key]
+            return False
+        if self.stopping.get(key) is thread:
+            del self.stopping[key]
+        return True
+
+    def _on_finished(self, key, thread, path, error):
+        stopping = self._release(key, thread)
+        if stopping and error:  # 取消时正好出错，按取消处理
+            self._on_stopped(key, thread)
+            return
+        self.waiting.pop(key, None)  # 让位的下载在停下前已经完成
+        self.finished.emit(key, path, error)
+        self._schedule()
+
+    def _on_stopped(self, key, thread):
+        self._release(key, thread)
+        if key not in self:
+            self.cancelled.emit(key)
+        self._schedule()
@@ -0,0 +1,198 @@
+# integrity.py
+import os
+import json
+import hashlib
+import logging
+import threading
+from PySide6.QtCore import QThread, Signal
+from .config import MANIFEST_FOLDER, VERIFY_STATE_FOLDER
+
+MANIFEST_VERSION = 1
+HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 1024 * 1024
+STATE_SAVE_INTERVAL = 500  # 校验多少个文件保存一次状态，中途退出时不必从头再来
+
+
+def new_hash():
+    return hashlib.new(HASH_ALGORITHM)
+
+
+def hash_file(path, stop=None):
+    """计算文件哈希；stop() 返回 True 时中止并返回 None"""
+    digest = new_hash()
+    with open(path, "rb") as file:
+        while True:
+            if stop is not None and stop():
+                return None
+            chunk = file.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+
+def atomic_write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+class Manifest:
+    """资源的完整性清单：各分卷和解压出的各文件的大小与哈希
+
+    文件格式（JSON）::
+
+        {"version": 1, "key": "Java_8", "algorithm": "sha256",
+         "parts": {"jdk8.z01": {"size": 123, "hash": "..."}, ...},
+         "files": {"jdk8/doc/java8/index.html": {"size": 456, "hash": "..."}, ...}}
+
+    files 中的路径相对于解压目录，使用 / 分隔。随程序发布的清单放在 zy/manifests，
+    没有发布清单的资源在第一次下载解压成功后由本地记录生成。
+    """
+
+    def __init__(self, key, parts=None, files=None):
+        self.key = key
+        self.parts = parts or {}
+        self.files = files or {}
+
+    @staticmethod
+    def shipped_path(key):
+        return os.path.join(MANIFEST_FOLDER, f"{key}.json")
+
+    @staticmethod
+    def local_path(key):
+        return os.path.join(VERIFY_STATE_FOLDER, "manifests", f"{key}.json")
+
+    @classmethod
+    def load(cls, key):
+        """依次读取发布的清单和本地生成的清单，都没有时返回 None"""
+        for path in (cls.shipped_path(key), cls.local_path(key)):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get("version") != MANIFEST_VERSION or data.get("algorithm") != HASH_ALGORITHM:
+                logging.warning(f"清单版本或哈希算法不受支持，已忽略: {path}")
+                continue
+            return cls(key, data.get("parts"), data.get("files"))
+        return None
+
+    def save(self, path=None):
+        atomic_write_json(path or self.local_path(self.key), {
+            "version": MANIFEST_VERSION,
+            "key": self.key,
+            "algorithm": HASH_ALGORITHM,
+            "parts": self.parts,
+            "files": self.files,
+        })
+
+
+class VerificationState:
+    """记录上次校验通过时每个文件的大小、修改时间和哈希
+
+    大小和修改时间都没变、清单中的哈希也没变的文件不再重新计算哈希，
+    重新打开 jdk8 这样的大文档集时只需 stat 一遍。
+    """
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, name):
+        """同时运行的多个下载线程共用一个实例，保存时不会互相覆盖对方的记录"""
+        with cls._shared_lock:
+            state = cls._shared.get(name)
+            if state is None:
+                state = cls._shared[name] = cls(name)
+            return state
+
+    def __init__(self, name):
+        self.path = os.path.join(VERIFY_STATE_FOLDER, f"{name}.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, name, stat, expected_hash):
+        entry = self.entries.get(name)
+        return entry is not None and entry == [stat.st_size, stat.st_mtime_ns, expected_hash]
+
+    def record(self, name, stat, file_hash):
+        with self._lock:
+            self.entries[name] = [stat.st_size, stat.st_mtime_ns, file_hash]
+
+    def forget(self, name):
+        with self._lock:
+            self.entries.pop(name, None)
+
+    def save(self):
+        with self._lock:  # 多个下载线程可能同时保存
+            atomic_write_json(self.path, self.entries)
+
+
+def verify_file(path, name, expected, state, stop=None):
+    """校验单个文件，返回 "ok"、"missing"、"corrupt"，中止时返回 None；只在大小或修改时间变化时计算哈希"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        state.forget(name)
+        return "missing"
+    if stat.st_size != expected["size"]:
+        state.forget(name)
+        return "corrupt"
+    if state.is_current(name, stat, expected["hash"]):
+        return "ok"
+    file_hash = hash_file(path, stop)
+    if file_hash is None:
+        return None
+    if file_hash != expected["hash"]:
+        state.forget(name)
+        return "corrupt"
+    state.record(name, stat, file_hash)
+    return "ok"
+
+
+class VerifyThread(QThread):
+    """后台校验解压目录中的文档是否完整，只对大小或修改时间变化过的文件计算哈希"""
+    verified = Signal(str, object)  # 信号：校验完成（资源键，校验结果 dict：missing、corrupt、hashed、checked、complete）
+
+    def __init__(self, key, manifest, root):
+        super().__init__()
+        self.key = key
+        self.manifest = manifest
+        self.root = root
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        report = {"missing": [], "corrupt": [], "hashed": 0, "checked": 0}
+        state = VerificationState(f"files-{self.key}")
+        try:
+            for name, expected in self.manifest.files.items():
+                if not self._is_running:
+                    break
+                before = state.entries.get(name)
+                result = verify_file(os.path.join(self.root, *name.split("/")), name, expected, state,
+                                     lambda: not self._is_running)
+                if result is None:
+                    break
+                report["checked"] += 1
+                if result != "ok":
+                    report[result].append(name)
+                elif state.entries.get(name) is not before:
+                    report["hashed"] += 1
+                    if report["hashed"] % STATE_SAVE_INTERVAL == 0:
+                        state.save()
+            state.save()
+        except Exception as e:
+            logging.error(f"校验文档失败: {self.key}, 错误: {e}")
+        report["complete"] = self._is_running and report["checked"] == len(self.manifest.files) \
+            and not report["missing"] and not report["corrupt"]
+        logging.info(f"校验 {self.key}: 检查 {report['checked']} 个文件，重新计算哈希 {report['hashed']} 个，"
+                     f"缺失 {len(report['missing'])} 个，损坏 {len(report['corrupt'])} 个")
+        self.verified.emit(self.key, report)
@@ -0,0 +1,288 @@
+# mirror.py
+import os
+import re
+import json
+import hashlib
+import logging
+import posixpath
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote, quote
+import requests
+from requests.adapters import HTTPAdapter
+from PySide6.QtCore import QThread, Signal
+from .config import MIRROR_FOLDER, MIRROR_CONNECTIONS, MIRROR_MAX_PAGES, MIRROR_MAX_DEPTH
+from .integrity import atomic_write_json
+
+MIRROR_TIMEOUT = (10, 30)  # 连接超时、读取超时（秒）
+MAX_FILE_BYTES = 20 * 1024 * 1024  # 单个文件的大小上限，超过时不镜像
+STATE_FILE = ".mirror.json"
+STATE_VERSION = 1
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# href / src 属性中的链接；直接在字节上匹配，不必先判断页面编码
+LINK_PATTERN = re.compile(rb"""(\b(?:href|src)\s*=\s*)(["']?)([^"'\s>]+)\2""", re.IGNORECASE)
+SKIP_SCHEMES = ("javascript:", "mailto:", "data:", "tel:", "#")
+ASSET_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp",
+                    ".woff", ".woff2", ".ttf", ".eot", ".json", ".xml", ".pdf", ".zip")
+UNSAFE_CHARS = re.compile(r'[<>:"|?*\\\x00-\x1f]')
+
+
+def media_type(response):
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def site_folder(url, folder=MIRROR_FOLDER):
+    """每个站点镜像到 镜像目录/主机名（端口号中的 : 换成 _）"""
+    return os.path.join(folder, UNSAFE_CHARS.sub("_", urlsplit(url).netloc.lower()))
+
+
+def load_state(root):
+    try:
+        with open(os.path.join(root, STATE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get("pages", {}) if state.get("version") == STATE_VERSION else {}
+
+
+def mirrored_page(url, folder=MIRROR_FOLDER):
+    """已镜像时返回页面的本地路径，否则返回 None"""
+    root = site_folder(url, folder)
+    entry = load_state(root).get(urlunsplit(urlsplit(url)._replace(fragment="")))
+    if entry is None:
+        return None
+    path = os.path.join(root, *entry["path"].split("/"))
+    return path if os.path.isfile(path) else None
+
+
+class SiteMirror:
+    """把一个网站的一部分镜像到本地：起始页所在目录下的页面（限制深度和页数）以及它们引用的同站资源
+
+    - 多个连接并发下载，共享连接池
+    - 页面中指向已镜像文件的链接改写为本地相对路径，其他链接改写为绝对 URL，离线时仍能在线打开
+    - 每个 URL 的 ETag / Last-Modified 和页面中的链接记录在站点目录的 .mirror.json 中，
+      再次运行时用条件请求，未修改的文件不再下载
+    """
+
+    def __init__(self, start_url, folder=MIRROR_FOLDER, connections=MIRROR_CONNECTIONS,
+                 max_pages=MIRROR_MAX_PAGES, max_depth=MIRROR_MAX_DEPTH, session=None, progress=None):
+        self.start_url = urlunsplit(urlsplit(start_url)._replace(fragment=""))
+        parts = urlsplit(self.start_url)
+        self.scheme = parts.scheme
+        self.host = parts.netloc.lower()
+        self.scope = posixpath.dirname(parts.path or "/").rstrip("/") + "/"  # 只镜像这个目录下的页面
+        self.root = site_folder(self.start_url, folder)
+        self.connections = connections
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.progress = progress  # progress(已完成数, 已发现数)
+        self.pages = load_state(self.root)  # URL -> 记录
+        self.stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        self._is_running = True
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def stop(self):
+        self._is_running = False
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def same_site(self, url):
+        parts = urlsplit(url)
+        return parts.scheme == self.scheme and parts.netloc.lower() == self.host
+
+    def in_scope(self, url):
+        return self.same_site(url) and (urlsplit(url).path or "/").startswith(self.scope)
+
+    def resolve(self, base, link):
+        """返回 (不含片段的绝对 URL, 片段)；不需要处理的链接返回 None"""
+        if link.lower().startswith(SKIP_SCHEMES):
+            return None
+        target = urlsplit(urljoin(base, link))
+        if target.scheme not in ("http", "https"):
+            return None
+        return urlunsplit(target._replace(fragment="")), target.fragment
+
+    def local_path(self, url, is_html):
+        """URL 对应的本地路径（相对于站点目录，/ 分隔）"""
+        parts = urlsplit(url)
+        path = unquote(parts.path) or "/"
+        if path.endswith("/"):
+            path += "index.html"
+        elif is_html and "." not in posixpath.basename(path):
+            path += "/index.html"
+        stem, extension = posixpath.splitext(path)
+        if parts.query:
+            stem += "_" + hashlib.sha1(parts.query.encode("utf-8")).hexdigest()[:8]
+        if is_html and extension.lower() not in (".html", ".htm"):
+            extension += ".html"
+        segments = [UNSAFE_CHARS.sub("_", segment) for segment in (stem + extension).split("/")
+                    if segment not in ("", ".", "..")]
+        return "/".join(segments)
+
+    def extract_links(self, content, base):
+        """返回页面中的同站链接 [[URL, 是否为页面], ...]；src 引用和常见资源扩展名视为资源"""
+        links = {}
+        for match in LINK_PATTERN.finditer(content):
+            resolved = self.resolve(base, match.group(3).decode("utf-8", "replace"))
+            if resolved is None or not self.same_site(resolved[0]):
+                continue
+            url = resolved[0]
+            is_page = match.group(1).lower().startswith(b"href") \
+                and not urlsplit(url).path.lower().endswith(ASSET_EXTENSIONS)
+            links[url] = links.get(url, False) or is_page
+        return [[url, is_page] for url, is_page in links.items()]
+
+    def run(self):
+        """镜像站点，返回起始页的本地路径；起始页无法获取时抛出 IOError"""
+        queue = deque([(self.start_url, 0, True)])
+        seen = {self.start_url}
+        page_count = 1
+        fresh = {}  # 本次下载的页面 URL -> 原始内容，全部下载完后再改写链接
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.connections) as executor:
+            pending = {}
+            while (queue or pending) and self._is_running:
+                while queue and len(pending) < self.connections * 2:
+                    url, depth, is_page = queue.popleft()
+                    pending[executor.submit(self.fetch, url, self.pages.get(url))] = (url, depth)
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    url, depth = pending.pop(future)
+                    entry, content = future.result()
+                    done += 1
+                    if entry is None:
+                        continue
+                    self.pages[url] = entry
+                    if content is not None:
+                        fresh[url] = content
+                    for link, link_is_page in entry["links"]:
+                        if link in seen:
+                            continue
+                        if link_is_page:
+                            if depth >= self.max_depth or page_count >= self.max_pages or not self.in_scope(link):
+                                continue
+                            page_count += 1
+                        seen.add(link)
+                        queue.append((link, depth + 1, link_is_page))
+                if self.progress is not None:
+                    self.progress(done, len(seen))
+            if not self._is_running:
+                for future in pending:
+                    future.cancel()
+        for url, content in fresh.items():
+            self.save(self.pages[url]["path"], self.rewrite(url, content))
+        atomic_write_json(os.path.join(self.root, STATE_FILE), {"version": STATE_VERSION, "pages": self.pages})
+        logging.info(f"镜像 {self.start_url}: 下载 {self.stats['downloaded']} 个，未修改 {self.stats['not_modified']} 个，"
+                     f"失败 {self.stats['failed']} 个")
+        start = self.pages.get(self.start_url)
+        if start is None:
+            raise IOError(f"无法获取起始页: {self.start_url}")
+        return os.path.join(self.root, *start["path"].split("/"))
+
+    def fetch(self, url, entry):
+        """在线程池中下载一个 URL，返回 (记录, 需要改写链接的页面内容)；未修改时内容为 None，失败时记录为 None"""
+        headers = {}
+        if entry and os.path.isfile(os.path.join(self.root, *entry["path"].split("/"))):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=MIRROR_TIMEOUT) as response:
+                if response.status_code == 304 and headers:
+                    self._count("not_modified")
+                    return entry, None
+                if response.status_code != 200 or not self.same_site(response.url):
+                    self._count("failed")
+                    return None, None
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > MAX_FILE_BYTES:
+                        raise IOError("文件超过大小上限")
+                content = b"".join(chunks)
+        except (requests.RequestException, IOError) as e:
+            logging.warning(f"镜像下载失败: {url}, 错误: {e}")
+            self._count("failed")
+            return None, None
+        self._count("downloaded")
+        is_html = media_type(response) in HTML_TYPES
+        entry = {
+            "path": self.local_path(url, is_html),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "html": is_html,
+            "base": response.url,  # 重定向后的地址，页面中的相对链接相对于它
+            "links": self.extract_links(content, response.url) if is_html else [],
+        }
+        if is_html:
+            return entry, content
+        self.save(entry["path"], content)
+        return entry, None
+
+    def rewrite(self, url, content):
+        """已镜像的目标改写为本地相对路径，其他链接改写为绝对 URL"""
+        entry = self.pages[url]
+        page_folder = posixpath.dirname(entry["path"])
+
+        def replace(match):
+            resolved = self.resolve(entry["base"], match.group(3).decode("utf-8", "replace"))
+            if resolved is None:
+                return match.group(0)
+            target, fragment = resolved
+            mirrored = self.pages.get(target)
+            if mirrored is not None:
+                link = quote(posixpath.relpath(mirrored["path"], page_folder or "."), safe="/")
+            else:
+                link = target
+            if fragment:
+                link += "#" + fragment
+            return match.group(1) + b'"' + link.encode("utf-8") + b'"'
+
+        return LINK_PATTERN.sub(replace, content)
+
+    def save(self, name, content):
+        path = os.path.join(self.root, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+class MirrorThread(QThread):
+    """后台镜像一个在线资源"""
+    progress = Signal(int)  # 信号：进度百分比（已发现的文件数会随下载增加）
+    finished = Signal(str, str, str)  # 信号：镜像完成（URL，起始页本地路径，错误消息）
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.mirror = SiteMirror(url, progress=self.report)
+
+    def report(self, done, total):
+        self.progress.emit(done * 100 // max(total, 1))
+
+    def stop(self):
+        self.mirror.stop()
+
+    def run(self):
+        try:
+            path = self.mirror.run()
+            self.finished.emit(self.url, path, None)
+        except Exception as e:
+            logging.error(f"镜像失败: {self.url}, 错误: {e}")
+            self.finished.emit(self.url, None, str(e))
+        finally:
+            self.mirror.session.close()
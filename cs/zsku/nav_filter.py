@@ -0,0 +1,89 @@
+# nav_filter.py
+import re
+from PySide6.QtCore import Qt, QSortFilterProxyModel
+
+try:  # 可选依赖：安装后可以用拼音和拼音首字母搜索中文分类
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+RESOURCE_ROLE = Qt.UserRole  # 叶子节点：{"path": 本地路径或网址, "key": wd.json 中的键, "remote": 是否为网址}
+NODE_ROLE = Qt.UserRole + 1  # 节点在资源目录（NavIndex.nodes）中的序号
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+def pinyin_keys(name):
+    """返回 (全拼, 首字母)，没有安装 pypinyin 或不含汉字时为空字符串"""
+    if lazy_pinyin is None or not re.search("[\u4e00-\u9fff]", name):
+        return "", ""
+    full = "".join(lazy_pinyin(name)).lower()
+    initials = "".join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+    return full, initials
+
+
+def match_keys(name):
+    """预先小写、去空格的匹配键：(名称, 全拼, 拼音首字母)"""
+    return (SPACE_PATTERN.sub("", name.lower()),) + pinyin_keys(name)
+
+
+class NavIndex:
+    """导航树节点的扁平索引（编译后的资源目录节点，按先序排列），之后每次过滤只扫描这个列表
+
+    匹配规则（不区分大小写，忽略空格）：名称、全拼或首字母包含查询串，或查询串的字符按顺序
+    出现在名称中（模糊匹配，如 "vjs" 匹配 "Vue.js"）。命中节点的子孙保留可见（折叠），
+    祖先保留可见并展开。
+    """
+
+    def __init__(self, nodes=()):
+        self.nodes = nodes  # 每个节点有 parent、children 和 match_keys 生成的 keys
+
+    def match(self, query):
+        """返回 (可见的节点序号集合, 需要展开的节点序号集合)；查询为空时返回 (None, None)（全部可见）"""
+        query = SPACE_PATTERN.sub("", query.lower())
+        if not query:
+            return None, None
+        fuzzy = re.compile(".*?".join(re.escape(char) for char in query))
+        visible = set()
+        expanded = set()
+        for node_id, node in enumerate(self.nodes):
+            if node_id in visible:  # 节点按先序排列，这里只可能是已作为命中分类的子孙加入
+                continue
+            name, full, initials = node.keys
+            if query in name or (full and (query in full or initials.startswith(query))) or fuzzy.search(name):
+                self._add_descendants(node_id, visible)
+                parent = node.parent
+                while parent >= 0 and parent not in expanded:
+                    visible.add(parent)
+                    expanded.add(parent)
+                    parent = self.nodes[parent].parent
+        return visible, expanded
+
+    def _add_descendants(self, node_id, visible):
+        stack = [node_id]
+        while stack:
+            current = stack.pop()
+            visible.add(current)
+            stack.extend(self.nodes[current].children)
+
+
+class NavFilterProxy(QSortFilterProxyModel):
+    """按 NavIndex.match 的结果过滤导航树，只保留命中路径上的节点
+
+    过滤条件变化时重置代理模型而不是 invalidateFilter：重置后只对顶层和展开的节点调用
+    filterAcceptsRow，耗时与显示出来的行数成正比，而不是与整个目录的大小成正比。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.visible = None
+
+    def set_visible(self, visible):
+        self.beginResetModel()
+        self.visible = visible
+        self.endResetModel()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.visible is None:
+            return True
+        # 直接由源模型查节点序号，不为每一行创建索引、调用 data()
+        return self.sourceModel().child_id(source_row, source_parent) in self.visible
@@ -1,14 +1,20 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QLineEdit, QTreeWidget, QTreeWidgetItem,
-    QSplitter, QProgressBar
+    QWidget, QVBoxLayout, QLineEdit, QTreeView,
+    QSplitter, QProgressBar, QListWidget, QListWidgetItem, QMenu
 )
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from .backend_module import DocumentHandler
+from text_search import QUERY_PATTERN
+from .nav_filter import NavFilterProxy, NavIndex, RESOURCE_ROLE
+from .mirror import mirrored_page
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
+NAV_FILTER_DELAY_MS = 80  # 停止输入多久后过滤导航树
+FULL_TEXT_DELAY_MS = 150  # 停止输入多久后执行全文搜索
+
 
 class KnowledgeBaseApp(QWidget):
     def __init__(self):
@@ -25,12 +31,34 @@ class KnowledgeBaseApp(QWidget):
         self.search_box.textChanged.connect(self.on_search)
         main_layout.addWidget(self.search_box)
 
-        self.tree_widget = QTreeWidget()
-        self.tree_widget.setHeaderHidden(True)
-        self.tree_widget.itemClicked.connect(self.on_item_clicked)
+        # 导航树：编译后的资源目录，输入停顿后按预先计算的扁平索引过滤
+        self.nav_index = NavIndex()
+        self.nav_proxy = NavFilterProxy(self)
+        self.tree_view = QTreeView()
+        self.tree_view.setHeaderHidden(True)
+        self.tree_view.setModel(self.nav_proxy)
+        self.tree_view.clicked.connect(self.on_item_clicked)
+        self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree_view.customContextMenuRequested.connect(self.show_tree_menu)
+        self.nav_filter_timer = QTimer(self)
+        self.nav_filter_timer.setSingleShot(True)
+        self.nav_filter_timer.setInterval(NAV_FILTER_DELAY_MS)
+        self.nav_filter_timer.timeout.connect(self.filter_nav_tree)
+
+        # 全文搜索结果：标题和带命中标记的摘要，点击后打开文档并定位到命中词
+        self.result_list = QListWidget()
+        self.result_list.setWordWrap(True)
+        self.result_list.itemClicked.connect(self.on_result_clicked)
+        self.result_list.hide()
+        self.full_text_timer = QTimer(self)
+        self.full_text_timer.setSingleShot(True)
+        self.full_text_timer.setInterval(FULL_TEXT_DELAY_MS)
+        self.full_text_timer.timeout.connect(self.run_full_text_search)
+        self.pending_find = None  # 文档加载完成后要高亮的词
 
         self.browser = QWebEngineView()
         self.browser.setHtml("<h1>欢迎使用知识库助手</h1>")
+        self.browser.loadFinished.connect(self.on_page_loaded)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -40,8 +68,15 @@ class KnowledgeBaseApp(QWidget):
         content_layout.addWidget(self.progress_bar)
         content_layout.addWidget(self.browser)
 
+        navigation_layout = QVBoxLayout()
+        navigation_layout.setContentsMargins(0, 0, 0, 0)
+        navigation_layout.addWidget(self.result_list)
+        navigation_layout.addWidget(self.tree_view)
+        navigation_widget = QWidget()
+        navigation_widget.setLayout(navigation_layout)
+
         splitter = QSplitter(Qt.Horizontal)
-        splitter.addWidget(self.tree_widget)
+        splitter.addWidget(navigation_widget)
         content_widget = QWidget()
         content_widget.setLayout(content_layout)
         splitter.addWidget(content_widget)
@@ -52,44 +87,70 @@ class KnowledgeBaseApp(QWidget):
 
     def populate_nav_tree(self):
         """填充导航树"""
-        resources = self.document_handler.resources.get("资源", {})
-        for category, subcategories in resources.items():
-            category_item = QTreeWidgetItem([category])
-            self.tree_widget.addTopLevelItem(category_item)
-            self.add_subcategories(category_item, subcategories)
-
-    def add_subcategories(self, parent_item, subcategories):
-        """递归添加子分类"""
-        for subcategory, links in subcategories.items():
-            if isinstance(links, dict):
-                subcategory_item = QTreeWidgetItem([subcategory])
-                parent_item.addChild(subcategory_item)
-                self.add_subcategories(subcategory_item, links)
-            else:
-                # links 是一个列表，第一个元素是文件路径，第二个元素是 wd.json 中的键值
-                link_item = QTreeWidgetItem([subcategory])
-                link_item.setData(0, Qt.UserRole, {"path": links[0], "key": subcategory})
-                parent_item.addChild(link_item)
-
-    def on_item_clicked(self, item, column):
+        self.nav_index = NavIndex(self.document_handler.catalog.nodes)
+        self.nav_proxy.setSourceModel(self.document_handler.catalog_model)
+
+    def on_item_clicked(self, index):
         """处理点击事件"""
-        resource_info = item.data(0, Qt.UserRole)
-        if resource_info:
+        resource_info = index.data(RESOURCE_ROLE)
+        if resource_info and resource_info.get("remote"):
+            self.document_handler.load_url(resource_info.get("path"))
+        elif resource_info:
             resource_path = resource_info.get("path")
             resource_key = resource_info.get("key")
             self.document_handler.load_content(resource_path, resource_key)
 
+    def show_tree_menu(self, pos):
+        """右键菜单：在线资源下载或更新离线镜像，正在下载的资源可以取消"""
+        resource_info = self.tree_view.indexAt(pos).data(RESOURCE_ROLE)
+        if not resource_info:
+            return
+        handler = self.document_handler
+        menu = QMenu(self)
+        if resource_info.get("remote"):
+            url = resource_info.get("path")
+            action = menu.addAction("更新离线镜像" if mirrored_page(url) else "下载离线镜像")
+            action.triggered.connect(lambda: handler.mirror_site(url))
+        elif resource_info.get("key") in handler.downloads:
+            key = resource_info.get("key")
+            action = menu.addAction(f"取消下载 {key}")
+            action.triggered.connect(lambda: handler.cancel_download(key))
+        else:
+            return
+        menu.exec(self.tree_view.viewport().mapToGlobal(pos))
+
     def on_search(self):
-        """搜索功能"""
-        query = self.search_box.text().strip().lower()
-        self.tree_widget.collapseAll()
-        if query:
-            self.search_tree(query, self.tree_widget.invisibleRootItem())
-
-    def search_tree(self, query, parent_item):
-        """递归搜索树"""
-        for i in range(parent_item.childCount()):
-            child = parent_item.child(i)
-            if query in child.text(0).lower():
-                child.setExpanded(True)
-            self.search_tree(query, child)
+        """搜索功能：输入停顿后再过滤导航树和执行全文搜索"""
+        self.nav_filter_timer.start()
+        self.full_text_timer.start()
+
+    def filter_nav_tree(self):
+        """只显示名称、拼音或模糊匹配命中的节点及其所在路径"""
+        visible, expanded = self.nav_index.match(self.search_box.text())
+        self.nav_proxy.set_visible(visible)  # 重置后所有节点都是折叠的
+        model = self.document_handler.catalog_model
+        for node_id in sorted(expanded or ()):  # 只展开命中节点所在的路径（先序，祖先先展开）
+            self.tree_view.expand(self.nav_proxy.mapFromSource(model.expandable_index(node_id)))
+
+    def run_full_text_search(self):
+        """在已解压文档的全文索引中搜索，结果按相关度排列"""
+        query = self.search_box.text().strip()
+        self.result_list.clear()
+        results = self.document_handler.search_index.search(query) if query else []
+        for path, title, snippet in results:
+            item = QListWidgetItem(f"{title}\n{snippet}")
+            item.setData(Qt.UserRole, path)
+            item.setToolTip(path)
+            self.result_list.addItem(item)
+        self.result_list.setVisible(bool(results))
+
+    def on_result_clicked(self, item):
+        terms = QUERY_PATTERN.findall(self.search_box.text())
+        self.pending_find = max(terms, key=len) if terms else None
+        self.document_handler.load_content(item.data(Qt.UserRole))
+
+    def on_page_loaded(self, ok):
+        """打开搜索结果后高亮并滚动到命中词"""
+        if ok and self.pending_find:
+            self.browser.findText(self.pending_find)
+        self.pending_find = None
@@ -0,0 +1,158 @@
+# zip_archive.py
+import bisect
+import mmap
+import os
+import struct
+import zlib
+from .zip_stream import BadZipStream, LOCAL_HEADER, LOCAL_HEADER_STRUCT, decompress, split_zip_order
+
+END_SIGNATURE = b"PK\x05\x06"
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_END_SIGNATURE = b"PK\x06\x06"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+END_STRUCT = struct.Struct("<4sHHHHIIH")
+ZIP64_LOCATOR_STRUCT = struct.Struct("<4sIQI")
+ZIP64_END_STRUCT = struct.Struct("<4sQHHIIQQQQ")
+CENTRAL_STRUCT = struct.Struct("<4sHHHHHHIIIHHHHHII")
+MAX_COMMENT_LENGTH = 0xFFFF
+
+
+class ZipArchive:
+    """只读打开 zip / 分卷 zip，按文件名随机读取单个条目，不需要解压整个压缩包
+
+    各分卷用 mmap 映射，按 .z01、.z02 …… .zip 的顺序看作一个连续的地址空间；
+    打开时解析一次末尾的中央目录，建立 文件名 -> (本地文件头位置, 压缩方法, 压缩后大小, 大小, CRC) 的索引，
+    之后读取条目只访问它所在的那一小段映射。
+    """
+
+    def __init__(self, paths):
+        self.paths = split_zip_order(paths)
+        self.maps = []
+        self.starts = []  # 各分卷在连续地址空间中的起始位置
+        self.size = 0
+        self.entries = {}
+        try:
+            for path in self.paths:
+                with open(path, "rb") as file:
+                    length = os.fstat(file.fileno()).st_size
+                    self.maps.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if length else b"")
+                self.starts.append(self.size)
+                self.size += length
+            self._read_central_directory()
+        except BaseException:
+            self.close()
+            raise
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        for mapped in self.maps:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self.maps = []
+
+    def _read(self, offset, size):
+        """从连续地址空间读取，数据可以跨越分卷"""
+        if offset < 0 or offset + size > self.size:
+            raise BadZipStream("读取位置超出压缩包范围")
+        chunks = []
+        volume = bisect.bisect_right(self.starts, offset) - 1
+        while size > 0:
+            position = offset - self.starts[volume]
+            chunk = self.maps[volume][position:position + size]
+            chunks.append(chunk)
+            offset += len(chunk)
+            size -= len(chunk)
+            volume += 1
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+    def _disk_offset(self, disk, offset):
+        """中央目录中的位置相对于所在分卷的开头"""
+        if disk >= len(self.starts):
+            raise BadZipStream(f"压缩包缺少分卷 {disk + 1}")
+        return self.starts[disk] + offset
+
+    def _read_central_directory(self):
+        last = self.maps[-1] if self.maps else b""
+        search_from = max(0, len(last) - END_STRUCT.size - MAX_COMMENT_LENGTH)
+        end = last.rfind(END_SIGNATURE, search_from)
+        if end < 0:
+            raise BadZipStream("找不到中央目录，压缩包不完整")
+        (_, disk, directory_disk, _, count, directory_size,
+         directory_offset, _) = END_STRUCT.unpack(last[end:end + END_STRUCT.size])
+        directory_end = self.starts[-1] + end  # 中央目录之后紧接着（ZIP64）结束记录
+        locator = end - ZIP64_LOCATOR_STRUCT.size
+        if locator >= 0 and last[locator:locator + 4] == ZIP64_LOCATOR_SIGNATURE:
+            _, zip64_disk, zip64_offset, _ = ZIP64_LOCATOR_STRUCT.unpack(last[locator:end])
+            record_end = self.starts[-1] + locator
+            record = self._read(record_end - ZIP64_END_STRUCT.size, ZIP64_END_STRUCT.size)
+            if record[:4] != ZIP64_END_SIGNATURE:
+                raise BadZipStream("ZIP64 中央目录结束记录损坏")
+            (_, _, _, _, disk, directory_disk, _, count,
+             directory_size, directory_offset) = ZIP64_END_STRUCT.unpack(record)
+            directory_end = record_end - ZIP64_END_STRUCT.size
+        # 真正的分卷压缩包（zip -s）中位置相对于各分卷；把普通 zip 直接切成几段时全部记为第 0 卷，
+        # 位置相对于整个数据流
+        if disk and disk + 1 != len(self.maps):
+            raise BadZipStream(f"压缩包应有 {disk + 1} 个分卷，实际 {len(self.maps)} 个")
+        # 与 zipfile 一样容忍压缩包前面多出的数据（例如分卷标记），所有位置按差值修正
+        shift = directory_end - directory_size - self._disk_offset(directory_disk, directory_offset)
+
+        directory = self._read(directory_end - directory_size, directory_size)
+        position = 0
+        for _ in range(count):
+            if directory[position:position + 4] != CENTRAL_SIGNATURE:
+                raise BadZipStream("中央目录损坏")
+            (_, _, _, flags, method, _, _, crc, compressed_size, size, name_length, extra_length,
+             comment_length, start_disk, _, _, header_offset) = CENTRAL_STRUCT.unpack_from(directory, position)
+            position += CENTRAL_STRUCT.size
+            raw_name = directory[position:position + name_length]
+            extra = directory[position + name_length:position + name_length + extra_length]
+            position += name_length + extra_length + comment_length
+            if 0xFFFFFFFF in (size, compressed_size, header_offset) or start_disk == 0xFFFF:
+                size, compressed_size, header_offset, start_disk = self._zip64_fields(
+                    extra, size, compressed_size, header_offset, start_disk)
+            name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+            if name.endswith("/") or flags & 0x1:  # 目录和加密条目不提供
+                continue
+            self.entries[name] = (self._disk_offset(start_disk, header_offset) + shift,
+                                  method, compressed_size, size, crc)
+
+    def _zip64_fields(self, extra, size, compressed_size, header_offset, start_disk):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, length = struct.unpack_from("<HH", extra, position)
+            if header_id == 0x0001:
+                values = extra[position + 4:position + 4 + length]
+                index = 0
+                if size == 0xFFFFFFFF:
+                    size = struct.unpack_from("<Q", values, index)[0]
+                    index += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = struct.unpack_from("<Q", values, index)[0]
+                    index += 8
+                if header_offset == 0xFFFFFFFF:
+                    header_offset = struct.unpack_from("<Q", values, index)[0]
+                    index += 8
+                if start_disk == 0xFFFF:
+                    start_disk = struct.unpack_from("<I", values, index)[0]
+                return size, compressed_size, header_offset, start_disk
+            position += 4 + length
+        raise BadZipStream("缺少 ZIP64 扩展字段")
+
+    def read(self, name):
+        """读取并解压一个条目，校验 CRC；条目不存在时抛出 KeyError"""
+        offset, method, compressed_size, size, crc = self.entries[name]
+        header = self._read(offset, 4 + LOCAL_HEADER_STRUCT.size)
+        if header[:4] != LOCAL_HEADER:
+            raise BadZipStream(f"本地文件头损坏: {name}")
+        name_length, extra_length = LOCAL_HEADER_STRUCT.unpack(header[4:])[-2:]
+        data = self._read(offset + len(header) + name_length + extra_length, compressed_size)
+        content = decompress(method, data)
+        if len(content) != size or zlib.crc32(content) != crc:
+            raise BadZipStream(f"CRC 校验失败: {name}")
+        return content
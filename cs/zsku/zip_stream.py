@@ -0,0 +1,329 @@
+# zip_stream.py
+import os
+import re
+import bz2
+import zlib
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+EXTRACT_WORKERS = os.cpu_count() or 2  # 解压线程数，zlib 解压时会释放 GIL，可以利用多核
+READ_BLOCK_SIZE = 1024 * 1024  # 每次从分卷读取的最大字节数
+INLINE_ENTRY_SIZE = 8 * 1024 * 1024  # 超过此大小的条目边读边解压，不整体放入内存
+MAX_PENDING_BYTES = 64 * 1024 * 1024  # 排队等待解压的压缩数据上限
+
+LOCAL_HEADER = b"PK\x03\x04"
+CENTRAL_HEADER = b"PK\x01\x02"
+END_HEADERS = (b"PK\x05\x06", b"PK\x06\x06", b"PK\x06\x07")
+SPLIT_MARKERS = (b"PK\x07\x08", b"PK00")  # 分卷压缩包第一个分卷开头的标记
+DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+LOCAL_HEADER_STRUCT = struct.Struct("<HHHHHIIIHH")
+SEGMENT_PATTERN = re.compile(r"\.z(\d+)$", re.IGNORECASE)
+
+STORED = 0
+DEFLATED = 8
+BZIP2 = 12
+
+
+class BadZipStream(Exception):
+    """压缩包格式错误或使用了不支持的特性"""
+
+
+def split_zip_order(paths):
+    """分卷压缩包的数据顺序：.z01、.z02 …… 最后是 .zip"""
+    def order(path):
+        match = SEGMENT_PATTERN.search(path)
+        return (0, int(match.group(1))) if match else (1, 0)
+    return sorted(paths, key=order)
+
+
+class SegmentReader:
+    """把按顺序排列的分卷当作一个连续的流读取
+
+    source.read_segment(index, position, size) 从第 index 个分卷的 position 处读取最多
+    size 个字节，数据尚未下载到时阻塞等待，分卷结束时返回 b""。
+    """
+
+    def __init__(self, source, segment_count):
+        self.source = source
+        self.segment_count = segment_count
+        self.segment = 0
+        self.position = 0
+        self.buffer = b""
+        self.offset = 0
+
+    def _fill(self):
+        while self.segment < self.segment_count:
+            data = self.source.read_segment(self.segment, self.position, READ_BLOCK_SIZE)
+            if data:
+                self.position += len(data)
+                self.buffer = self.buffer[self.offset:] + data
+                self.offset = 0
+                return True
+            self.segment += 1
+            self.position = 0
+        return False
+
+    def read(self, size):
+        """读取恰好 size 个字节，数据不足时抛出 BadZipStream"""
+        while len(self.buffer) - self.offset < size:
+            if not self._fill():
+                raise BadZipStream("压缩包意外结束")
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def read_some(self, size):
+        """读取最多 size 个字节，流结束时返回 b""（用于边读边解压）"""
+        if self.offset >= len(self.buffer) and not self._fill():
+            return b""
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+    def unread(self, data):
+        """把多读的数据放回流中"""
+        if data:
+            self.buffer = data + self.buffer[self.offset:]
+            self.offset = 0
+
+
+def make_decompressor(method):
+    if method == DEFLATED:
+        return zlib.decompressobj(-15)
+    if method == BZIP2:
+        return bz2.BZ2Decompressor()
+    raise BadZipStream(f"不支持的压缩方法: {method}")
+
+
+def decompress(method, data):
+    if method == STORED:
+        return data
+    if method == DEFLATED:
+        return zlib.decompress(data, -15)
+    if method == BZIP2:
+        return bz2.decompress(data)
+    raise BadZipStream(f"不支持的压缩方法: {method}")
+
+
+class ZipStreamExtractor:
+    """按顺序读取本地文件头，边下载边解压 zip / 分卷 zip
+
+    不依赖末尾的中央目录，数据到达一个条目就解压一个条目；小条目交给线程池并行解压，
+    每个文件先写入临时文件再重命名，出现在磁盘上的文件都是完整的。
+    """
+
+    def __init__(self, reader, output_folder, on_extracted=None, workers=EXTRACT_WORKERS, new_hash=None):
+        self.reader = reader
+        self.output_folder = os.path.abspath(output_folder)
+        self.on_extracted = on_extracted  # 每个文件解压完成后调用（在解压线程中）
+        self.workers = workers
+        self.new_hash = new_hash  # 提供时顺便计算每个文件的哈希，记录在 file_hashes 中
+        self.file_hashes = {}  # 相对路径（/ 分隔） -> (大小, 哈希)
+        self.extracted = 0
+        self._pending_bytes = 0
+        self._pending = threading.Condition()
+        self._error = None
+
+    def extract(self):
+        """解压全部条目，返回解压的文件数"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = []
+            try:
+                self._skip_split_marker()
+                while True:
+                    signature = self.reader.read(4)
+                    if signature != LOCAL_HEADER:
+                        if signature == CENTRAL_HEADER or signature in END_HEADERS:
+                            break
+                        raise BadZipStream(f"无法识别的文件头: {signature!r}")
+                    future = self._extract_entry(executor)
+                    if future is not None:
+                        futures.append(future)
+                    if self._error is not None:  # 尽早抛出解压线程中的错误
+                        raise self._error
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            for future in futures:
+                future.result()
+        return self.extracted
+
+    def _skip_split_marker(self):
+        head = self.reader.read(4)
+        if head not in SPLIT_MARKERS:
+            self.reader.unread(head)
+
+    def _extract_entry(self, executor):
+        (_, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = LOCAL_HEADER_STRUCT.unpack(self.reader.read(LOCAL_HEADER_STRUCT.size))
+        raw_name = self.reader.read(name_length)
+        extra = self.reader.read(extra_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        if flags & 0x1:
+            raise BadZipStream(f"不支持加密的条目: {name}")
+        zip64 = self._has_zip64(extra)
+        if compressed_size == 0xFFFFFFFF or size == 0xFFFFFFFF:
+            size, compressed_size = self._zip64_sizes(extra, size, compressed_size)
+        target = self._target_path(name)
+
+        if name.endswith("/"):
+            os.makedirs(target, exist_ok=True)
+            return None
+        if flags & 0x8:  # 大小写在数据之后的描述符里，只能边读边解压找到条目结尾
+            self._extract_streaming(name, target, method, None, None, zip64)
+            return None
+        if compressed_size > INLINE_ENTRY_SIZE:
+            self._extract_streaming(name, target, method, compressed_size, crc)
+            return None
+        data = self.reader.read(compressed_size)
+        self._reserve(len(data))
+        return executor.submit(self._extract_data, name, target, method, data, crc)
+
+    def _has_zip64(self, extra):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, length = struct.unpack_from("<HH", extra, position)
+            if header_id == 0x0001:
+                return True
+            position += 4 + length
+        return False
+
+    def _zip64_sizes(self, extra, size, compressed_size):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, length = struct.unpack_from("<HH", extra, position)
+            if header_id == 0x0001:
+                values = extra[position + 4:position + 4 + length]
+                index = 0
+                if size == 0xFFFFFFFF:
+                    size = struct.unpack_from("<Q", values, index)[0]
+                    index += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = struct.unpack_from("<Q", values, index)[0]
+                return size, compressed_size
+            position += 4 + length
+        raise BadZipStream("缺少 ZIP64 扩展字段")
+
+    def _read_descriptor(self, zip64):
+        """读取条目数据之后的描述符，返回 (CRC, 压缩后大小, 原始大小)"""
+        head = self.reader.read(4)
+        if head == DESCRIPTOR_SIGNATURE:
+            head = self.reader.read(4)
+        # 没有签名时 head 就是 CRC
+        size_format = "<QQ" if zip64 else "<II"
+        compressed_size, size = struct.unpack(size_format, self.reader.read(struct.calcsize(size_format)))
+        return struct.unpack("<I", head)[0], compressed_size, size
+
+    def _target_path(self, name):
+        """防止条目名中的 .. 或绝对路径把文件写到解压目录之外"""
+        parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+        target = os.path.normpath(os.path.join(self.output_folder, *parts)) if parts else self.output_folder
+        if not (target + os.sep).startswith(self.output_folder + os.sep) and target != self.output_folder:
+            raise BadZipStream(f"非法的条目路径: {name}")
+        return target + ("/" if name.endswith("/") else "")
+
+    def _reserve(self, size):
+        with self._pending:
+            while self._pending_bytes and self._pending_bytes + size > MAX_PENDING_BYTES:
+                self._pending.wait()
+            self._pending_bytes += size
+
+    def _release(self, size):
+        with self._pending:
+            self._pending_bytes -= size
+            self._pending.notify_all()
+
+    def _extract_data(self, name, target, method, data, crc):
+        """在线程池中解压一个完整读入内存的条目"""
+        try:
+            content = decompress(method, data)
+            if zlib.crc32(content) != crc:
+                raise BadZipStream(f"CRC 校验失败: {name}")
+            digest = self.new_hash() if self.new_hash else None
+            if digest is not None:
+                digest.update(content)
+            self._write(target, [content])
+            self._record_hash(target, len(content), digest)
+        except Exception as e:
+            self._error = self._error or e
+            raise
+        finally:
+            self._release(len(data))
+        return True
+
+    def _extract_streaming(self, name, target, method, compressed_size, crc, zip64=False):
+        """在读取线程中边读边解压大条目，或不知道大小的条目
+
+        不知道大小时（compressed_size 为 None），解压到数据流结尾后读取其后的描述符，
+        按其中的 CRC 和大小校验后才改名为目标文件。
+        """
+        decompressor = None if method == STORED else make_decompressor(method)
+        if decompressor is None and compressed_size is None:
+            raise BadZipStream(f"不支持未知大小的未压缩条目: {name}")
+        remaining = compressed_size
+        checksum = 0
+        written = 0
+        consumed = 0  # 读取的压缩数据字节数
+        digest = self.new_hash() if self.new_hash else None
+        temp_path = target + ".tmp"
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temp_path, "wb") as file:
+            while remaining is None or remaining > 0:
+                chunk = self.reader.read_some(READ_BLOCK_SIZE if remaining is None else min(READ_BLOCK_SIZE, remaining))
+                if not chunk:
+                    raise BadZipStream(f"条目数据不完整: {name}")
+                if remaining is not None:
+                    remaining -= len(chunk)
+                consumed += len(chunk)
+                content = chunk if decompressor is None else decompressor.decompress(chunk)
+                checksum = zlib.crc32(content, checksum)
+                written += len(content)
+                if digest is not None:
+                    digest.update(content)
+                file.write(content)
+                if decompressor is not None and decompressor.eof:
+                    self.reader.unread(decompressor.unused_data)
+                    consumed -= len(decompressor.unused_data)
+                    break
+        if compressed_size is None:
+            try:
+                crc, compressed_size, size = self._read_descriptor(zip64)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            if compressed_size != consumed or size != written:
+                os.remove(temp_path)
+                raise BadZipStream(f"大小与数据描述符不符: {name}")
+        if checksum != crc:
+            os.remove(temp_path)
+            raise BadZipStream(f"CRC 校验失败: {name}")
+        os.replace(temp_path, target)
+        self._record_hash(target, written, digest)
+        self._finished(target)
+
+    def _record_hash(self, target, size, digest):
+        if digest is not None:
+            name = os.path.relpath(target, self.output_folder).replace(os.sep, "/")
+            with self._pending:
+                self.file_hashes[name] = (size, digest.hexdigest())
+
+    def _write(self, target, chunks):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = target + ".tmp"
+        with open(temp_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(temp_path, target)
+        self._finished(target)
+
+    def _finished(self, target):
+        with self._pending:
+            self.extracted += 1
+        if self.on_extracted is not None:
+            try:
+                self.on_extracted(target)
+            except Exception as e:
+                logging.error(f"处理解压完成的文件失败: {target}, 错误: {e}")